@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Authority, Category, Issue, IssueConfirmation, UserProfile, NotificationLog, AuthorityUser, IssueStatusLog
+from .models import Authority, Category, Issue, IssueConfirmation, UserProfile, NotificationLog, AuthorityUser, IssueStatusLog, ResolutionTimeStats, DailyIssueStats, Ward
+from .search import matching_ids
+from .workflow import TRANSITIONS, bulk_transition_issues
 
 
 @admin.register(Authority)
@@ -25,10 +27,49 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Issue)
 class IssueAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'status', 'severity', 'days_since_report', 'reported_at', 'status_updated_at']
-    list_filter = ['status', 'severity', 'category__authority']
+    list_filter = ['status', 'severity', 'category__authority', 'ward']
     search_fields = ['title', 'address', 'description']
     date_hierarchy = 'reported_at'
     readonly_fields = ['days_since_report', 'urgency_level', 'escalation_label', 'status_updated_at']
+    actions = ['accept_issues', 'start_progress_issues', 'complete_issues']
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE '%term%' scans when there is one
+        ids = matching_ids(search_term) if search_term else None
+        if ids is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(id__in=ids), False
+    
+    def _transition(self, request, queryset, action):
+        """Run a workflow transition on the selected issues"""
+        updated, skipped = bulk_transition_issues(None, queryset.values_list('id', flat=True), action)
+        self.message_user(
+            request,
+            f'{TRANSITIONS[action].label}: {len(updated)} updated, {len(skipped)} skipped (wrong status).'
+        )
+    
+    @admin.action(description='Accept selected issues')
+    def accept_issues(self, request, queryset):
+        self._transition(request, queryset, 'accept')
+    
+    @admin.action(description='Start progress on selected issues')
+    def start_progress_issues(self, request, queryset):
+        self._transition(request, queryset, 'progress')
+    
+    @admin.action(description='Mark selected issues as resolved')
+    def complete_issues(self, request, queryset):
+        self._transition(request, queryset, 'complete')
+
+
+@admin.register(Ward)
+class WardAdmin(admin.ModelAdmin):
+    list_display = ['name', 'code', 'updated_at']
+    search_fields = ['name', 'code']
+    readonly_fields = ['min_lat', 'max_lat', 'min_lng', 'max_lng', 'updated_at']
+    exclude = ['geometry']
+    
+    def has_add_permission(self, request):
+        return False  # Boundaries are loaded with the load_wards command
 
 
 @admin.register(IssueConfirmation)
@@ -80,3 +121,27 @@ class IssueStatusLogAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False  # Logs cannot be deleted
 
+
+@admin.register(ResolutionTimeStats)
+class ResolutionTimeStatsAdmin(admin.ModelAdmin):
+    list_display = ['month', 'authority', 'category', 'metric', 'count', 'p50_hours', 'p90_hours', 'p95_hours']
+    list_filter = ['metric', 'authority', 'month']
+    
+    def has_add_permission(self, request):
+        return False  # Maintained by core.analytics
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyIssueStats)
+class DailyIssueStatsAdmin(admin.ModelAdmin):
+    list_display = ['date', 'authority', 'category', 'new_count', 'acknowledged_count', 'resolved_count', 'backlog', 'avg_days_ignored']
+    list_filter = ['authority', 'date']
+    date_hierarchy = 'date'
+    
+    def has_add_permission(self, request):
+        return False  # Maintained by core.rollups
+    
+    def has_change_permission(self, request, obj=None):
+        return False
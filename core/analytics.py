@@ -0,0 +1,190 @@
+"""
+Resolution-time analytics for The Blindspot Initiative.
+
+Time to acknowledge (reported_at -> acknowledged_at) and time to resolve
+(reported_at -> resolved_at) are kept per authority, category and month
+in ResolutionTimeStats rows. Each row holds a fixed, log-spaced
+histogram, so a transition only adds to a few bucket counters, rows
+merge by adding histograms, and percentiles come from the histogram
+without touching issues. The error of a percentile is bounded by the
+width of the bucket it falls in.
+
+Rows are updated by an issue_status_changed hook; rebuild_resolution_stats()
+(and the management command of the same name) recomputes them from the
+issue timestamps.
+"""
+from collections import defaultdict
+from bisect import bisect_right
+
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Issue, ResolutionTimeStats
+from .workflow import issue_status_changed
+
+# Upper bounds (hours) of the histogram buckets; a last open-ended bucket
+# catches everything beyond a year
+BUCKET_EDGES_HOURS = [1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 720, 1440, 2160, 4320, 8760]
+
+PERCENTILES = (50, 90, 95)
+
+# metric -> issue timestamp that ends the measured interval
+METRIC_FIELDS = {
+    'acknowledge': 'acknowledged_at',
+    'resolve': 'resolved_at',
+}
+
+# workflow action -> metric it completes
+METRIC_FOR_ACTION = {
+    'accept': 'acknowledge',
+    'complete': 'resolve',
+}
+
+
+def empty_histogram():
+    return [0] * (len(BUCKET_EDGES_HOURS) + 1)
+
+
+def bucket_index(hours):
+    return bisect_right(BUCKET_EDGES_HOURS, max(hours, 0))
+
+
+def percentile(histogram, q):
+    """
+    Estimate the q-th percentile (hours) from a histogram, interpolating
+    linearly inside the bucket it falls in. None when empty.
+    """
+    count = sum(histogram)
+    if not count:
+        return None
+    target = count * q / 100
+    seen = 0
+    for index, bucket_count in enumerate(histogram):
+        if bucket_count and seen + bucket_count >= target:
+            lower = BUCKET_EDGES_HOURS[index - 1] if index else 0
+            if index == len(BUCKET_EDGES_HOURS):
+                return float(lower)  # Open-ended last bucket
+            upper = BUCKET_EDGES_HOURS[index]
+            return lower + (upper - lower) * (target - seen) / bucket_count
+        seen += bucket_count
+    return float(BUCKET_EDGES_HOURS[-1])
+
+
+def _apply(stats, histogram, count, total_hours):
+    """Add a partial histogram to a stats row and refresh its percentiles"""
+    merged = stats.histogram or empty_histogram()
+    stats.histogram = [a + b for a, b in zip(merged, histogram)]
+    stats.count += count
+    stats.total_hours += total_hours
+    stats.p50_hours, stats.p90_hours, stats.p95_hours = (percentile(stats.histogram, q) for q in PERCENTILES)
+
+
+def _month(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def _samples(rows, metric):
+    """Group (authority, category, month) -> (histogram, count, total hours)"""
+    end_field = METRIC_FIELDS[metric]
+    groups = defaultdict(lambda: [empty_histogram(), 0, 0.0])
+    for row in rows:
+        end = row[end_field]
+        if not end:
+            continue
+        hours = (end - row['reported_at']).total_seconds() / 3600
+        group = groups[(row['category__authority_id'], row['category_id'], _month(end))]
+        group[0][bucket_index(hours)] += 1
+        group[1] += 1
+        group[2] += hours
+    return groups
+
+
+def record_transitions(rows, metric):
+    """Fold newly transitioned issue rows into the running stats"""
+    with transaction.atomic():
+        for (authority_id, category_id, month), (histogram, count, total_hours) in _samples(rows, metric).items():
+            stats, _ = ResolutionTimeStats.objects.get_or_create(
+                authority_id=authority_id, category_id=category_id, month=month, metric=metric,
+            )
+            # Re-read under a row lock so concurrent hooks add up instead of overwriting
+            stats = ResolutionTimeStats.objects.select_for_update().get(pk=stats.pk)
+            _apply(stats, histogram, count, total_hours)
+            stats.save()
+
+
+@receiver(issue_status_changed, dispatch_uid='core.analytics.update_resolution_stats')
+def update_resolution_stats(sender, event, **kwargs):
+    metric = METRIC_FOR_ACTION.get(event.transition.action)
+    if metric:
+        record_transitions(event.issues, metric)
+
+
+def rebuild_resolution_stats():
+    """Recompute every stats row from issue timestamps; returns the row count"""
+    rows = Issue.objects.order_by().values(
+        'category_id', 'category__authority_id', 'reported_at', 'acknowledged_at', 'resolved_at',
+    )
+    stats = []
+    for metric, end_field in METRIC_FIELDS.items():
+        metric_rows = rows.filter(**{f'{end_field}__isnull': False}).iterator(chunk_size=2000)
+        for (authority_id, category_id, month), (histogram, count, total_hours) in _samples(metric_rows, metric).items():
+            row = ResolutionTimeStats(authority_id=authority_id, category_id=category_id, month=month, metric=metric)
+            _apply(row, histogram, count, total_hours)
+            stats.append(row)
+
+    with transaction.atomic():
+        ResolutionTimeStats.objects.all().delete()
+        ResolutionTimeStats.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
+
+
+def resolution_summary(authority_id=None, category_id=None, metric=None, since=None, until=None):
+    """
+    Percentiles per authority (or per category when category_id is given)
+    and month, read from the precomputed rows only. Months are dates on
+    the first of the month.
+    """
+    stats = ResolutionTimeStats.objects.select_related('authority', 'category')
+    if authority_id:
+        stats = stats.filter(authority_id=authority_id)
+    if category_id:
+        stats = stats.filter(category_id=category_id)
+    if metric:
+        stats = stats.filter(metric=metric)
+    if since:
+        stats = stats.filter(month__gte=since)
+    if until:
+        stats = stats.filter(month__lte=until)
+
+    groups = {}
+    for row in stats:
+        key = (row.authority_id, row.category_id if category_id else None, row.month, row.metric)
+        groups.setdefault(key, []).append(row)
+
+    results = []
+    for (_, _, month, metric_name), rows in groups.items():
+        first = rows[0]
+        if len(rows) == 1:
+            count, total_hours = first.count, first.total_hours
+            p50, p90, p95 = first.p50_hours, first.p90_hours, first.p95_hours
+        else:
+            # Authority-wide figures: histograms of its categories add up
+            histogram = [sum(counts) for counts in zip(*(r.histogram for r in rows))]
+            count, total_hours = sum(r.count for r in rows), sum(r.total_hours for r in rows)
+            p50, p90, p95 = (percentile(histogram, q) for q in PERCENTILES)
+        entry = {
+            'authority_id': first.authority_id,
+            'authority': first.authority.name,
+            'month': month.strftime('%Y-%m'),
+            'metric': metric_name,
+            'count': count,
+            'mean_hours': round(total_hours / count, 1) if count else None,
+            'p50_hours': round(p50, 1) if p50 is not None else None,
+            'p90_hours': round(p90, 1) if p90 is not None else None,
+            'p95_hours': round(p95, 1) if p95 is not None else None,
+        }
+        if category_id:
+            entry['category_id'], entry['category'] = first.category_id, first.category.name
+        results.append(entry)
+    return results
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Connect the issue_status_changed hooks
+        from . import analytics, autocomplete, compression, details, heatmap, rollups, search, wards  # noqa: F401
@@ -0,0 +1,281 @@
+"""
+Typeahead suggestions for The Blindspot Initiative.
+
+Addresses, category names and authority names are held in an in-memory
+prefix trie. Every word of a term is a key, so "road" finds "MG Road".
+Each node keeps the TOP_K heaviest terms below it (weight = number of
+issues), so a lookup walks len(prefix) nodes and returns a stored list,
+with no search of the subtree.
+
+Memory is bounded: at most MAX_TERMS addresses (the most reported), keys
+cut at MAX_KEY_LENGTH characters, and key tails kept in small buckets
+rather than nodes. New and deleted issues update the local trie in
+place; category and authority changes rebuild it (through a cache
+version, see core.cache, which reaches other processes when the cache is
+shared), and REBUILD_SECONDS bounds how stale another process's view
+can get.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Avg, Count
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump, versioned_key
+from .models import Authority, Category, Issue
+
+TOP_K = 8
+
+MAX_TERMS = getattr(settings, 'AUTOCOMPLETE_MAX_TERMS', 20000)
+
+MAX_KEY_LENGTH = 32
+
+# Suffixes a node holds before it is split into children
+BUCKET_SIZE = 16
+
+REBUILD_SECONDS = getattr(settings, 'AUTOCOMPLETE_REBUILD_SECONDS', 600)
+
+_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class _Node:
+    __slots__ = ('children', 'bucket', 'top')
+
+    def __init__(self):
+        self.children = None
+        self.bucket = []  # (rest of key, term key) until the node is split
+        self.top = []  # Term keys, heaviest first
+
+
+class Term:
+    __slots__ = ('kind', 'text', 'ref', 'weight', 'latitude', 'longitude')
+
+    def __init__(self, kind, text, ref=None, weight=0, latitude=None, longitude=None):
+        self.kind = kind
+        self.text = text
+        self.ref = ref
+        self.weight = weight
+        self.latitude = latitude
+        self.longitude = longitude
+
+    def as_dict(self):
+        data = {'kind': self.kind, 'text': self.text, 'count': self.weight}
+        if self.ref is not None:
+            data['id'] = self.ref
+        if self.latitude is not None:
+            data['latitude'], data['longitude'] = self.latitude, self.longitude
+        return data
+
+
+def _keys(text):
+    """Trie keys for a term: the whole text and every word start"""
+    text = text.lower()
+    return {text[match.start():match.start() + MAX_KEY_LENGTH] for match in _WORD_RE.finditer(text)} | {text[:MAX_KEY_LENGTH]}
+
+
+class PrefixTrie:
+    """
+    Burst trie whose nodes cache their top-K terms. A node keeps the rest
+    of its keys in a bucket until more than BUCKET_SIZE arrive, so the
+    long, rarely shared tails of addresses never become chains of nodes.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.terms = {}  # (kind, text) -> Term
+        self.node_count = 1
+
+    def add(self, term):
+        key = (term.kind, term.text)
+        weight = term.weight
+        self.terms[key] = term
+        for text in _keys(term.text):
+            node = self.root
+            depth = 0
+            while True:
+                top = node.top
+                # Cheap test first: a rebuild adds terms heaviest first, so
+                # most full nodes are skipped
+                if len(top) < TOP_K or self.terms[top[-1]].weight < weight:
+                    self._promote(node, key, weight)
+                if node.bucket is not None:
+                    node.bucket.append((text[depth:], key))
+                    if len(node.bucket) > BUCKET_SIZE:
+                        self._split(node)
+                    break
+                if depth == len(text):
+                    break
+                child = node.children.get(text[depth])
+                if child is None:
+                    child = node.children[text[depth]] = _Node()
+                    self.node_count += 1
+                node = child
+                depth += 1
+
+    def _split(self, node):
+        node.children = {}
+        bucket, node.bucket = node.bucket, None
+        for rest, key in bucket:
+            if not rest:
+                continue  # Ends here: already ranked in node.top
+            child = node.children.get(rest[0])
+            if child is None:
+                child = node.children[rest[0]] = _Node()
+                self.node_count += 1
+            child.bucket.append((rest[1:], key))
+            self._promote(child, key, self.terms[key].weight)
+        for child in node.children.values():
+            if len(child.bucket) > BUCKET_SIZE:
+                self._split(child)
+
+    def _path(self, text):
+        """Nodes along a key, ending at the node whose bucket holds it"""
+        node = self.root
+        for char in text:
+            yield node
+            if node.bucket is not None:
+                return
+            node = node.children.get(char)
+            if node is None:
+                return
+        yield node
+
+    def reweigh(self, kind, text, delta):
+        """Change a term's weight; returns False if the term is unknown"""
+        key = (kind, text)
+        term = self.terms.get(key)
+        if term is None:
+            return False
+        term.weight = max(term.weight + delta, 0)
+        for prefix in _keys(text):
+            for node in self._path(prefix):
+                if delta > 0:
+                    self._promote(node, key, term.weight)
+                elif key in node.top:
+                    # May leave a better term outside the top list until the next rebuild
+                    node.top.sort(key=lambda k: -self.terms[k].weight)
+        return True
+
+    def _promote(self, node, key, weight):
+        top = node.top
+        if key in top:
+            top.remove(key)
+        elif len(top) >= TOP_K and self.terms[top[-1]].weight >= weight:
+            return
+        index = 0
+        while index < len(top) and self.terms[top[index]].weight >= weight:
+            index += 1
+        top.insert(index, key)
+        del top[TOP_K:]
+
+    def lookup(self, prefix, limit=TOP_K):
+        prefix = prefix.lower()[:MAX_KEY_LENGTH]
+        node = self.root
+        for depth, char in enumerate(prefix):
+            if node.bucket is not None:
+                # At most BUCKET_SIZE entries to filter
+                rest = prefix[depth:]
+                keys = {key for suffix, key in node.bucket if suffix.startswith(rest)}
+                return sorted((self.terms[key] for key in keys), key=lambda term: -term.weight)[:limit]
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self.terms[key] for key in node.top[:limit]]
+
+    def stats(self):
+        return {'terms': len(self.terms), 'nodes': self.node_count}
+
+
+def build_trie():
+    trie = PrefixTrie()
+    for authority_id, name, count in Authority.objects.annotate(n=Count('categories__issues')).values_list('id', 'name', 'n'):
+        trie.add(Term('authority', name, authority_id, count))
+    for category_id, name, count in Category.objects.annotate(n=Count('issues')).values_list('id', 'name', 'n'):
+        trie.add(Term('category', name, category_id, count))
+    # An address reported several times is placed at the centre of its
+    # reports (independent maximums could pair one report's latitude with
+    # another's longitude)
+    addresses = (
+        Issue.objects.exclude(address='').order_by().values('address')
+        .annotate(n=Count('id'), latitude=Avg('latitude'), longitude=Avg('longitude'))
+        .order_by('-n')[:MAX_TERMS]
+    )
+    for row in addresses:
+        trie.add(Term(
+            'address', row['address'], None, row['n'],
+            round(float(row['latitude']), 7), round(float(row['longitude']), 7),
+        ))
+    return trie
+
+
+_lock = threading.Lock()
+_trie = None
+_trie_version = None
+_built_at = 0.0
+
+
+def invalidate():
+    """Rebuild every process's trie on its next lookup"""
+    global _trie
+    _trie = None
+    bump('autocomplete')
+
+
+def get_trie():
+    """The current process's trie, rebuilt when stale"""
+    global _trie, _trie_version, _built_at
+    version = versioned_key('autocomplete')
+    if _trie is None or _trie_version != version or time.monotonic() - _built_at > REBUILD_SECONDS:
+        with _lock:
+            if _trie is None or _trie_version != version or time.monotonic() - _built_at > REBUILD_SECONDS:
+                _trie = build_trie()
+                _trie_version = version
+                _built_at = time.monotonic()
+    return _trie
+
+
+def suggest(prefix, limit=TOP_K):
+    """Up to `limit` suggestions for a prefix, as dicts for the API"""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    return [term.as_dict() for term in get_trie().lookup(prefix, limit)]
+
+
+def _apply_issue_change(issue, delta):
+    """
+    Update this process's trie in place. Other processes catch up at their
+    next periodic rebuild; bumping the shared version here would make every
+    worker rebuild on every report.
+    """
+    if not issue.address:
+        return
+    with _lock:
+        if _trie is None:
+            return
+        known = _trie.reweigh('address', issue.address, delta)
+        # Past the cap, new addresses wait for the next rebuild to compete
+        if not known and delta > 0 and len(_trie.terms) < MAX_TERMS:
+            _trie.add(Term('address', issue.address, None, delta, float(issue.latitude), float(issue.longitude)))
+
+
+@receiver(post_save, sender=Issue, dispatch_uid='core.autocomplete.issue_saved')
+def _issue_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        _apply_issue_change(instance, 1)
+
+
+@receiver(post_delete, sender=Issue, dispatch_uid='core.autocomplete.issue_deleted')
+def _issue_deleted(sender, instance, **kwargs):
+    _apply_issue_change(instance, -1)
+
+
+@receiver(post_save, sender=Category, dispatch_uid='core.autocomplete.category_saved')
+@receiver(post_delete, sender=Category, dispatch_uid='core.autocomplete.category_deleted')
+@receiver(post_save, sender=Authority, dispatch_uid='core.autocomplete.authority_saved')
+@receiver(post_delete, sender=Authority, dispatch_uid='core.autocomplete.authority_deleted')
+def _names_changed(sender, **kwargs):
+    invalidate()
@@ -0,0 +1,28 @@
+"""
+SQLite backend tuned for small production deployments of The Blindspot
+Initiative.
+
+Every new connection gets the SQLITE_PRAGMAS from settings (WAL journal,
+synchronous=NORMAL, a busy timeout, mmap and page cache sizes), so
+readers no longer block the writer. With SQLITE_IMMEDIATE_TRANSACTIONS,
+transactions start with BEGIN IMMEDIATE: they wait for the write lock
+up front (within busy_timeout) instead of failing with "database is
+locked" when two of them try to upgrade a read lock at the same time.
+"""
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if getattr(settings, 'SQLITE_IMMEDIATE_TRANSACTIONS', False):
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
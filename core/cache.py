@@ -0,0 +1,39 @@
+"""
+Versioned cache namespaces for The Blindspot Initiative.
+
+Caches that are dropped as a whole (API responses, issue details,
+heatmap cells, the ward index, the autocomplete trie) keep a version
+number per namespace in the cache and build their keys from
+versioned_key(). bump() moves a namespace to its next version, and the
+entries of the old one simply expire.
+
+The version is read from Django's cache on every use, so a bump reaches
+other worker processes only when they share a cache (CACHE_URL, see
+settings); with the per-process default each worker keeps its own
+version and its stale entries live until they expire.
+"""
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'{namespace}:version'
+
+
+def versioned_key(namespace):
+    """Key prefix for a namespace's current version, e.g. 'heatmap:3'"""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return f'{namespace}:{version}'
+
+
+def bump(namespace):
+    """Invalidate every entry of a namespace"""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Readers that found no version used 1
+        cache.set(key, 2, None)
@@ -0,0 +1,186 @@
+"""
+API response compression and caching for The Blindspot Initiative.
+
+CompressionMiddleware compresses JSON responses with the best encoding
+the client accepts: brotli when the optional `brotli` package is
+installed, otherwise gzip. WhiteNoise already serves static files
+pre-compressed.
+
+@cached_response caches a GET view's body per data version, already
+compressed for each encoding asked for, so a hot payload (the map's
+issue list) is built and compressed once per change rather than once
+per request. Reports, deletions, confirmations, status transitions and
+category/authority edits bump the version; RESPONSE_CACHE_SECONDS
+bounds staleness for writes that bypass signals (bulk imports) and for
+bodies read from a lagging replica. The version is kept in the cache,
+so a bump only reaches other worker processes when they share a cache
+(CACHE_URL); with the per-process default they can serve a stale body
+for up to RESPONSE_CACHE_SECONDS.
+"""
+import gzip
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .cache import bump, versioned_key
+from .models import Authority, Category, Issue, IssueConfirmation
+from .routers import current_read_alias
+from .workflow import issue_status_changed
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Smaller bodies are not worth the CPU (or the header overhead)
+MIN_BYTES = getattr(settings, 'COMPRESS_MIN_BYTES', 1024)
+
+CACHE_SECONDS = getattr(settings, 'RESPONSE_CACHE_SECONDS', 300)
+
+# Larger (compressed) bodies are not cached, to stay within cache backend limits
+CACHE_MAX_BYTES = getattr(settings, 'RESPONSE_CACHE_MAX_BYTES', 4 * 1024 * 1024)
+
+# (gzip level, brotli quality): per-response compression has to be cheap;
+# cached bodies are compressed once per data version, so brotli can afford
+# a higher quality (gzip 9 saves ~2% over 6 on the map payload at 2-4x the CPU)
+DYNAMIC_LEVELS = (6, 5)
+CACHED_LEVELS = (6, 9)
+
+
+def _accepted(header):
+    """{coding: q} from an Accept-Encoding header"""
+    codings = {}
+    for part in header.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip()] = q
+    return codings
+
+
+def negotiate(header):
+    """The encoding to answer with ('br', 'gzip'), or None for identity"""
+    codings = _accepted(header)
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best = None
+    for coding in candidates:
+        q = codings.get(coding, codings.get('*', 0.0))
+        if q > 0 and (best is None or q > best[1]):
+            best = (coding, q)
+    return best[0] if best else None
+
+
+def compress(body, encoding, levels=DYNAMIC_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(body, quality=levels[1])
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(body, compresslevel=levels[0], mtime=0)
+
+
+def _compressible(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').startswith('application/json')
+        and len(response.content) >= MIN_BYTES
+    )
+
+
+class CompressionMiddleware:
+    """Compresses JSON responses for clients that accept it"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not _compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        body = compress(response.content, encoding)
+        if len(body) >= len(response.content):
+            return response
+        response.content = body
+        response['Content-Length'] = str(len(body))
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def invalidate():
+    """Drop every cached response (old keys just expire)"""
+    bump('responses')
+
+
+def _cache_key(request, encoding):
+    path = hashlib.sha1(request.get_full_path().encode('utf-8')).hexdigest()
+    # Per database: a body read from a lagging replica must not be served
+    # to a session that reads its own writes from the primary
+    return f'{versioned_key("responses")}:{current_read_alias()}:{path}:{encoding or "identity"}'
+
+
+def cached_response(view_func):
+    """
+    Decorator for GET views whose body depends only on the URL and the
+    issue data (never on the user): the body is cached per data version
+    and per negotiated encoding, compressed when it is stored. Apply it
+    below @read_from_replica.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view_func(request, *args, **kwargs)
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        key = _cache_key(request, encoding)
+        entry = cache.get(key)
+        if entry is None:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            body = response.content
+            if encoding and len(body) >= MIN_BYTES:
+                body = compress(body, encoding, CACHED_LEVELS)
+            else:
+                encoding = None
+            entry = (response['Content-Type'], encoding, body)
+            if len(body) <= CACHE_MAX_BYTES:
+                cache.set(key, entry, CACHE_SECONDS)
+        content_type, encoding, body = entry
+        response = HttpResponse(body, content_type=content_type)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding:
+            response['Content-Encoding'] = encoding
+        return response
+    return wrapper
+
+
+@receiver(issue_status_changed, dispatch_uid='core.compression.status_changed')
+def _invalidate_on_transition(sender, event, **kwargs):
+    invalidate()
+
+
+@receiver(post_save, sender=Issue, dispatch_uid='core.compression.issue_saved')
+@receiver(post_delete, sender=Issue, dispatch_uid='core.compression.issue_deleted')
+@receiver(post_save, sender=IssueConfirmation, dispatch_uid='core.compression.confirmation_saved')
+@receiver(post_delete, sender=IssueConfirmation, dispatch_uid='core.compression.confirmation_deleted')
+@receiver(post_save, sender=Category, dispatch_uid='core.compression.category_saved')
+@receiver(post_delete, sender=Category, dispatch_uid='core.compression.category_deleted')
+@receiver(post_save, sender=Authority, dispatch_uid='core.compression.authority_saved')
+@receiver(post_delete, sender=Authority, dispatch_uid='core.compression.authority_deleted')
+def _invalidate_on_write(sender, **kwargs):
+    invalidate()
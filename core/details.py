@@ -0,0 +1,155 @@
+"""
+Cached issue details for The Blindspot Initiative.
+
+The map lists issues slim (api_issues?fields=slim) and loads an issue's
+details when its popup opens, or in batches for the issues in view. The
+part of a detail that is the same for every user is cached per issue
+for DETAIL_CACHE_SECONDS. A write to the issue, its confirmations or
+its notifications drops that issue's entry; category and authority
+edits drop them all (through a cache version, see core.cache). Other
+workers only see either when the cache is shared (CACHE_URL).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import serializers
+from .cache import bump, versioned_key
+from .images import image_payload
+from .models import Authority, Category, Issue, IssueComment, IssueConfirmation, NotificationLog
+from .workflow import issue_status_changed
+
+CACHE_SECONDS = getattr(settings, 'DETAIL_CACHE_SECONDS', 300)
+
+# Largest batch the API serves
+MAX_BATCH = 100
+
+# Comments per issue in a batch: the default, and the most the API returns
+COMMENTS_PER_ISSUE = 3
+MAX_COMMENTS = 10
+
+
+def _cache_key(prefix, issue_id):
+    return f'{prefix}:{issue_id}'
+
+
+def invalidate(issue_ids=None):
+    """Drop the cached details of some issues, or of every issue"""
+    if issue_ids is None:
+        bump('details')
+        return
+    prefix = versioned_key('details')
+    cache.delete_many([_cache_key(prefix, issue_id) for issue_id in issue_ids])
+
+
+def build_details(issue_ids):
+    """{issue id: details} for existing issues, in two queries"""
+    issues = (
+        Issue.objects.filter(id__in=issue_ids)
+        .select_related('category__authority', 'reported_by')
+        .annotate(confirmation_count=Count('confirmations'))
+    )
+    latest = {}
+    notifications = (
+        NotificationLog.objects.filter(issue_id__in=issue_ids)
+        .select_related('authority').order_by('issue_id', '-sent_at', '-id')
+    )
+    for notification in notifications:
+        latest.setdefault(notification.issue_id, notification)
+
+    now = timezone.now()
+    details = {}
+    for issue in issues:
+        data = serializers.serialize(serializers.IssueRecord.from_issue(issue, now), serializers.DETAIL_FIELDS)
+        notification = latest.get(issue.id)
+        data.update({
+            'reported_by': issue.reported_by.username if issue.reported_by else 'Anonymous',
+            'image_url': issue.image.url if issue.image else None,
+            'image': image_payload(issue),
+            'escalation_label': issue.escalation_label,
+            'escalation_display': issue.escalation_display,
+            'notification': {
+                'sent_at': notification.sent_at.isoformat(),
+                'status': notification.status,
+                'authority_notified': notification.authority.name,
+            } if notification else None,
+        })
+        details[issue.id] = data
+    return details
+
+
+def get_details(issue_ids):
+    """{issue id: details} for existing issues, from the cache where possible"""
+    prefix = versioned_key('details')
+    keys = {issue_id: _cache_key(prefix, issue_id) for issue_id in issue_ids}
+    cached = cache.get_many(list(keys.values()))
+    details = {issue_id: cached[key] for issue_id, key in keys.items() if key in cached}
+    missing = [issue_id for issue_id in keys if issue_id not in details]
+    if missing:
+        built = build_details(missing)
+        cache.set_many({keys[issue_id]: data for issue_id, data in built.items()}, CACHE_SECONDS)
+        details.update(built)
+    return details
+
+
+def confirmed_by(user, issue_ids):
+    """IDs of the given issues the user has confirmed"""
+    if not user.is_authenticated:
+        return set()
+    return set(
+        IssueConfirmation.objects.filter(user=user, issue_id__in=issue_ids).values_list('issue_id', flat=True)
+    )
+
+
+def comment_payload(comment):
+    return {
+        'id': comment.id,
+        'user': comment.user.username,
+        'content': comment.content,
+        'created_at': comment.created_at.isoformat(),
+    }
+
+
+def top_comments(issue_ids, limit):
+    """{issue id: latest `limit` comments} for the given issues, in one query"""
+    comments = (
+        IssueComment.objects.filter(issue_id__in=issue_ids).select_related('user')
+        .annotate(position=Window(RowNumber(), partition_by=F('issue_id'), order_by=[F('created_at').desc(), F('id').desc()]))
+        .filter(position__lte=limit)
+        .order_by('issue_id', 'position')
+    )
+    result = {}
+    for comment in comments:
+        result.setdefault(comment.issue_id, []).append(comment_payload(comment))
+    return result
+
+
+@receiver(issue_status_changed, dispatch_uid='core.details.status_changed')
+def _invalidate_on_transition(sender, event, **kwargs):
+    invalidate(event.issue_ids)
+
+
+@receiver(post_save, sender=Issue, dispatch_uid='core.details.issue_saved')
+@receiver(post_delete, sender=Issue, dispatch_uid='core.details.issue_deleted')
+def _issue_changed(sender, instance, **kwargs):
+    invalidate([instance.pk])
+
+
+@receiver(post_save, sender=IssueConfirmation, dispatch_uid='core.details.confirmation_saved')
+@receiver(post_delete, sender=IssueConfirmation, dispatch_uid='core.details.confirmation_deleted')
+@receiver(post_save, sender=NotificationLog, dispatch_uid='core.details.notification_saved')
+@receiver(post_delete, sender=NotificationLog, dispatch_uid='core.details.notification_deleted')
+def _related_changed(sender, instance, **kwargs):
+    invalidate([instance.issue_id])
+
+
+@receiver(post_save, sender=Category, dispatch_uid='core.details.category_saved')
+@receiver(post_delete, sender=Category, dispatch_uid='core.details.category_deleted')
+@receiver(post_save, sender=Authority, dispatch_uid='core.details.authority_saved')
+@receiver(post_delete, sender=Authority, dispatch_uid='core.details.authority_deleted')
+def _names_changed(sender, **kwargs):
+    invalidate()
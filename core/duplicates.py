@@ -0,0 +1,65 @@
+"""
+Duplicate report detection for The Blindspot Initiative.
+
+A new report is a likely duplicate of an unresolved issue in the same
+category when it is very close by, or when its photo is perceptually
+near-identical and it is still within a wider radius (GPS drift).
+Candidates come from the (category, latitude, longitude) index via a
+bounding box, so only a handful of rows are ever compared in Python.
+"""
+from django.conf import settings
+
+from .geo import bounding_box, haversine_distance
+from .images import hash_distance
+from .models import Issue, UNRESOLVED_STATUSES
+
+# Same-category reports closer than this are treated as the same problem
+DUPLICATE_RADIUS_M = getattr(settings, 'DUPLICATE_RADIUS_METERS', 50)
+
+# With a matching photo, reports this far apart still count (GPS drift)
+IMAGE_MATCH_RADIUS_M = getattr(settings, 'DUPLICATE_IMAGE_RADIUS_METERS', 150)
+
+# Max differing bits between two dHashes for the photos to match
+IMAGE_MATCH_BITS = getattr(settings, 'DUPLICATE_IMAGE_MATCH_BITS', 10)
+
+MAX_CANDIDATES = 5
+
+
+def find_duplicates(category_id, latitude, longitude, image_phash=''):
+    """
+    Return likely duplicates of a new report, best match first.
+
+    Each candidate is a dict with the issue's id, title, status,
+    distance_m and whether its photo matched.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    min_lat, max_lat, min_lng, max_lng = bounding_box(
+        latitude, longitude, max(DUPLICATE_RADIUS_M, IMAGE_MATCH_RADIUS_M) / 1000
+    )
+    rows = Issue.objects.filter(
+        category_id=category_id,
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+        status__in=UNRESOLVED_STATUSES,
+    ).values('id', 'title', 'status', 'latitude', 'longitude', 'image_phash')
+
+    candidates = []
+    for row in rows:
+        distance_m = haversine_distance(
+            latitude, longitude, float(row['latitude']), float(row['longitude'])
+        ) * 1000
+        image_match = bool(
+            image_phash and row['image_phash'] and
+            hash_distance(image_phash, row['image_phash']) <= IMAGE_MATCH_BITS
+        )
+        if distance_m <= DUPLICATE_RADIUS_M or (image_match and distance_m <= IMAGE_MATCH_RADIUS_M):
+            candidates.append({
+                'id': row['id'],
+                'title': row['title'],
+                'status': row['status'],
+                'distance_m': round(distance_m),
+                'image_match': image_match,
+            })
+
+    candidates.sort(key=lambda c: (not c['image_match'], c['distance_m']))
+    return candidates[:MAX_CANDIDATES]
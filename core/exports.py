@@ -0,0 +1,234 @@
+"""
+Streaming data exports for The Blindspot Initiative.
+
+Issues, status logs and notification logs are read with
+QuerySet.iterator() (a server-side cursor inside a transaction on
+PostgreSQL) and written out as CSV, NDJSON or GeoJSON in fixed-size
+text chunks, optionally gzipped, so memory use stays flat however many
+rows are exported. Shared by the export endpoint and the export_data
+management command.
+"""
+import csv
+import zlib
+from datetime import datetime, time
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Issue, IssueStatusLog, NotificationLog
+
+# Rows fetched per database round trip
+FETCH_SIZE = 2000
+
+# Approximate size of each text chunk handed to the response / file
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportError(ValueError):
+    """Invalid export parameters"""
+
+
+# dataset -> (model, date field, path to the issue from the model, columns)
+# Columns are (header, ORM lookup) pairs.
+DATASETS = {
+    'issues': (Issue, 'reported_at', '', [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('category', 'category__name'),
+        ('authority', 'category__authority__name'),
+        ('latitude', 'latitude'),
+        ('longitude', 'longitude'),
+        ('address', 'address'),
+        ('severity', 'severity'),
+        ('status', 'status'),
+        ('reported_at', 'reported_at'),
+        ('acknowledged_at', 'acknowledged_at'),
+        ('in_progress_at', 'in_progress_at'),
+        ('resolved_at', 'resolved_at'),
+    ]),
+    'status-logs': (IssueStatusLog, 'changed_at', 'issue__', [
+        ('id', 'id'),
+        ('issue_id', 'issue_id'),
+        ('authority', 'authority_user__authority__name'),
+        ('previous_status', 'previous_status'),
+        ('new_status', 'new_status'),
+        ('changed_at', 'changed_at'),
+        ('notes', 'notes'),
+    ]),
+    'notifications': (NotificationLog, 'sent_at', 'issue__', [
+        ('id', 'id'),
+        ('issue_id', 'issue_id'),
+        ('authority', 'authority__name'),
+        ('email_address', 'email_address'),
+        ('status', 'status'),
+        ('sent_at', 'sent_at'),
+        ('error_message', 'error_message'),
+    ]),
+}
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'geojson': ('application/geo+json', 'geojson'),
+}
+
+
+def _parse_bound(value, end_of_day=False):
+    """Parse a since/until value given as a date or a datetime"""
+    # Dates first: parse_datetime also accepts a bare date, as midnight
+    try:
+        day = parse_date(value)
+        parsed = None if day else parse_datetime(value)
+    except ValueError:
+        day = parsed = None
+    if day is not None:
+        parsed = datetime.combine(day, time.max if end_of_day else time.min)
+    elif parsed is None:
+        raise ExportError(f'Invalid date: {value!r}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_queryset(dataset, params):
+    """
+    Build the filtered queryset for a dataset.
+
+    Accepts the api_issues filters (authority, category, status, applied
+    to the related issue for log datasets) plus since/until date bounds
+    on the dataset's own timestamp.
+    """
+    if dataset not in DATASETS:
+        raise ExportError(f'Unknown dataset: {dataset!r}')
+    model, date_field, issue_path, _ = DATASETS[dataset]
+    queryset = model.objects.all()
+
+    try:
+        if params.get('authority'):
+            queryset = queryset.filter(**{f'{issue_path}category__authority_id': int(params['authority'])})
+        if params.get('category'):
+            queryset = queryset.filter(**{f'{issue_path}category_id': int(params['category'])})
+    except ValueError:
+        raise ExportError('authority and category must be numeric IDs')
+    if params.get('status'):
+        queryset = queryset.filter(**{f'{issue_path}status': params['status']})
+    if params.get('since'):
+        queryset = queryset.filter(**{f'{date_field}__gte': _parse_bound(params['since'])})
+    if params.get('until'):
+        queryset = queryset.filter(**{f'{date_field}__lte': _parse_bound(params['until'], end_of_day=True)})
+
+    # Primary-key order is index-backed and stable for resumable downloads
+    return queryset.order_by('id')
+
+
+def _rows(dataset, queryset):
+    """Yield row tuples in column order without materialising the queryset"""
+    columns = DATASETS[dataset][3]
+    lookups = [lookup for _, lookup in columns]
+    rows = queryset.values_list(*lookups).iterator(chunk_size=FETCH_SIZE)
+    if connections[queryset.db].vendor != 'postgresql':
+        yield from rows
+        return
+    # Outside a transaction Django declares the cursor WITH HOLD, which
+    # PostgreSQL materialises in full at commit; inside one it streams
+    with transaction.atomic(using=queryset.db):
+        yield from rows
+
+
+def _chunked(pieces):
+    """Join small text pieces into CHUNK_SIZE blocks"""
+    buffer, size = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _value(value):
+    """Plain value for text formats"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if value is None:
+        return ''
+    return value
+
+
+def _csv_pieces(headers, rows):
+    line = StringIO()
+    writer = csv.writer(line)
+
+    def render(values):
+        line.seek(0)
+        line.truncate()
+        writer.writerow(values)
+        return line.getvalue()
+
+    yield render(headers)
+    for row in rows:
+        yield render([_value(v) for v in row])
+
+
+def _ndjson_pieces(headers, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def _geojson_pieces(headers, rows):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    lat_index, lng_index = headers.index('latitude'), headers.index('longitude')
+    yield '{"type":"FeatureCollection","features":['
+    first = True
+    for row in rows:
+        properties = {
+            header: value for i, (header, value) in enumerate(zip(headers, row))
+            if i not in (lat_index, lng_index)
+        }
+        feature = encoder.encode({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [float(row[lng_index]), float(row[lat_index])]},
+            'properties': properties,
+        })
+        yield feature if first else ',' + feature
+        first = False
+    yield ']}\n'
+
+
+WRITERS = {
+    'csv': _csv_pieces,
+    'ndjson': _ndjson_pieces,
+    'geojson': _geojson_pieces,
+}
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(dataset, file_format, queryset, gzip=False):
+    """
+    Stream a dataset in the given format as text chunks, or as gzipped
+    bytes when gzip=True.
+    """
+    if file_format not in WRITERS:
+        raise ExportError(f'Unknown format: {file_format!r}')
+    if file_format == 'geojson' and dataset != 'issues':
+        raise ExportError('GeoJSON is only available for issues')
+
+    headers = [header for header, _ in DATASETS[dataset][3]]
+    chunks = _chunked(WRITERS[file_format](headers, _rows(dataset, queryset)))
+    return gzip_chunks(chunks) if gzip else chunks
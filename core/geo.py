@@ -0,0 +1,70 @@
+"""
+Geographic helpers for The Blindspot Initiative.
+Distance and polygon maths shared by the proximity search, duplicate
+detection and ward tagging.
+"""
+import math
+
+R = 6371  # Earth's radius in kilometers
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """
+    Calculate the great-circle distance between two points on Earth
+    using the Haversine formula.
+    
+    Returns distance in kilometers.
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    
+    return R * c
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    Return (min_lat, max_lat, min_lng, max_lng) of a box enclosing the
+    circle of `radius_km` around a point, for index-friendly prefiltering
+    before the exact haversine check.
+    """
+    delta_lat = math.degrees(radius_km / R)
+    delta_lng = math.degrees(radius_km / (R * max(math.cos(math.radians(lat)), 1e-6)))
+    return lat - delta_lat, lat + delta_lat, lng - delta_lng, lng + delta_lng
+
+
+def point_in_ring(lng, lat, ring):
+    """Ray-casting test against one closed [lng, lat] ring"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > lat) != (yj > lat) and lng < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_multipolygon(lat, lng, polygons):
+    """
+    Whether a point lies in GeoJSON MultiPolygon coordinates: inside some
+    polygon's outer ring and outside all of its holes.
+    """
+    for rings in polygons:
+        if rings and point_in_ring(lng, lat, rings[0]):
+            if not any(point_in_ring(lng, lat, hole) for hole in rings[1:]):
+                return True
+    return False
+
+
+def multipolygon_bbox(polygons):
+    """(min_lat, max_lat, min_lng, max_lng) of MultiPolygon coordinates"""
+    lngs = [point[0] for rings in polygons for point in rings[0]]
+    lats = [point[1] for rings in polygons for point in rings[0]]
+    return min(lats), max(lats), min(lngs), max(lngs)
@@ -0,0 +1,234 @@
+"""
+Server-side heatmap aggregation for The Blindspot Initiative.
+
+Unresolved issues are binned into square or hexagonal cells laid out in
+Web Mercator pixel space, so a cell covers the same number of screen
+pixels at every zoom. Each issue is weighted by severity and days
+ignored. One pass over the issues builds the cells for every zoom
+level, and each level is cached, so the endpoint usually answers from
+the cache with a few KB of cell arrays.
+
+A request can be clipped to the map's bounding box. Cells are then
+served from the cached level when it is there; otherwise only the issues
+in a tile-aligned region around the box are binned, at the requested
+zoom only, and that region is cached on its own.
+
+The cache is versioned (see core.cache): new reports, deletions and
+status transitions bump the version, and HEATMAP_CACHE_SECONDS bounds
+staleness for writes that bypass signals (bulk imports).
+"""
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump, versioned_key
+from .models import Issue, UNRESOLVED_STATUSES, days_ignored_for
+from .workflow import issue_status_changed
+
+MAX_ZOOM = 18
+
+# Cell size in screen pixels (square side / hexagon width)
+DEFAULT_CELL_PX = getattr(settings, 'HEATMAP_CELL_PX', 40)
+MIN_CELL_PX, MAX_CELL_PX = 16, 128
+
+CACHE_SECONDS = getattr(settings, 'HEATMAP_CACHE_SECONDS', 300)
+
+SHAPES = ('square', 'hex')
+
+# Web Mercator tile size at zoom 0
+_WORLD_PX = 256
+
+# Clipped regions are built and cached in tiles of this many cells
+_REGION_CELLS = 8
+
+
+def issue_weight(severity, days_ignored):
+    """Blend of severity and neglect (days ignored, capped at 60), in 0..1"""
+    return (severity / 5 + min(days_ignored / 60, 1)) / 2
+
+
+def _project(latitude, longitude):
+    """Latitude/longitude to Web Mercator pixels at zoom 0"""
+    latitude = max(min(latitude, 85.05112878), -85.05112878)
+    sin_lat = math.sin(math.radians(latitude))
+    x = (longitude + 180) / 360 * _WORLD_PX
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * _WORLD_PX
+    return x, y
+
+
+def _unproject(x, y):
+    longitude = x / _WORLD_PX * 360 - 180
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / _WORLD_PX))))
+    return latitude, longitude
+
+
+def _square_cell(px, py, size):
+    return int(px // size), int(py // size)
+
+
+def _hex_cell(px, py, size):
+    """Axial coordinates of the pointy-top hexagon (width `size`) containing a pixel"""
+    radius = size / math.sqrt(3)
+    q = (math.sqrt(3) / 3 * px - py / 3) / radius
+    r = (2 / 3 * py) / radius
+    # Cube rounding
+    x, z = q, r
+    y = -x - z
+    rx, ry, rz = round(x), round(y), round(z)
+    dx, dy, dz = abs(rx - x), abs(ry - y), abs(rz - z)
+    if dx > dy and dx > dz:
+        rx = -ry - rz
+    elif dy <= dz:
+        rz = -rx - ry
+    return rx, rz
+
+
+CELL_FUNCTIONS = {
+    'square': _square_cell,
+    'hex': _hex_cell,
+}
+
+
+def _add(grid, cell, totals):
+    existing = grid.get(cell)
+    if existing is None:
+        grid[cell] = totals
+    else:
+        for i, value in enumerate(totals):
+            existing[i] += value
+
+
+def invalidate():
+    """Drop every cached heatmap (old keys just expire)"""
+    bump('heatmap')
+
+
+def _cache_key(prefix, shape, cell_px, authority_id, category_id, zoom):
+    return f'{prefix}:{shape}:{cell_px}:{authority_id or "-"}:{category_id or "-"}:{zoom}'
+
+
+def _region(bbox, zoom, cell_px):
+    """
+    (west, south, east, north) of the region built for a bounding box:
+    padded by a cell, so the cells that reach into the box are complete,
+    and snapped outwards to tiles of _REGION_CELLS cells, so nearby boxes
+    share a region (and its cache entry)
+    """
+    west, south, east, north = bbox
+    scale = 1 << zoom
+    tile = cell_px * _REGION_CELLS
+    left, top = _project(north, west)
+    right, bottom = _project(south, east)
+    left = math.floor((left * scale - cell_px) / tile) * tile / scale
+    top = math.floor((top * scale - cell_px) / tile) * tile / scale
+    right = math.ceil((right * scale + cell_px) / tile) * tile / scale
+    bottom = math.ceil((bottom * scale + cell_px) / tile) * tile / scale
+    north, west = _unproject(max(left, 0), max(top, 0))
+    south, east = _unproject(min(right, _WORLD_PX), min(bottom, _WORLD_PX))
+    return round(west, 6), round(south, 6), round(east, 6), round(north, 6)
+
+
+def clip(payload, bbox):
+    """A heatmap payload with only the cells whose centroid is in the box"""
+    west, south, east, north = bbox
+    cells = [cell for cell in payload['cells'] if south <= cell[0] <= north and west <= cell[1] <= east]
+    return dict(payload, cells=cells, max_weight=max((cell[2] for cell in cells), default=0))
+
+
+def build_heatmaps(shape, cell_px, authority_id=None, category_id=None, zooms=None, bbox=None):
+    """
+    Aggregate unresolved issues for every zoom level (or only `zooms`) in
+    one pass, optionally only the issues inside `bbox` (west, south, east,
+    north). Returns {zoom: payload}.
+    """
+    issues = Issue.objects.order_by().filter(status__in=UNRESOLVED_STATUSES)
+    if authority_id:
+        issues = issues.filter(category__authority_id=authority_id)
+    if category_id:
+        issues = issues.filter(category_id=category_id)
+    if bbox is not None:
+        west, south, east, north = bbox
+        issues = issues.filter(latitude__range=(south, north), longitude__range=(west, east))
+    zooms = sorted(zooms) if zooms is not None else list(range(MAX_ZOOM + 1))
+
+    cell_of = CELL_FUNCTIONS[shape]
+    # Square cells nest (a cell at zoom z is four cells at z+1), so only the
+    # deepest level is binned per issue; hexagons are binned at every level
+    point_zooms = [zooms[-1]] if shape == 'square' else zooms
+    now = timezone.now()
+    # zoom -> cell -> [sum x, sum y, weight, count] (x/y at zoom 0, weighted)
+    grids = [{} for _ in range(MAX_ZOOM + 1)]
+    rows = issues.values_list(
+        'latitude', 'longitude', 'severity', 'status', 'reported_at', 'acknowledged_at',
+    ).iterator(chunk_size=2000)
+    for latitude, longitude, severity, status, reported_at, acknowledged_at in rows:
+        weight = issue_weight(severity, days_ignored_for(status, reported_at, acknowledged_at, now))
+        x, y = _project(float(latitude), float(longitude))
+        for zoom in point_zooms:
+            scale = 1 << zoom
+            _add(grids[zoom], cell_of(x * scale, y * scale, cell_px), [x * weight, y * weight, weight, 1])
+
+    if shape == 'square':
+        for zoom in range(zooms[-1], zooms[0], -1):
+            for (cx, cy), totals in grids[zoom].items():
+                _add(grids[zoom - 1], (cx >> 1, cy >> 1), list(totals))
+
+    heatmaps = {}
+    for zoom in zooms:
+        grid = grids[zoom]
+        cells = []
+        max_weight = 0
+        for sum_x, sum_y, weight, count in grid.values():
+            # Weighted centroid, so a cell's heat sits where its issues are
+            latitude, longitude = _unproject(sum_x / weight, sum_y / weight) if weight else (0, 0)
+            cells.append([round(latitude, 5), round(longitude, 5), round(weight, 3), count])
+            max_weight = max(max_weight, weight)
+        heatmaps[zoom] = {
+            'zoom': zoom,
+            'shape': shape,
+            'cell_px': cell_px,
+            'max_weight': round(max_weight, 3),
+            # [latitude, longitude, weight, issue count]
+            'cells': cells,
+        }
+    return heatmaps
+
+
+def get_heatmap(zoom, shape='square', cell_px=DEFAULT_CELL_PX, authority_id=None, category_id=None, bbox=None):
+    """Cached heatmap payload for one zoom level, clipped to `bbox` (west, south, east, north) if given"""
+    prefix = versioned_key('heatmap')
+    key = _cache_key(prefix, shape, cell_px, authority_id, category_id, zoom)
+    payload = cache.get(key)
+    if payload is None and bbox is None:
+        heatmaps = build_heatmaps(shape, cell_px, authority_id, category_id)
+        cache.set_many({
+            _cache_key(prefix, shape, cell_px, authority_id, category_id, z): heatmap
+            for z, heatmap in heatmaps.items()
+        }, CACHE_SECONDS)
+        payload = heatmaps[zoom]
+    elif payload is None:
+        # Only the issues around the box, at this zoom
+        region = _region(bbox, zoom, cell_px)
+        region_key = f'{key}:{",".join(map(str, region))}'
+        payload = cache.get(region_key)
+        if payload is None:
+            payload = build_heatmaps(shape, cell_px, authority_id, category_id, zooms=[zoom], bbox=region)[zoom]
+            cache.set(region_key, payload, CACHE_SECONDS)
+    if bbox is not None:
+        payload = clip(payload, bbox)
+    return payload
+
+
+@receiver(issue_status_changed, dispatch_uid='core.heatmap.status_changed')
+def _invalidate_on_transition(sender, event, **kwargs):
+    invalidate()
+
+
+@receiver(post_save, sender=Issue, dispatch_uid='core.heatmap.issue_saved')
+@receiver(post_delete, sender=Issue, dispatch_uid='core.heatmap.issue_deleted')
+def _invalidate_on_write(sender, **kwargs):
+    invalidate()
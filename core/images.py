@@ -0,0 +1,181 @@
+"""
+Image pipeline for The Blindspot Initiative.
+Re-encodes issue photos at bounded dimensions with EXIF stripped, and
+generates resized thumbnails in a background thread after the upload.
+"""
+import os
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+# Longest edge of the stored image, in pixels
+MAX_DIMENSION = getattr(settings, 'ISSUE_IMAGE_MAX_DIMENSION', 1600)
+
+# Widths of the thumbnails generated for srcset
+THUMBNAIL_WIDTHS = getattr(settings, 'ISSUE_THUMBNAIL_WIDTHS', [320, 640, 1280])
+
+QUALITY = getattr(settings, 'ISSUE_IMAGE_QUALITY', 80)
+
+# WebP when Pillow was built with it, JPEG otherwise
+IMAGE_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+IMAGE_EXTENSION = '.webp' if IMAGE_FORMAT == 'WEBP' else '.jpg'
+
+# Largest upload accepted, in pixels: guards against decompression bombs.
+# Checked from the header, before the image is decoded
+MAX_PIXELS = getattr(settings, 'ISSUE_IMAGE_MAX_PIXELS', 40_000_000)
+
+
+def _encode(image):
+    """Encode a Pillow image in the storage format, without any metadata"""
+    if IMAGE_FORMAT == 'WEBP' and image.mode in ('RGBA', 'LA', 'PA'):
+        image = image.convert('RGBA')
+    elif image.mode != 'RGB':
+        image = image.convert('RGB')
+
+    options = {'quality': QUALITY}
+    if IMAGE_FORMAT == 'WEBP':
+        options['method'] = 4
+    else:
+        options['optimize'] = True
+
+    buffer = BytesIO()
+    # No exif= / icc_profile= arguments, so nothing from the original is carried over
+    image.save(buffer, format=IMAGE_FORMAT, **options)
+    return buffer.getvalue()
+
+
+def process_upload(uploaded_file):
+    """
+    Validate and re-encode an uploaded photo.
+
+    Applies the EXIF orientation, then drops all metadata (GPS, camera,
+    timestamps), bounds the longest edge to MAX_DIMENSION and re-encodes.
+    Returns a ContentFile ready to assign to Issue.image.
+    Raises ValidationError if the file is not a readable image or has
+    more than MAX_PIXELS pixels.
+    """
+    try:
+        with Image.open(uploaded_file) as image:
+            width, height = image.size
+            if width * height > MAX_PIXELS:
+                raise ValidationError(f'Image is too large ({width}x{height} pixels)')
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((MAX_DIMENSION, MAX_DIMENSION))
+            data = _encode(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValidationError(f'Invalid image upload: {e}')
+
+    stem = os.path.splitext(os.path.basename(uploaded_file.name or 'photo'))[0]
+    return ContentFile(data, name=f'{stem}{IMAGE_EXTENSION}')
+
+
+def perceptual_hash(image_file):
+    """
+    64-bit difference hash (dHash) of an image as 16 hex digits.
+    Near-identical photos (re-encoded, resized, slightly cropped) end up
+    within a few bits of each other.
+    """
+    if hasattr(image_file, 'seek'):
+        image_file.seek(0)
+    with Image.open(image_file) as image:
+        image.draft('L', (64, 64))
+        small = image.convert('L').resize((9, 8), Image.Resampling.LANCZOS)
+    if hasattr(image_file, 'seek'):
+        image_file.seek(0)
+
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return f'{bits:016x}'
+
+
+def hash_distance(first, second):
+    """Number of differing bits between two perceptual hashes"""
+    return bin(int(first, 16) ^ int(second, 16)).count('1')
+
+
+def thumbnail_name(name, width):
+    """Storage name of the thumbnail of `name` at `width` pixels"""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, 'thumbs', f'{stem}_{width}{IMAGE_EXTENSION}')
+
+
+def generate_thumbnails(issue_id):
+    """
+    Create the thumbnails for an issue's image and record their widths.
+    Widths wider than the stored image are skipped.
+    """
+    from .models import Issue
+
+    issue = Issue.objects.only('image').get(id=issue_id)
+    if not issue.image:
+        return []
+
+    storage = issue.image.storage
+    widths = []
+    with storage.open(issue.image.name) as source, Image.open(source) as image:
+        image.load()
+        for width in sorted(THUMBNAIL_WIDTHS):
+            if width >= image.width:
+                break
+            name = thumbnail_name(issue.image.name, width)
+            # Thumbnails of a content-addressed blob are shared by every issue using it
+            if not storage.exists(name):
+                height = round(image.height * width / image.width)
+                thumb = image.resize((width, height), Image.Resampling.LANCZOS)
+                storage.save_derived(name, ContentFile(_encode(thumb)))
+            widths.append(width)
+
+    Issue.objects.filter(id=issue_id).update(image_thumbnails=widths)
+    # update() sends no post_save: drop the cached details (and their srcset) here
+    from .details import invalidate
+    invalidate([issue_id])
+    return widths
+
+
+def _generate_in_thread(issue_id):
+    try:
+        generate_thumbnails(issue_id)
+    finally:
+        # Thread-local connections are not cleaned up by the request cycle
+        connections.close_all()
+
+
+def schedule_thumbnails(issue):
+    """
+    Generate thumbnails off the request thread once the issue is committed.
+    Uses threading to avoid blocking the request.
+    """
+    def start():
+        thread = threading.Thread(target=_generate_in_thread, args=(issue.id,))
+        thread.daemon = True
+        thread.start()
+    transaction.on_commit(start)
+
+
+def image_payload(issue):
+    """
+    API representation of an issue's image: the full-size URL plus a
+    srcset built from the thumbnails generated so far.
+    """
+    if not issue.image:
+        return None
+
+    storage = issue.image.storage
+    thumbnails = {
+        width: storage.url(thumbnail_name(issue.image.name, width))
+        for width in issue.image_thumbnails or []
+    }
+    return {
+        'src': issue.image.url,
+        'thumbnails': thumbnails,
+        'srcset': ', '.join(f'{url} {width}w' for width, url in thumbnails.items()),
+    }
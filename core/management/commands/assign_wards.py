@@ -0,0 +1,26 @@
+"""
+Management command to tag existing issues with the ward they fall in,
+using the in-memory ward index and batched UPDATEs.
+"""
+from django.core.management.base import BaseCommand
+import time
+
+from core.models import Issue
+from core.wards import assign_wards
+
+
+class Command(BaseCommand):
+    help = 'Backfills Issue.ward from the ward boundaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Re-check every issue, not just untagged ones (after boundaries change)',
+        )
+
+    def handle(self, *args, **options):
+        issues = Issue.objects.all() if options['all'] else Issue.objects.filter(ward__isnull=True)
+        start = time.perf_counter()
+        changed = assign_wards(issues)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Tagged {changed} issues in {elapsed:.1f}s'))
@@ -0,0 +1,55 @@
+"""
+Management command to benchmark the autocomplete trie against the
+current database: build time, memory held, and lookup latency.
+"""
+from django.core.management.base import BaseCommand
+import random
+import time
+import tracemalloc
+
+from core.autocomplete import build_trie
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks building and querying the autocomplete prefix trie'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=10000, help='Number of lookups to time')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        tracemalloc.start()
+        start = time.perf_counter()
+        trie = build_trie()
+        build_seconds = time.perf_counter() - start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = trie.stats()
+        self.stdout.write(
+            f'Built {stats["terms"]} terms / {stats["nodes"]} nodes in {build_seconds * 1000:.0f} ms, '
+            f'{memory / 1024 / 1024:.1f} MB'
+        )
+        if not trie.terms:
+            return
+
+        # Prefixes of 2-6 characters cut from the indexed words
+        rng = random.Random(options['seed'])
+        words = [word for _, text in trie.terms for word in text.lower().split()]
+        prefixes = [word[:rng.randint(2, 6)] for word in rng.choices(words, k=options['queries'])]
+
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            trie.lookup(prefix)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+
+        def micros(fraction):
+            return timings[min(int(len(timings) * fraction), len(timings) - 1)] * 1e6
+
+        self.stdout.write(
+            f'{len(timings)} lookups: p50 {micros(0.5):.1f} us, p99 {micros(0.99):.1f} us, '
+            f'max {timings[-1] * 1e6:.1f} us'
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
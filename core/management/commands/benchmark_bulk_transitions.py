@@ -0,0 +1,64 @@
+"""
+Management command to benchmark bulk authority status transitions.
+Runs inside a transaction that is rolled back, so no data is kept.
+"""
+from django.core.management.base import BaseCommand
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+import time
+
+from core.models import Authority, Category, Issue, AuthorityUser
+from core.workflow import bulk_transition_issues
+
+
+class Rollback(Exception):
+    """Raised to discard the benchmark data at the end of the run"""
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks bulk status transitions (accept, progress, complete) on a batch of issues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1000, help='Number of issues per batch')
+
+    def handle(self, *args, **options):
+        size = options['size']
+        try:
+            with transaction.atomic():
+                self._run(size)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, size):
+        authority = Authority.objects.create(name='Benchmark Authority')
+        category = Category.objects.create(authority=authority, name='Benchmark')
+        user = User.objects.create_user('bench-authority')
+        authority_user = AuthorityUser.objects.create(user=user, authority=authority)
+
+        issues = Issue.objects.bulk_create([
+            Issue(
+                title=f'Benchmark issue {i}',
+                description='Benchmark',
+                category=category,
+                latitude='9.9312000',
+                longitude='76.2673000',
+            )
+            for i in range(size)
+        ], batch_size=500)
+        issue_ids = [issue.id for issue in issues]
+
+        self.stdout.write(f'Bulk transitions for {size} issues:')
+        for action in ['accept', 'progress', 'complete']:
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                updated, skipped = bulk_transition_issues(authority_user, issue_ids, action)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'  {action:<9} {elapsed * 1000:8.1f} ms  '
+                f'{len(ctx.captured_queries):3d} queries  '
+                f'{len(updated)} updated, {len(skipped)} skipped'
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete (changes rolled back)'))
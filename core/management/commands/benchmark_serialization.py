@@ -0,0 +1,107 @@
+"""
+Management command to benchmark issue serialization against the current
+database: model instances with their properties (the old per-view
+builders) against values_list() records, the JSON encoders, and the
+GeoJSON against the columnar payload, all reported per 10k issues.
+"""
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+import json
+import time
+
+from core import serializers
+from core.models import Issue
+
+
+def legacy_features(issues):
+    """The map payload built from model instances, as api_issues used to"""
+    return [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [float(issue.longitude), float(issue.latitude)]},
+            'properties': {
+                'id': issue.id,
+                'title': issue.title,
+                'description': issue.description,
+                'category': issue.category.name,
+                'authority': issue.category.authority.name,
+                'authority_color': issue.category.authority.color,
+                'severity': issue.severity,
+                'status': issue.status,
+                'status_display': issue.get_status_display(),
+                'address': issue.address,
+                'reported_at': issue.reported_at.isoformat(),
+                'days_since_report': issue.days_since_report,
+                'days_ignored': issue.days_ignored,
+                'urgency_level': issue.urgency_level,
+                'urgency_color': issue.urgency_color,
+                'confirmation_count': issue.confirmation_count,
+                'icon': issue.category.icon,
+            },
+        }
+        for issue in issues
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks serializing issues for the map API, per 10k issues'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Number of issues to serialize')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is kept)')
+
+    def handle(self, *args, **options):
+        ids = list(Issue.objects.order_by('-reported_at').values_list('id', flat=True)[:options['count']])
+        if not ids:
+            self.stdout.write('No issues to serialize')
+            return
+        issues = Issue.objects.filter(id__in=ids)
+        scale = 10000 / len(ids)
+
+        def best(func):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - start)
+            return min(timings) * scale * 1000, result
+
+        def legacy_fetch():
+            return list(issues.select_related('category', 'category__authority').annotate(
+                confirmation_count=Count('confirmations')
+            ))
+
+        fetch_ms, instances = best(legacy_fetch)
+        build_ms, payload = best(lambda: legacy_features(instances))
+        self.stdout.write(f'Model instances: fetch {fetch_ms:.0f} ms, build {build_ms:.0f} ms')
+
+        fetch_ms, records = best(lambda: serializers.fetch_records(issues, confirmations=True))
+        build_ms, compact = best(lambda: serializers.features(records, serializers.MAP_FIELDS))
+        self.stdout.write(f'Records:         fetch {fetch_ms:.0f} ms, build {build_ms:.0f} ms')
+
+        body = {'type': 'FeatureCollection', 'features': payload}
+        encode_ms, encoded = best(lambda: json.dumps(body, cls=DjangoJSONEncoder).encode('utf-8'))
+        self.stdout.write(f'JsonResponse encoding: {encode_ms:.0f} ms, {len(encoded) * scale / 1024:.0f} KB')
+        body = {'type': 'FeatureCollection', 'features': compact}
+        encode_ms, encoded = best(
+            lambda: json.dumps(body, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        )
+        self.stdout.write(f'Compact json:          {encode_ms:.0f} ms, {len(encoded) * scale / 1024:.0f} KB')
+        if serializers.orjson is not None:
+            encode_ms, encoded = best(lambda: serializers.dumps(body))
+            self.stdout.write(f'orjson:                {encode_ms:.0f} ms, {len(encoded) * scale / 1024:.0f} KB')
+        else:
+            self.stdout.write('orjson is not installed')
+
+        # ?format=columnar: size, and time to parse back (a proxy for the browser's JSON.parse)
+        build_ms, columns = best(lambda: serializers.columnar(records))
+        columnar = serializers.dumps(columns)
+        geojson_parse_ms, _ = best(lambda: json.loads(encoded))
+        columnar_parse_ms, _ = best(lambda: json.loads(columnar))
+        self.stdout.write(
+            f'Columnar: build {build_ms:.0f} ms, {len(columnar) * scale / 1024:.0f} KB '
+            f'({len(columnar) / len(encoded):.0%} of GeoJSON), '
+            f'parse {columnar_parse_ms:.0f} ms vs {geojson_parse_ms:.0f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
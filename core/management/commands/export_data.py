@@ -0,0 +1,56 @@
+"""
+Management command to export issues, status logs or notification logs as
+CSV, NDJSON or GeoJSON.
+
+Rows are streamed from the database in batches and written as they are
+produced, so exports of any size run in constant memory.
+"""
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from core.exports import DATASETS, FORMATS, ExportError, export_queryset, export_stream
+
+
+class Command(BaseCommand):
+    help = 'Streams issues or audit logs to a CSV, NDJSON or GeoJSON file, optionally gzipped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--gzip', action='store_true', help='Gzip the output (requires --output)')
+        parser.add_argument('--authority', help='Authority ID')
+        parser.add_argument('--category', help='Category ID')
+        parser.add_argument('--status', help='Issue status')
+        parser.add_argument('--since', help='Earliest date or datetime (inclusive)')
+        parser.add_argument('--until', help='Latest date or datetime (inclusive)')
+
+    def handle(self, *args, **options):
+        if options['gzip'] and not options['output']:
+            raise CommandError('--gzip needs --output')
+
+        start = time.perf_counter()
+        try:
+            queryset = export_queryset(options['dataset'], options)
+            chunks = export_stream(options['dataset'], options['format'], queryset, gzip=options['gzip'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if not options['output']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+
+        written = 0
+        mode = 'wb' if options['gzip'] else 'w'
+        encoding = None if options['gzip'] else 'utf-8'
+        with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as fh:
+            for chunk in chunks:
+                fh.write(chunk)
+                written += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {options["dataset"]} to {options["output"]} '
+            f'({written / 1024:.1f} KB) in {elapsed:.1f}s'
+        ))
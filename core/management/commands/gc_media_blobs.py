@@ -0,0 +1,65 @@
+"""
+Management command to delete content-addressed issue images (and their
+thumbnails) that no Issue references any more.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from datetime import timedelta
+import os
+
+from core.images import thumbnail_name
+from core.models import Issue
+from core.storage import issue_image_storage, is_content_addressed
+
+
+class Command(BaseCommand):
+    help = 'Deletes orphaned content-addressed issue images and thumbnails'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours', type=int, default=24,
+            help='Keep files younger than this, so uploads whose issue is not committed yet survive',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='List orphans without deleting them')
+
+    def handle(self, *args, **options):
+        storage = issue_image_storage
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        upload_dir = Issue._meta.get_field('image').upload_to.rstrip('/')
+
+        # Every referenced blob plus the thumbnails generated for it
+        referenced = set()
+        issues = Issue.objects.exclude(image='').exclude(image__isnull=True)
+        for name, widths in issues.values_list('image', 'image_thumbnails').iterator():
+            referenced.add(name)
+            referenced.update(thumbnail_name(name, width) for width in widths or [])
+
+        scanned = deleted = freed = 0
+        for name in self._walk(storage, upload_dir):
+            if not is_content_addressed(name):
+                continue  # Legacy uploads keep their original names and are left alone
+            scanned += 1
+            if name in referenced or storage.get_modified_time(name) > cutoff:
+                continue
+            size = storage.size(name)
+            if options['dry_run']:
+                self.stdout.write(f'Would delete {name} ({size} bytes)')
+            else:
+                storage.delete(name)
+            deleted += 1
+            freed += size
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f'Scanned {scanned} blobs. {verb} {deleted} orphans ({freed / 1024:.1f} KB).'
+        ))
+
+    def _walk(self, storage, directory):
+        """Yield every file name below `directory` in storage"""
+        if not storage.exists(directory):
+            return
+        subdirs, files = storage.listdir(directory)
+        for filename in files:
+            yield os.path.join(directory, filename).replace('\\', '/')
+        for subdir in subdirs:
+            yield from self._walk(storage, os.path.join(directory, subdir))
@@ -0,0 +1,332 @@
+"""
+Management command to bulk-import legacy complaints from CSV, GeoJSON or
+NDJSON files.
+
+Rows are streamed, validated against Category, and inserted with
+bulk_create in chunks. After every committed chunk a checkpoint file
+records how many rows are done, so a failed run can be re-run with the
+same arguments and resumes where it stopped. (A crash in the instant
+between a chunk's commit and its checkpoint write re-imports that chunk.)
+With --notify=batch the IDs of committed chunks are kept next to the
+checkpoint too, so the summary emails sent by a resumed run also cover
+the issues imported before the failure.
+
+CSV / NDJSON fields:
+    title, description, category (id or name), latitude, longitude,
+    address, severity, status, reported_at
+GeoJSON: Point features with the same keys in `properties`.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+import csv
+import json
+import os
+import time
+
+from core.models import Category, Issue
+from core.notifications import send_batch_notification
+from core.search import index_issues
+from core.wards import get_index
+
+VALID_STATUSES = {value for value, _ in Issue.STATUS_CHOICES}
+
+# Errors echoed to stderr before the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+
+class RowError(ValueError):
+    """A source row that cannot be imported"""
+
+
+def iter_csv(fh):
+    yield from csv.DictReader(fh)
+
+
+def iter_ndjson(fh):
+    for line_number, line in enumerate(fh, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            # Yielded rather than raised, so the rest of the file is still read
+            yield RowError(f'malformed JSON on line {line_number}: {e.msg}')
+
+
+def iter_geojson(fh, read_size=64 * 1024):
+    """
+    Stream the features of a FeatureCollection without loading the file.
+    Each feature is decoded on its own as soon as it is complete.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = -1
+    eof = False
+
+    # Skip ahead to the opening bracket of the "features" array
+    while position < 0:
+        chunk = fh.read(read_size)
+        if not chunk:
+            raise CommandError('No "features" array found in GeoJSON file')
+        buffer += chunk
+        key = buffer.find('"features"')
+        if key >= 0:
+            position = buffer.find('[', key)
+    buffer = buffer[position + 1:]
+
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            feature, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise CommandError('Truncated GeoJSON feature at end of file')
+            chunk = fh.read(read_size)
+            eof = not chunk
+            buffer += chunk
+            continue
+        buffer = buffer[end:]
+
+        if not isinstance(feature, dict):
+            yield feature  # Rejected by _build_issue
+            continue
+        properties = dict(feature.get('properties') or {})
+        geometry = feature.get('geometry') or {}
+        if geometry.get('type') == 'Point':
+            coordinates = geometry.get('coordinates')
+            if not (
+                isinstance(coordinates, list) and len(coordinates) >= 2
+                and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in coordinates[:2])
+            ):
+                yield RowError('Point geometry without two numeric coordinates')
+                continue
+            properties['longitude'], properties['latitude'] = coordinates[:2]
+        yield properties
+
+
+READERS = {
+    'csv': iter_csv,
+    'ndjson': iter_ndjson,
+    'geojson': iter_geojson,
+}
+
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.geojson': 'geojson',
+    '.json': 'geojson',
+}
+
+
+class Command(BaseCommand):
+    help = 'Imports issues in bulk from a CSV, GeoJSON or NDJSON file, resumable from a checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import')
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk_create transaction')
+        parser.add_argument('--checkpoint', help='Checkpoint file (default: <path>.checkpoint)')
+        parser.add_argument('--reporter', help='Username recorded as reporter of the imported issues')
+        parser.add_argument(
+            '--notify', choices=['none', 'batch'], default='none',
+            help='none: send nothing; batch: one summary email per authority at the end '
+                 '(including rows imported by earlier, interrupted runs with --notify=batch)',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if file_format not in READERS:
+            raise CommandError('Cannot tell the file format; pass --format')
+        if not os.path.exists(path):
+            raise CommandError(f'File not found: {path}')
+
+        checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+        chunk_size = options['chunk_size']
+        reporter = None
+        if options['reporter']:
+            reporter = User.objects.filter(username=options['reporter']).first()
+            if reporter is None:
+                raise CommandError(f'Unknown user: {options["reporter"]}')
+
+        self.categories_by_id = {}
+        self.categories_by_name = {}
+        for category in Category.objects.select_related('authority'):
+            self.categories_by_id[str(category.id)] = category
+            self.categories_by_name[category.name.strip().lower()] = category
+        self.ward_index = get_index()
+
+        done = self._read_checkpoint(checkpoint_path, path)
+        if done:
+            self.stdout.write(f'Resuming after row {done} from {checkpoint_path}')
+
+        imported = rejected = 0
+        by_authority = defaultdict(list)
+        ids_path = f'{checkpoint_path}.issues'
+        if not done and os.path.exists(ids_path):
+            os.remove(ids_path)  # Left over from an import that was restarted from scratch
+        elif options['notify'] == 'batch':
+            self._load_imported(ids_path, by_authority)
+        chunk = []
+        row_number = 0
+        start = time.perf_counter()
+
+        with open(path, newline='', encoding='utf-8') as fh:
+            for row_number, row in enumerate(READERS[file_format](fh), 1):
+                if row_number <= done:
+                    continue
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    chunk.append(self._build_issue(row, reporter))
+                except RowError as e:
+                    rejected += 1
+                    if rejected <= MAX_REPORTED_ERRORS:
+                        self.stderr.write(f'Row {row_number}: {e}')
+
+                if len(chunk) >= chunk_size:
+                    imported += self._flush(chunk, by_authority, options['notify'], ids_path)
+                    self._write_checkpoint(checkpoint_path, path, row_number)
+                    chunk = []
+                    self._progress(imported, start)
+
+            if chunk:
+                imported += self._flush(chunk, by_authority, options['notify'], ids_path)
+                self._write_checkpoint(checkpoint_path, path, row_number)
+
+        if options['notify'] == 'batch':
+            for authority, issues in by_authority.items():
+                send_batch_notification(authority, issues)
+            self.stdout.write(f'Sent batch notifications to {len(by_authority)} authorities')
+
+        # Finished cleanly (notifications included): the checkpoint is no longer needed
+        for finished_path in (checkpoint_path, ids_path):
+            if os.path.exists(finished_path):
+                os.remove(finished_path)
+
+        elapsed = time.perf_counter() - start
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} issues ({rejected} rejected) in {elapsed:.1f}s ({rate:,.0f} rows/s)'
+        ))
+
+    def _build_issue(self, row, reporter):
+        """Validate one source row and turn it into an unsaved Issue"""
+        if not isinstance(row, dict):
+            raise RowError(f'expected an object, got {type(row).__name__}')
+
+        category_ref = str(row.get('category') or row.get('category_id') or '').strip()
+        category = self.categories_by_id.get(category_ref) or self.categories_by_name.get(category_ref.lower())
+        if category is None:
+            raise RowError(f'unknown category {category_ref!r}')
+
+        title = str(row.get('title') or '').strip()
+        if not title:
+            raise RowError('missing title')
+
+        try:
+            latitude = Decimal(str(row.get('latitude')))
+            longitude = Decimal(str(row.get('longitude')))
+        except (InvalidOperation, TypeError):
+            raise RowError('invalid coordinates')
+        # NaN and Infinity parse, but cannot be compared or quantized
+        if not (latitude.is_finite() and longitude.is_finite()):
+            raise RowError('invalid coordinates')
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise RowError('coordinates out of range')
+        latitude = latitude.quantize(Decimal('0.0000001'))
+        longitude = longitude.quantize(Decimal('0.0000001'))
+
+        try:
+            severity = int(row.get('severity') or category.default_severity)
+        except (TypeError, ValueError):
+            raise RowError('invalid severity')
+        if not 1 <= severity <= 5:
+            raise RowError('severity must be between 1 and 5')
+
+        status = str(row.get('status') or 'ignored').strip()
+        if status not in VALID_STATUSES:
+            raise RowError(f'invalid status {status!r}')
+
+        reported_at = timezone.now()
+        if row.get('reported_at'):
+            try:
+                reported_at = parse_datetime(str(row['reported_at']))
+            except ValueError:  # Well formed but not a real date, e.g. month 13
+                reported_at = None
+            if reported_at is None:
+                raise RowError('invalid reported_at')
+            if timezone.is_naive(reported_at):
+                reported_at = timezone.make_aware(reported_at)
+
+        return Issue(
+            title=title[:200],
+            description=str(row.get('description') or ''),
+            category=category,
+            latitude=latitude,
+            longitude=longitude,
+            address=str(row.get('address') or '')[:300],
+            ward_id=self.ward_index.lookup(float(latitude), float(longitude)),
+            severity=severity,
+            status=status,
+            reported_at=reported_at,
+            reported_by=reporter,
+        )
+
+    def _flush(self, chunk, by_authority, notify, ids_path=None):
+        """Insert one chunk atomically; notifications are never sent per row"""
+        if not chunk:
+            return 0
+        with transaction.atomic():
+            created = Issue.objects.bulk_create(chunk)
+            # bulk_create sends no post_save, so index the chunk here
+            index_issues([issue.id for issue in created])
+        if notify == 'batch':
+            for issue in created:
+                by_authority[issue.category.authority].append(issue)
+            if ids_path:
+                # Before the checkpoint, so a resumed run can still notify about this chunk
+                with open(ids_path, 'a') as fh:
+                    fh.write(''.join(f'{issue.id}\n' for issue in created))
+        return len(created)
+
+    def _load_imported(self, ids_path, by_authority, batch_size=500):
+        """Queue the issues committed by earlier runs of this import for the batch emails"""
+        if not os.path.exists(ids_path):
+            return
+        with open(ids_path) as fh:
+            ids = [int(line) for line in fh if line.strip()]
+        for start in range(0, len(ids), batch_size):
+            issues = Issue.objects.filter(id__in=ids[start:start + batch_size]).select_related('category__authority')
+            for issue in issues.order_by('id'):
+                by_authority[issue.category.authority].append(issue)
+        self.stdout.write(f'Including {len(ids)} issues imported before the resume in the notifications')
+
+    def _progress(self, imported, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'  {imported} imported ({imported / elapsed:,.0f} rows/s)')
+
+    def _read_checkpoint(self, checkpoint_path, path):
+        if not os.path.exists(checkpoint_path):
+            return 0
+        with open(checkpoint_path) as fh:
+            checkpoint = json.load(fh)
+        if checkpoint.get('path') != os.path.abspath(path):
+            raise CommandError(f'{checkpoint_path} belongs to another import: {checkpoint.get("path")}')
+        return checkpoint['rows_done']
+
+    def _write_checkpoint(self, checkpoint_path, path, rows_done):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump({'path': os.path.abspath(path), 'rows_done': rows_done}, fh)
+        os.replace(tmp_path, checkpoint_path)
@@ -0,0 +1,53 @@
+"""
+Management command to load ward / zone boundaries from a GeoJSON
+FeatureCollection of Polygon or MultiPolygon features.
+
+Wards are matched on their code, so re-running with an updated file
+updates boundaries in place.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+import json
+
+from core.models import Issue, Ward
+from core.wards import assign_wards, save_ward
+
+
+class Command(BaseCommand):
+    help = 'Loads ward boundaries from a GeoJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='GeoJSON FeatureCollection')
+        parser.add_argument('--name-property', default='name', help='Feature property holding the ward name')
+        parser.add_argument('--code-property', default='code', help='Feature property holding a unique ward code')
+        parser.add_argument('--replace', action='store_true', help='Delete wards missing from the file')
+        parser.add_argument('--assign', action='store_true', help='Re-tag every issue afterwards')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], encoding='utf-8') as fh:
+                collection = json.load(fh)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {options["path"]}: {e}')
+
+        codes = []
+        with transaction.atomic():
+            for number, feature in enumerate(collection.get('features', []), 1):
+                properties = feature.get('properties') or {}
+                code = str(properties.get(options['code_property']) or number)
+                name = str(properties.get(options['name_property']) or f'Ward {code}')
+                try:
+                    save_ward(code, name, feature.get('geometry'))
+                except (KeyError, ValueError, IndexError) as e:
+                    raise CommandError(f'Feature {number} ({name}): {e}')
+                codes.append(code)
+
+            removed = 0
+            if options['replace']:
+                removed, _ = Ward.objects.exclude(code__in=codes).delete()
+
+        self.stdout.write(self.style.SUCCESS(f'Loaded {len(codes)} wards ({removed} removed)'))
+
+        if options['assign']:
+            changed = assign_wards(Issue.objects.all())
+            self.stdout.write(self.style.SUCCESS(f'Re-tagged {changed} issues'))
@@ -0,0 +1,15 @@
+"""
+Management command to recompute the resolution-time histograms from issue
+timestamps, e.g. after a bulk import or to backfill existing data.
+"""
+from django.core.management.base import BaseCommand
+
+from core.analytics import rebuild_resolution_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the per authority/category/month resolution-time statistics'
+
+    def handle(self, *args, **options):
+        rows = rebuild_resolution_stats()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} resolution-time stats rows'))
@@ -0,0 +1,21 @@
+"""
+Management command to rebuild the full-text issue search index, e.g.
+after raw SQL writes that bypassed the signals.
+"""
+from django.core.management.base import BaseCommand, CommandError
+import time
+
+from core.search import backend, index_issues
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text search index over issues'
+
+    def handle(self, *args, **options):
+        kind = backend()
+        if kind is None:
+            raise CommandError('No search index on this database (FTS5 / PostgreSQL required)')
+        start = time.perf_counter()
+        index_issues()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the {kind} search index in {elapsed:.1f}s'))
@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_issuecomment'),
+        ('core', '0003_authorityuser_issue_in_progress_at_and_more'),
+    ]
+
+    operations = [
+    ]
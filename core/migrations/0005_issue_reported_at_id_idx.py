@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_merge_issuecomment'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['reported_at', 'id'], name='issue_reported_at_id_idx'),
+        ),
+    ]
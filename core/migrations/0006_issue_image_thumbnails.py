@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_issue_reported_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='image_thumbnails',
+            field=models.JSONField(blank=True, default=list, help_text='Widths of generated thumbnails'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:48
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_issue_image_thumbnails'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='issue',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to='issues/'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_issue_image_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='image_phash',
+            field=models.CharField(blank=True, help_text='Perceptual hash of the image (hex dHash)', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['category', 'latitude', 'longitude'], name='issue_category_location_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 08:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_issue_duplicate_detection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResolutionTimeStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month the transition happened in')),
+                ('metric', models.CharField(choices=[('acknowledge', 'Time to acknowledge'), ('resolve', 'Time to resolve')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('total_hours', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list, help_text='Counts per bucket of core.analytics.BUCKET_EDGES_HOURS')),
+                ('p50_hours', models.FloatField(blank=True, null=True)),
+                ('p90_hours', models.FloatField(blank=True, null=True)),
+                ('p95_hours', models.FloatField(blank=True, null=True)),
+                ('authority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resolution_stats', to='core.authority')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resolution_stats', to='core.category')),
+            ],
+            options={
+                'verbose_name': 'Resolution Time Stats',
+                'verbose_name_plural': 'Resolution Time Stats',
+                'ordering': ['-month', 'authority', 'category', 'metric'],
+                'unique_together': {('authority', 'category', 'month', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_resolutiontimestats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyIssueStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('new_count', models.PositiveIntegerField(default=0)),
+                ('acknowledged_count', models.PositiveIntegerField(default=0)),
+                ('resolved_count', models.PositiveIntegerField(default=0)),
+                ('backlog', models.PositiveIntegerField(default=0, help_text='Unresolved issues')),
+                ('ignored_count', models.PositiveIntegerField(default=0, help_text='Issues not yet acknowledged')),
+                ('avg_days_ignored', models.FloatField(default=0)),
+                ('authority', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.authority')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.category')),
+            ],
+            options={
+                'verbose_name': 'Daily Issue Stats',
+                'verbose_name_plural': 'Daily Issue Stats',
+                'ordering': ['-date', 'authority', 'category'],
+                'indexes': [models.Index(fields=['authority', 'date'], name='dailystats_authority_date_idx')],
+                'unique_together': {('date', 'category')},
+            },
+        ),
+    ]
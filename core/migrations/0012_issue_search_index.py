@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from core.search import create_index, index_issues
+    create_index(schema_editor)
+    index_issues(using=schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from core.search import drop_index
+    drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_ward'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -1,7 +1,54 @@
 from django.db import models
+from django.db.models import Avg, DateTimeField, DurationField, ExpressionWrapper, F, Value
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .storage import issue_image_storage
+
+UNRESOLVED_STATUSES = ['ignored', 'acknowledged', 'in_progress']
+
+
+def age_of(field, now=None):
+    """
+    Time elapsed since a datetime field, as a database expression (Django
+    translates the interval arithmetic for each backend)
+    """
+    now = now or timezone.now()
+    return ExpressionWrapper(Value(now, output_field=DateTimeField()) - F(field), output_field=DurationField())
+
+
+def duration_days(duration):
+    """Average-age aggregate (a timedelta, or None) in days"""
+    return round(duration.total_seconds() / 86400, 1) if duration else 0.0
+
+
+URGENCY_COLORS = {
+    'critical': '#ff4d4d',
+    'serious': '#ff8c00',
+    'moderate': '#ffd700',
+    'recent': '#4ade80'
+}
+
+
+def days_ignored_for(status, reported_at, acknowledged_at, now):
+    """Issue.days_ignored from plain field values (for rows read with values())"""
+    if status == 'ignored':
+        return (now - reported_at).days
+    elif acknowledged_at:
+        return (acknowledged_at - reported_at).days
+    return 0
+
+
+def urgency_for(days_ignored, severity):
+    """Issue.urgency_level from plain field values"""
+    if days_ignored >= 40 or severity >= 5:
+        return 'critical'
+    elif days_ignored >= 20 or severity >= 4:
+        return 'serious'
+    elif days_ignored >= 7 or severity >= 3:
+        return 'moderate'
+    return 'recent'
+
 
 class Authority(models.Model):
     """Government body responsible for handling specific types of issues"""
@@ -26,22 +73,11 @@ class Authority(models.Model):
         Returns the average days of inaction per issue.
         Computed dynamically to reflect live conditions.
         """
-        # Get all unresolved issues under this authority
-        unresolved_issues = self.categories.all().values_list('issues', flat=True)
-        from django.db.models import Q
-        issues = Issue.objects.filter(
+        average = Issue.objects.filter(
             category__authority=self,
-            status__in=['ignored', 'acknowledged', 'in_progress']
-        )
-        
-        total_issues = issues.count()
-        if total_issues == 0:
-            return 0.0
-        
-        # Sum days since report for all unresolved issues
-        total_unresolved_days = sum(issue.days_since_report for issue in issues)
-        
-        return round(total_unresolved_days / total_issues, 1)
+            status__in=UNRESOLVED_STATUSES,
+        ).aggregate(age=Avg(age_of('reported_at')))['age']
+        return duration_days(average)
 
 
 class Category(models.Model):
@@ -60,6 +96,30 @@ class Category(models.Model):
         return f"{self.name} ({self.authority.name})"
 
 
+class Ward(models.Model):
+    """
+    Ward / zone boundary loaded from GeoJSON, used to tag issues with the
+    area they fall in. Point lookups go through core.wards.
+    """
+    name = models.CharField(max_length=100)
+    code = models.CharField(max_length=50, unique=True, help_text="Identifier from the source GeoJSON")
+    geometry = models.JSONField(help_text="GeoJSON MultiPolygon coordinates ([lng, lat] rings)")
+    
+    # Bounding box, for index prefiltering
+    min_lat = models.FloatField()
+    max_lat = models.FloatField()
+    min_lng = models.FloatField()
+    max_lng = models.FloatField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
 class Issue(models.Model):
     """A reported civic problem at a specific location"""
     STATUS_CHOICES = [
@@ -80,6 +140,7 @@ class Issue(models.Model):
     latitude = models.DecimalField(max_digits=10, decimal_places=7)
     longitude = models.DecimalField(max_digits=10, decimal_places=7)
     address = models.CharField(max_length=300, blank=True)
+    ward = models.ForeignKey(Ward, on_delete=models.SET_NULL, null=True, blank=True, related_name='issues')
     
     # Status & severity
     severity = models.IntegerField(choices=SEVERITY_CHOICES, default=3)
@@ -96,10 +157,18 @@ class Issue(models.Model):
     reported_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='reported_issues')
     
     # Image (optional)
-    image = models.ImageField(upload_to='issues/', blank=True, null=True)
+    image = models.ImageField(upload_to='issues/', storage=issue_image_storage, blank=True, null=True)
+    image_thumbnails = models.JSONField(default=list, blank=True, help_text="Widths of generated thumbnails")
+    image_phash = models.CharField(max_length=16, blank=True, help_text="Perceptual hash of the image (hex dHash)")
     
     class Meta:
         ordering = ['-reported_at']
+        indexes = [
+            # Seek pagination key for the authority dashboard
+            models.Index(fields=['reported_at', 'id'], name='issue_reported_at_id_idx'),
+            # Duplicate detection: same category within a small bounding box
+            models.Index(fields=['category', 'latitude', 'longitude'], name='issue_category_location_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.status}"
@@ -113,35 +182,17 @@ class Issue(models.Model):
     @property
     def days_ignored(self):
         """Days the issue has been in 'ignored' status"""
-        if self.status == 'ignored':
-            return self.days_since_report
-        elif self.acknowledged_at:
-            delta = self.acknowledged_at - self.reported_at
-            return delta.days
-        return 0
+        return days_ignored_for(self.status, self.reported_at, self.acknowledged_at, timezone.now())
     
     @property
     def urgency_level(self):
         """Calculate urgency based on severity and days ignored"""
-        days = self.days_ignored
-        if days >= 40 or self.severity >= 5:
-            return 'critical'
-        elif days >= 20 or self.severity >= 4:
-            return 'serious'
-        elif days >= 7 or self.severity >= 3:
-            return 'moderate'
-        return 'recent'
+        return urgency_for(self.days_ignored, self.severity)
     
     @property
     def urgency_color(self):
         """Get color based on urgency level"""
-        colors = {
-            'critical': '#ff4d4d',
-            'serious': '#ff8c00',
-            'moderate': '#ffd700',
-            'recent': '#4ade80'
-        }
-        return colors.get(self.urgency_level, '#4d9fff')
+        return URGENCY_COLORS.get(self.urgency_level, '#4d9fff')
     
     @property
     def escalation_label(self):
@@ -191,7 +242,6 @@ class UserProfile(models.Model):
         return f"{self.user.username}'s profile"
 
 
-<<<<<<< HEAD
 class NotificationLog(models.Model):
     """Log of all authority notification emails sent"""
     DELIVERY_STATUS = [
@@ -253,7 +303,8 @@ class IssueStatusLog(models.Model):
     
     def __str__(self):
         return f"Issue #{self.issue.id}: {self.previous_status} → {self.new_status}"
-=======
+
+
 class IssueComment(models.Model):
     """User comments on unaddressed issues to add public pressure"""
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='comments')
@@ -266,3 +317,85 @@ class IssueComment(models.Model):
     
     def __str__(self):
         return f"Comment by {self.user.username} on {self.issue.title}"
+
+
+class ResolutionTimeStats(models.Model):
+    """
+    Running time-to-acknowledge / time-to-resolve distribution for one
+    authority, category and month, kept as a fixed histogram so it can be
+    updated per transition and read without scanning issues.
+    See core.analytics.
+    """
+    METRIC_CHOICES = [
+        ('acknowledge', 'Time to acknowledge'),
+        ('resolve', 'Time to resolve'),
+    ]
+    
+    authority = models.ForeignKey(Authority, on_delete=models.CASCADE, related_name='resolution_stats')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='resolution_stats')
+    month = models.DateField(help_text="First day of the month the transition happened in")
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    
+    count = models.PositiveIntegerField(default=0)
+    total_hours = models.FloatField(default=0)
+    histogram = models.JSONField(default=list, help_text="Counts per bucket of core.analytics.BUCKET_EDGES_HOURS")
+    
+    # Percentiles in hours, recomputed from the histogram on every update
+    p50_hours = models.FloatField(null=True, blank=True)
+    p90_hours = models.FloatField(null=True, blank=True)
+    p95_hours = models.FloatField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['authority', 'category', 'month', 'metric']
+        ordering = ['-month', 'authority', 'category', 'metric']
+        verbose_name = "Resolution Time Stats"
+        verbose_name_plural = "Resolution Time Stats"
+    
+    def __str__(self):
+        return f"{self.category.name} {self.month:%Y-%m} {self.metric}: {self.count}"
+
+
+class DailyIssueStats(models.Model):
+    """
+    End-of-day rollup of issue activity for one category, used for trend
+    charts. Built by the rollup_daily_stats command and bumped by status
+    transitions; see core.rollups.
+    """
+    date = models.DateField()
+    authority = models.ForeignKey(Authority, on_delete=models.CASCADE, related_name='daily_stats')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_stats')
+    
+    # Events during the day
+    new_count = models.PositiveIntegerField(default=0)
+    acknowledged_count = models.PositiveIntegerField(default=0)
+    resolved_count = models.PositiveIntegerField(default=0)
+    
+    # State at the end of the day
+    backlog = models.PositiveIntegerField(default=0, help_text="Unresolved issues")
+    ignored_count = models.PositiveIntegerField(default=0, help_text="Issues not yet acknowledged")
+    avg_days_ignored = models.FloatField(default=0)
+    
+    class Meta:
+        unique_together = ['date', 'category']
+        ordering = ['-date', 'authority', 'category']
+        indexes = [
+            models.Index(fields=['authority', 'date'], name='dailystats_authority_date_idx'),
+        ]
+        verbose_name = "Daily Issue Stats"
+        verbose_name_plural = "Daily Issue Stats"
+    
+    def __str__(self):
+        return f"{self.date} {self.category.name}: {self.backlog} open"
+
+
+class RollupWatermark(models.Model):
+    """
+    Last day a rollup has fully covered. Kept apart from the rollup rows,
+    which status transitions create for the current day between runs.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    complete_through = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name}: {self.complete_through}"
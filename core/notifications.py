@@ -4,10 +4,13 @@ Handles sending email notifications to authorities when issues are reported.
 """
 import threading
 from django.core.mail import send_mail
+from django.db import connections
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 
+from .retry import retry_on_busy
+
 
 def send_authority_notification(issue):
     """
@@ -22,7 +25,7 @@ def send_authority_notification(issue):
     
     # Run email sending in a separate thread to avoid blocking
     thread = threading.Thread(
-        target=_send_notification_email,
+        target=_notify_in_thread,
         args=(issue, authority)
     )
     thread.daemon = True
@@ -31,6 +34,14 @@ def send_authority_notification(issue):
     return True
 
 
+def _notify_in_thread(issue, authority):
+    try:
+        _send_notification_email(issue, authority)
+    finally:
+        # Thread-local connections are not cleaned up by the request cycle
+        connections.close_all()
+
+
 def _send_notification_email(issue, authority):
     """
     Internal function to send the email and log the result.
@@ -39,7 +50,7 @@ def _send_notification_email(issue, authority):
     from .models import NotificationLog
     
     # Create log entry first (pending)
-    notification_log = NotificationLog.objects.create(
+    notification_log = retry_on_busy(NotificationLog.objects.create)(
         issue=issue,
         authority=authority,
         email_address=authority.email,
@@ -116,10 +127,72 @@ The Blindspot Initiative
         
         # Update log to sent
         notification_log.status = 'sent'
-        notification_log.save()
+        retry_on_busy(notification_log.save)()
         
     except Exception as e:
         # Log the failure
         notification_log.status = 'failed'
         notification_log.error_message = str(e)
-        notification_log.save()
+        retry_on_busy(notification_log.save)()
+
+
+# Issues listed individually in a batch email before it is summarised
+BATCH_LIST_LIMIT = 200
+
+
+def send_batch_notification(authority, issues):
+    """
+    Send a single summary email covering many issues (used by bulk imports
+    instead of one email per issue) and log it against each issue.
+    Runs synchronously; callers are management commands, not requests.
+    """
+    from .models import NotificationLog
+    
+    if not authority.email or not issues:
+        return None
+    
+    subject = f"[Blindspot Initiative] {len(issues)} imported issue reports for {authority.name}"
+    lines = [
+        f"#{issue.id}  {issue.title}  ({issue.latitude}, {issue.longitude})"
+        for issue in issues[:BATCH_LIST_LIMIT]
+    ]
+    if len(issues) > BATCH_LIST_LIMIT:
+        lines.append(f"... and {len(issues) - BATCH_LIST_LIMIT} more")
+    message = f"""
+THE BLINDSPOT INITIATIVE - BULK IMPORT NOTIFICATION
+===================================================
+
+{len(issues)} civic issue reports for {authority.name} were imported from
+partner records and are now publicly logged on The Blindspot Initiative.
+
+IMPORTED ISSUES
+---------------
+""" + "\n".join(lines) + """
+
+This is an automated notification from The Blindspot Initiative.
+"""
+    
+    status, error_message = 'sent', ''
+    try:
+        send_mail(
+            subject=subject,
+            message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[authority.email],
+            fail_silently=False
+        )
+    except Exception as e:
+        status, error_message = 'failed', str(e)
+    
+    NotificationLog.objects.bulk_create([
+        NotificationLog(
+            issue=issue,
+            authority=authority,
+            email_address=authority.email,
+            status=status,
+            error_message=error_message,
+        )
+        for issue in issues
+    ], batch_size=500)
+    
+    return status == 'sent'
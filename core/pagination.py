@@ -0,0 +1,104 @@
+"""
+Keyset (seek) pagination for The Blindspot Initiative.
+Pages through issues on (reported_at, id) instead of OFFSET, so a deep
+page costs the same as the first one.
+"""
+import base64
+import binascii
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+def encode_cursor(issue):
+    """Encode an issue's (reported_at, id) position as an opaque URL-safe token"""
+    raw = f"{issue.reported_at.isoformat()}|{issue.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a cursor token back into (reported_at, id).
+    Returns None for missing or malformed tokens so callers fall back to page one.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        timestamp, issue_id = raw.rsplit('|', 1)
+        reported_at = parse_datetime(timestamp)
+        if reported_at is None:
+            return None
+        return reported_at, int(issue_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """A single page of results plus the cursors needed to move around it"""
+
+    def __init__(self, object_list, has_next, has_previous, total=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        return encode_cursor(self.object_list[-1]) if self.has_next and self.object_list else None
+
+    @property
+    def previous_cursor(self):
+        return encode_cursor(self.object_list[0]) if self.has_previous and self.object_list else None
+
+
+def keyset_paginate(queryset, per_page, after=None, before=None, total=None):
+    """
+    Return a KeysetPage of `queryset` ordered newest first.
+
+    after:  cursor of the last row on the previous page (page forward)
+    before: cursor of the first row on the next page (page backward)
+    total:  row count known by the caller (e.g. from stats), shown as-is
+
+    Only one extra row is fetched to detect whether another page exists;
+    no COUNT(*) or OFFSET is issued.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+
+    if before is not None:
+        reported_at, issue_id = before
+        rows = list(
+            queryset.filter(
+                Q(reported_at__gt=reported_at) |
+                Q(reported_at=reported_at, id__gt=issue_id)
+            ).order_by('reported_at', 'id')[:per_page + 1]
+        )
+        if rows:
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page]
+            rows.reverse()
+            return KeysetPage(rows, has_next=True, has_previous=has_previous, total=total)
+        # Nothing is newer than the cursor (e.g. the newest issue was
+        # deleted or the link is stale): show the first page instead
+
+    queryset = queryset.order_by('-reported_at', '-id')
+    if after is not None:
+        reported_at, issue_id = after
+        queryset = queryset.filter(
+            Q(reported_at__lt=reported_at) |
+            Q(reported_at=reported_at, id__lt=issue_id)
+        )
+    rows = list(queryset[:per_page + 1])
+    has_next = len(rows) > per_page
+    return KeysetPage(rows[:per_page], has_next=has_next, has_previous=after is not None, total=total)
@@ -0,0 +1,46 @@
+"""
+Retrying writes that hit a busy database, for The Blindspot Initiative.
+
+SQLite allows one writer at a time; even with a busy timeout a write can
+give up with "database is locked" under bursts of concurrent reports.
+Functions decorated with @retry_on_busy run in their own transaction and
+are retried with backoff, so a retry never repeats half a write.
+"""
+from functools import wraps
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+BUSY_MESSAGES = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def is_busy_error(error):
+    return isinstance(error, OperationalError) and any(message in str(error) for message in BUSY_MESSAGES)
+
+
+def retry_on_busy(func=None, *, using=None):
+    """
+    Run `func` atomically, retrying up to DB_BUSY_RETRIES times when the
+    database is locked. Inside an outer transaction there is nothing to
+    retry (the outer block is already broken), so the error propagates.
+    Use as @retry_on_busy, or @retry_on_busy(using=alias) for another database.
+    """
+    if func is None:
+        return lambda func: retry_on_busy(func, using=using)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = getattr(settings, 'DB_BUSY_RETRIES', 5)
+        nested = transaction.get_connection(using).in_atomic_block
+        for attempt in range(retries + 1):
+            try:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if nested or attempt == retries or not is_busy_error(error):
+                    raise
+            # Exponential backoff with jitter: 50 ms, 100 ms, 200 ms, ...
+            time.sleep(0.05 * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
@@ -0,0 +1,212 @@
+"""
+Daily time-series rollups for The Blindspot Initiative.
+
+DailyIssueStats holds one row per category and day: issues reported,
+acknowledged and resolved that day, plus the backlog, the number of
+still-ignored issues and their average age at the end of the day. Trend
+charts read these rows instead of scanning Issue.
+
+rollup_days() recomputes a date range in one pass over the issues that
+were still open at its start (intervals become +1/-1 steps summed per
+day), so a nightly incremental run only reads the open backlog and
+recent activity. Between runs a status hook bumps today's counters, so
+how far the rollup got is kept in a RollupWatermark, not read off the
+rows.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Greatest
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Category, DailyIssueStats, Issue, RollupWatermark
+from .workflow import issue_status_changed
+
+# Default span returned by the timeseries endpoint
+DEFAULT_SERIES_DAYS = 365
+
+SERIES_FIELDS = ['new', 'acknowledged', 'resolved', 'backlog', 'ignored', 'avg_days_ignored']
+
+WATERMARK = 'daily_issue_stats'
+
+
+def complete_through():
+    """Last day the rollup covered after it had ended, or None before the first run"""
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('complete_through', flat=True).first()
+
+
+def _day(value):
+    return timezone.localtime(value).date() if value else None
+
+
+def _end_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.max))
+
+
+def rollup_days(start, end):
+    """
+    Rebuild DailyIssueStats for every day from `start` to `end` (dates,
+    inclusive) and advance the watermark over the days that are over.
+    Returns the number of rows written.
+    """
+    if end < start:
+        return 0
+    days = (end - start).days + 1
+    range_start = timezone.make_aware(datetime.combine(start, time.min))
+    range_end = _end_of_day(end)
+
+    # Per category: daily event counts, and difference arrays for the
+    # open intervals (backlog, ignored) and the ignored issues' report times
+    def series():
+        return {
+            'new': [0] * days, 'acknowledged': [0] * days, 'resolved': [0] * days,
+            'backlog': [0] * (days + 1), 'ignored': [0] * (days + 1), 'reported_sum': [0.0] * (days + 1),
+        }
+    by_category = defaultdict(series)
+
+    def index(value):
+        return (_day(value) - start).days
+
+    def add_interval(steps, opened, closed, amount=1):
+        first = max(index(opened), 0)
+        last = min(index(closed), days) if closed else days
+        if first < last:
+            steps[first] += amount
+            steps[last] -= amount
+
+    # Only issues still open at the start of the range or reported since
+    issues = Issue.objects.order_by().filter(reported_at__lte=range_end).filter(
+        Q(resolved_at__isnull=True) | Q(resolved_at__gte=range_start)
+    ).values_list(
+        'category_id', 'reported_at', 'acknowledged_at', 'in_progress_at', 'resolved_at',
+    ).iterator(chunk_size=2000)
+
+    for category_id, reported_at, acknowledged_at, in_progress_at, resolved_at in issues:
+        data = by_category[category_id]
+        for key, value in (('new', reported_at), ('acknowledged', acknowledged_at), ('resolved', resolved_at)):
+            if value and range_start <= value <= range_end:
+                data[key][index(value)] += 1
+        add_interval(data['backlog'], reported_at, resolved_at)
+        # Ignored until the first sign of action, as in Issue.days_ignored
+        acted_at = acknowledged_at or in_progress_at or resolved_at
+        add_interval(data['ignored'], reported_at, acted_at)
+        add_interval(data['reported_sum'], reported_at, acted_at, reported_at.timestamp())
+
+    authorities = dict(Category.objects.values_list('id', 'authority_id'))
+    rows = []
+    for category_id, data in by_category.items():
+        backlog = ignored = 0
+        reported_sum = 0.0
+        for i in range(days):
+            backlog += data['backlog'][i]
+            ignored += data['ignored'][i]
+            reported_sum += data['reported_sum'][i]
+            if not (backlog or data['new'][i] or data['acknowledged'][i] or data['resolved'][i]):
+                continue
+            day = start + timedelta(days=i)
+            avg_days_ignored = 0.0
+            if ignored:
+                avg_days_ignored = (_end_of_day(day).timestamp() - reported_sum / ignored) / 86400
+            rows.append(DailyIssueStats(
+                date=day,
+                authority_id=authorities[category_id],
+                category_id=category_id,
+                new_count=data['new'][i],
+                acknowledged_count=data['acknowledged'][i],
+                resolved_count=data['resolved'][i],
+                backlog=backlog,
+                ignored_count=ignored,
+                avg_days_ignored=round(avg_days_ignored, 2),
+            ))
+
+    with transaction.atomic():
+        DailyIssueStats.objects.filter(date__range=(start, end)).delete()
+        DailyIssueStats.objects.bulk_create(rows, batch_size=500)
+        # Today (and any later day) can still change; earlier days are final
+        complete = min(end, timezone.localdate() - timedelta(days=1))
+        watermark = complete_through()
+        # Only a range that joins up with the days already covered extends them
+        if start <= complete and (watermark is None or start <= watermark + timedelta(days=1) <= complete):
+            RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'complete_through': complete})
+    return len(rows)
+
+
+# workflow action -> (counter bumped today, end-of-day gauge it lowers)
+TRANSITION_COUNTERS = {
+    'accept': ('acknowledged_count', 'ignored_count'),
+    'complete': ('resolved_count', 'backlog'),
+}
+
+
+@receiver(issue_status_changed, dispatch_uid='core.rollups.update_daily_stats')
+def update_daily_stats(sender, event, **kwargs):
+    """
+    Keep today's row current between rollup runs. New rows carry the
+    category's last known gauges forward; the next rollup_days() run
+    recomputes the day exactly (including new reports and average age).
+    """
+    counters = TRANSITION_COUNTERS.get(event.transition.action)
+    if counters is None:
+        return
+    counter, gauge = counters
+    today = _day(event.changed_at)
+
+    changed = defaultdict(int)
+    for row in event.issues:
+        changed[(row['category__authority_id'], row['category_id'])] += 1
+
+    with transaction.atomic():
+        for (authority_id, category_id), count in changed.items():
+            previous = DailyIssueStats.objects.filter(category_id=category_id, date__lt=today).order_by('-date').first()
+            DailyIssueStats.objects.get_or_create(date=today, category_id=category_id, defaults={
+                'authority_id': authority_id,
+                'backlog': previous.backlog if previous else 0,
+                'ignored_count': previous.ignored_count if previous else 0,
+                'avg_days_ignored': previous.avg_days_ignored if previous else 0,
+            })
+            stats = DailyIssueStats.objects.filter(date=today, category_id=category_id)
+            stats.update(**{counter: F(counter) + count})
+            # Gauges never go below zero, even when carried-forward values are stale
+            stats.update(**{gauge: Greatest(F(gauge) - count, 0)})
+
+
+def timeseries(authority_id=None, category_id=None, since=None, until=None):
+    """
+    Daily series summed over the selected categories, as parallel arrays
+    (one entry per day, missing days are zero) for charting.
+    """
+    stats = DailyIssueStats.objects.all()
+    if authority_id:
+        stats = stats.filter(authority_id=authority_id)
+    if category_id:
+        stats = stats.filter(category_id=category_id)
+
+    until = until or timezone.localdate()
+    since = since or until - timedelta(days=DEFAULT_SERIES_DAYS - 1)
+    rows = stats.filter(date__range=(since, until)).order_by().values('date').annotate(
+        new_total=Sum('new_count'),
+        acknowledged_total=Sum('acknowledged_count'),
+        resolved_total=Sum('resolved_count'),
+        backlog_total=Sum('backlog'),
+        ignored_total=Sum('ignored_count'),
+        # Weighted so the average is over issues, not over categories
+        ignored_days=Sum(F('avg_days_ignored') * F('ignored_count')),
+    )
+    by_date = {row['date']: row for row in rows}
+
+    days = (until - since).days + 1
+    result = {'dates': []}
+    result.update({field: [] for field in SERIES_FIELDS})
+    for i in range(max(days, 0)):
+        day = since + timedelta(days=i)
+        row = by_date.get(day)
+        result['dates'].append(day.isoformat())
+        for field in SERIES_FIELDS[:-1]:
+            result[field].append(row[f'{field}_total'] if row else 0)
+        result['avg_days_ignored'].append(
+            round(row['ignored_days'] / row['ignored_total'], 1) if row and row['ignored_total'] else 0
+        )
+    return result
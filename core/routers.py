@@ -0,0 +1,93 @@
+"""
+Read-replica routing for The Blindspot Initiative.
+
+Views decorated with @read_from_replica read the app's tables from one of
+the DATABASE_REPLICAS aliases; everything else (writes, auth and sessions)
+stays on 'default'. A session that has just written (reported, confirmed
+or changed an issue's status, see @records_write) reads from 'default'
+for READ_YOUR_WRITES_SECONDS, so replication lag never hides its own
+changes from it.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SESSION_KEY = 'last_write_at'
+
+# Alias the current view reads core tables from (None: the default)
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    """Routes core reads inside @read_from_replica views to a replica"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'core':
+            return _read_alias.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit, so instances loaded from a replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in _replicas():
+            return False
+        return None
+
+
+def choose_replica(request):
+    """Replica alias for this request's reads, or None to use 'default'"""
+    replicas = _replicas()
+    if not replicas:
+        return None
+    last_write = request.session.get(SESSION_KEY) if hasattr(request, 'session') else None
+    if last_write and time.time() - last_write < getattr(settings, 'READ_YOUR_WRITES_SECONDS', 30):
+        return None
+    return random.choice(replicas)
+
+
+def current_read_alias():
+    """Alias the current request reads core tables from"""
+    return _read_alias.get() or DEFAULT_DB_ALIAS
+
+
+def read_from_replica(view_func):
+    """Decorator for read-only views that can tolerate replication lag"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        alias = choose_replica(request)
+        if alias is None:
+            return view_func(request, *args, **kwargs)
+        token = _read_alias.set(alias)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _read_alias.reset(token)
+    return wrapper
+
+
+def records_write(view_func):
+    """
+    Decorator for views that change issues: after a successful POST the
+    session reads from 'default' for a while (read-your-writes).
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        if request.method == 'POST' and response.status_code < 400 and _replicas():
+            request.session[SESSION_KEY] = time.time()
+        return response
+    return wrapper
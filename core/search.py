@@ -0,0 +1,212 @@
+"""
+Full-text issue search for The Blindspot Initiative.
+
+Title, description, address and category name are indexed in a side
+table, core_issue_search:
+
+* SQLite: an FTS5 virtual table keyed by the issue's rowid, ranked with
+  bm25() (title weighted highest).
+* PostgreSQL: a weighted tsvector column with a GIN index, ranked with
+  ts_rank().
+
+Other backends (or SQLite builds without FTS5) fall back to icontains.
+The index follows Issue/Category saves and deletes through signals;
+bulk writes call index_issues() themselves, and the
+rebuild_search_index command recreates it from scratch.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Issue
+
+TABLE = 'core_issue_search'
+
+# bm25() weights for the FTS5 columns: title, description, address, category
+BM25_WEIGHTS = (10.0, 1.0, 2.0, 5.0)
+
+# Issues re-indexed per statement
+INDEX_BATCH_SIZE = 500
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', i.title), 'A') || "
+    "setweight(to_tsvector('simple', c.name), 'B') || "
+    "setweight(to_tsvector('simple', i.address), 'C') || "
+    "setweight(to_tsvector('simple', i.description), 'D')"
+)
+
+# Aliases known to have the FTS5 table
+_available = set()
+
+
+def backend(using=connection):
+    """'fts5', 'postgresql', or None when no search index is available"""
+    if using.vendor == 'postgresql':
+        return 'postgresql'
+    if using.vendor == 'sqlite':
+        # Only a positive answer is remembered: the table may be created later
+        if using.alias in _available:
+            return 'fts5'
+        if TABLE in using.introspection.table_names():
+            _available.add(using.alias)
+            return 'fts5'
+    return None
+
+
+def create_index(schema_editor):
+    """Create the backend's index table (used by the migration)"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                "title, description, address, category, "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+        except Exception:
+            return  # SQLite built without FTS5: search falls back to LIKE
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+            'issue_id bigint PRIMARY KEY REFERENCES core_issue (id) ON DELETE CASCADE, '
+            'document tsvector NOT NULL)'
+        )
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx ON {TABLE} USING GIN (document)')
+
+
+def drop_index(schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def index_issues(issue_ids=None, using=connection):
+    """(Re)index the given issues, or every issue when issue_ids is None"""
+    kind = backend(using)
+    if kind is None:
+        return
+    with using.cursor() as cursor:
+        if issue_ids is None:
+            cursor.execute(f'DELETE FROM {TABLE}')
+            _insert(cursor, kind, '', [])
+            return
+        issue_ids = list(issue_ids)
+        for start in range(0, len(issue_ids), INDEX_BATCH_SIZE):
+            batch = issue_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            if kind == 'fts5':
+                cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', batch)
+            _insert(cursor, kind, f'WHERE i.id IN ({placeholders})', batch)
+
+
+def _insert(cursor, kind, where, params):
+    source = f'FROM core_issue i JOIN core_category c ON c.id = i.category_id {where}'
+    if kind == 'fts5':
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, description, address, category) '
+            f'SELECT i.id, i.title, i.description, i.address, c.name {source}',
+            params,
+        )
+    else:
+        cursor.execute(
+            f'INSERT INTO {TABLE} (issue_id, document) SELECT i.id, {_PG_DOCUMENT} {source} '
+            'ON CONFLICT (issue_id) DO UPDATE SET document = EXCLUDED.document',
+            params,
+        )
+
+
+def _unindex(issue_id):
+    # PostgreSQL rows go with the issue (ON DELETE CASCADE)
+    if backend() == 'fts5':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [issue_id])
+
+
+def build_query(text, kind):
+    """
+    Turn free text into a backend query: every word must match, the last
+    one as a prefix (for search-as-you-type). None when there are no words.
+    """
+    words = _TOKEN_RE.findall(text.lower())
+    if not words:
+        return None
+    if kind == 'fts5':
+        terms = [f'"{word}"' for word in words]
+        terms[-1] += '*'
+        return ' '.join(terms)
+    terms = list(words)
+    terms[-1] += ':*'
+    return ' & '.join(terms)
+
+
+def search_issues(queryset, text):
+    """
+    Restrict `queryset` to issues matching `text`, best match first, with
+    a `rank` annotation (higher is better). Returns queryset.none() when
+    the text has no searchable words.
+    """
+    kind = backend(connections[queryset.db])
+    query = build_query(text, kind)
+    if query is None:
+        return queryset.none()
+
+    if kind == 'fts5':
+        weights = ', '.join(str(w) for w in BM25_WEIGHTS)
+        # bm25() is lower-is-better, so it is negated into a score
+        return queryset.extra(
+            tables=[TABLE],
+            where=[f'{TABLE}.rowid = core_issue.id', f'{TABLE} MATCH %s'],
+            params=[query],
+            select={'rank': f'-bm25({TABLE}, {weights})'},
+        ).order_by('-rank', '-id')
+    if kind == 'postgresql':
+        return queryset.extra(
+            tables=[TABLE],
+            where=[f'{TABLE}.issue_id = core_issue.id', f"{TABLE}.document @@ to_tsquery('simple', %s)"],
+            params=[query],
+            select={'rank': f"ts_rank({TABLE}.document, to_tsquery('simple', %s))"},
+            select_params=[query],
+        ).order_by('-rank', '-id')
+
+    # No index: every word must appear in the title, description or address
+    condition = Q()
+    for word in _TOKEN_RE.findall(text):
+        condition &= Q(title__icontains=word) | Q(description__icontains=word) | Q(address__icontains=word)
+    return queryset.filter(condition).annotate(rank=Value(0.0, output_field=FloatField())).order_by('-id')
+
+
+def matching_ids(text):
+    """
+    Subquery of matching issue IDs (no ranking), for filtering querysets
+    such as the admin changelist. None when there is no index.
+    """
+    kind = backend()
+    query = build_query(text, kind)
+    if kind is None or query is None:
+        return None
+    if kind == 'fts5':
+        return RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [query])
+    return RawSQL(f"SELECT issue_id FROM {TABLE} WHERE document @@ to_tsquery('simple', %s)", [query])
+
+
+@receiver(post_save, sender=Issue, dispatch_uid='core.search.issue_saved')
+def _issue_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_issues([instance.id])
+
+
+@receiver(post_delete, sender=Issue, dispatch_uid='core.search.issue_deleted')
+def _issue_deleted(sender, instance, **kwargs):
+    _unindex(instance.id)
+
+
+@receiver(post_save, sender=Category, dispatch_uid='core.search.category_saved')
+def _category_saved(sender, instance, created=False, raw=False, **kwargs):
+    # The category name is indexed with every issue in it
+    if not created and not raw:
+        index_issues(Issue.objects.filter(category=instance).values_list('id', flat=True))
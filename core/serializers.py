@@ -0,0 +1,258 @@
+"""
+Compact issue serialization for The Blindspot Initiative.
+
+The map, nearby, radius, unaddressed and detail endpoints all describe
+issues with the same properties. They read rows with values_list() into
+IssueRecord (no model instances, no category/authority joins), look
+names and colours up in a per-request category table, and compute the
+derived fields (days ignored, urgency) once per row against one `now`.
+FIELDS maps every property name to its getter, so the endpoints differ
+only in which names they ask for.
+
+columnar() is the same map payload as parallel arrays, for clients that
+ask for ?format=columnar. Bodies are encoded compactly, with orjson when
+it is installed.
+"""
+import json
+from operator import attrgetter
+
+from django.db.models import Count
+from django.http import HttpResponse
+from django.utils import timezone
+
+from .models import Category, Issue, URGENCY_COLORS, days_ignored_for, urgency_for
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library encoder is used instead
+    orjson = None
+
+STATUS_DISPLAY = dict(Issue.STATUS_CHOICES)
+
+DEFAULT_URGENCY_COLOR = '#4d9fff'
+
+# Issue columns read for every record, in IssueRecord's argument order
+SLIM_RECORD_FIELDS = (
+    'id', 'category_id', 'latitude', 'longitude', 'severity', 'status', 'reported_at', 'acknowledged_at',
+)
+RECORD_FIELDS = SLIM_RECORD_FIELDS + ('title', 'description', 'address')
+
+
+class CategoryInfo:
+    """A category with its authority's name and colour"""
+    __slots__ = ('id', 'name', 'icon', 'authority_id', 'authority', 'authority_color')
+
+    def __init__(self, id, name, icon, authority_id, authority, authority_color):
+        self.id = id
+        self.name = name
+        self.icon = icon
+        self.authority_id = authority_id
+        self.authority = authority
+        self.authority_color = authority_color
+
+
+def category_table():
+    """{category id: CategoryInfo} for every category, in one query"""
+    rows = Category.objects.order_by().values_list(
+        'id', 'name', 'icon', 'authority_id', 'authority__name', 'authority__color',
+    )
+    return {row[0]: CategoryInfo(*row) for row in rows}
+
+
+class IssueRecord:
+    """An issue's serialized fields, with its derived values computed once"""
+    __slots__ = RECORD_FIELDS + (
+        'confirmation_count', 'category', 'days_since_report', 'days_ignored', 'urgency_level',
+    )
+
+    def __init__(self, id, category_id, latitude, longitude, severity, status, reported_at, acknowledged_at,
+                 title=None, description=None, address=None, *, confirmation_count=None, category, now):
+        self.id = id
+        self.category_id = category_id
+        self.latitude = float(latitude)
+        self.longitude = float(longitude)
+        self.severity = severity
+        self.status = status
+        self.reported_at = reported_at
+        self.acknowledged_at = acknowledged_at
+        self.title = title
+        self.description = description
+        self.address = address
+        self.confirmation_count = confirmation_count
+        self.category = category
+        self.days_since_report = (now - reported_at).days
+        self.days_ignored = days_ignored_for(status, reported_at, acknowledged_at, now)
+        self.urgency_level = urgency_for(self.days_ignored, severity)
+
+    @classmethod
+    def from_issue(cls, issue, now=None):
+        """Record for an Issue loaded with category__authority (and a confirmation_count annotation)"""
+        category = issue.category
+        values = [getattr(issue, name) for name in RECORD_FIELDS]
+        return cls(
+            *values, confirmation_count=getattr(issue, 'confirmation_count', None),
+            category=CategoryInfo(
+                category.id, category.name, category.icon,
+                category.authority_id, category.authority.name, category.authority.color,
+            ),
+            now=now or timezone.now(),
+        )
+
+
+def fetch_records(queryset, confirmations=False, slim=False, now=None):
+    """
+    IssueRecords for a queryset, in its order, read with values_list().
+    Slim records skip the text columns (title, description, address).
+    """
+    fields = SLIM_RECORD_FIELDS if slim else RECORD_FIELDS
+    categories = category_table()
+    now = now or timezone.now()
+    if not confirmations:
+        return [IssueRecord(*row, category=categories[row[1]], now=now) for row in queryset.values_list(*fields)]
+    # Annotating before values_list() groups by the issue
+    rows = queryset.annotate(confirmation_count=Count('confirmations')).values_list(*fields, 'confirmation_count')
+    return [
+        IssueRecord(*row[:-1], confirmation_count=row[-1], category=categories[row[1]], now=now)
+        for row in rows
+    ]
+
+
+# Property name -> getter on an IssueRecord
+FIELDS = {
+    'id': attrgetter('id'),
+    'title': attrgetter('title'),
+    'description': attrgetter('description'),
+    'category': attrgetter('category.name'),
+    'authority': attrgetter('category.authority'),
+    'authority_color': attrgetter('category.authority_color'),
+    'icon': attrgetter('category.icon'),
+    'severity': attrgetter('severity'),
+    'status': attrgetter('status'),
+    'status_display': lambda record: STATUS_DISPLAY.get(record.status, record.status),
+    'address': attrgetter('address'),
+    'latitude': attrgetter('latitude'),
+    'longitude': attrgetter('longitude'),
+    'reported_at': lambda record: record.reported_at.isoformat(),
+    'days_since_report': attrgetter('days_since_report'),
+    'days_ignored': attrgetter('days_ignored'),
+    'urgency_level': attrgetter('urgency_level'),
+    'urgency_color': lambda record: URGENCY_COLORS.get(record.urgency_level, DEFAULT_URGENCY_COLOR),
+    'confirmation_count': attrgetter('confirmation_count'),
+}
+
+# Properties each endpoint returns
+SLIM_MAP_FIELDS = (
+    'id', 'severity', 'status', 'urgency_level', 'urgency_color', 'authority_color', 'icon',
+)
+MAP_FIELDS = (
+    'id', 'title', 'description', 'category', 'authority', 'authority_color', 'severity',
+    'status', 'status_display', 'address', 'reported_at', 'days_since_report', 'days_ignored',
+    'urgency_level', 'urgency_color', 'confirmation_count', 'icon',
+)
+NEARBY_FIELDS = (
+    'id', 'title', 'category', 'authority', 'severity', 'status', 'days_ignored',
+    'urgency_level', 'urgency_color', 'confirmation_count',
+)
+RADIUS_FIELDS = (
+    'id', 'title', 'latitude', 'longitude', 'days_since_report', 'urgency_level',
+    'urgency_color', 'status', 'category', 'authority',
+)
+UNADDRESSED_FIELDS = (
+    'id', 'title', 'category', 'authority', 'days_ignored', 'urgency_level',
+    'urgency_color', 'confirmation_count', 'address',
+)
+DETAIL_FIELDS = (
+    'id', 'title', 'description', 'category', 'authority', 'authority_color', 'severity',
+    'status', 'status_display', 'address', 'latitude', 'longitude', 'reported_at',
+    'days_since_report', 'days_ignored', 'urgency_level', 'urgency_color', 'confirmation_count', 'icon',
+)
+
+
+def serialize(record, fields):
+    """A record's properties as a dict"""
+    return {name: FIELDS[name](record) for name in fields}
+
+
+def serialize_many(records, fields):
+    getters = [(name, FIELDS[name]) for name in fields]
+    return [{name: get(record) for name, get in getters} for record in records]
+
+
+def features(records, fields):
+    """GeoJSON Point features for records"""
+    getters = [(name, FIELDS[name]) for name in fields]
+    return [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [record.longitude, record.latitude]},
+            'properties': {name: get(record) for name, get in getters},
+        }
+        for record in records
+    ]
+
+
+STATUS_CODES = [code for code, _ in Issue.STATUS_CHOICES]
+
+URGENCY_LEVELS = list(URGENCY_COLORS)
+
+
+def columnar(records, slim=False):
+    """
+    The map payload as parallel columns: per-issue values are arrays, and
+    the values many issues share (category, authority, status, urgency)
+    are indexes into small lookup tables, so no key is repeated per issue.
+    Slim payloads only carry what a marker needs (no text or counts).
+    """
+    categories = {}
+    for record in records:
+        if record.category_id not in categories:
+            categories[record.category_id] = record.category
+    status_index = {code: index for index, code in enumerate(STATUS_CODES)}
+    urgency_index = {level: index for index, level in enumerate(URGENCY_LEVELS)}
+    data = {
+        'format': 'columnar',
+        'count': len(records),
+        'statuses': [{'code': code, 'display': STATUS_DISPLAY[code]} for code in STATUS_CODES],
+        'urgencies': [{'level': level, 'color': URGENCY_COLORS[level]} for level in URGENCY_LEVELS],
+        'categories': {
+            category.id: {'name': category.name, 'icon': category.icon, 'authority': category.authority_id}
+            for category in categories.values()
+        },
+        'authorities': {
+            category.authority_id: {'name': category.authority, 'color': category.authority_color}
+            for category in categories.values()
+        },
+        'columns': {
+            'id': [record.id for record in records],
+            'lat': [record.latitude for record in records],
+            'lng': [record.longitude for record in records],
+            'category': [record.category_id for record in records],
+            'status': [status_index[record.status] for record in records],
+            'severity': [record.severity for record in records],
+            'urgency': [urgency_index[record.urgency_level] for record in records],
+        },
+    }
+    if not slim:
+        data['columns'].update({
+            'title': [record.title for record in records],
+            'description': [record.description for record in records],
+            'address': [record.address for record in records],
+            'reported_at': [record.reported_at.isoformat() for record in records],
+            'days_since_report': [record.days_since_report for record in records],
+            'days_ignored': [record.days_ignored for record in records],
+            'confirmation_count': [record.confirmation_count for record in records],
+        })
+    return data
+
+
+def dumps(data):
+    """Compact JSON bytes for plain data (str, numbers, lists, dicts, None)"""
+    if orjson is not None:
+        # Non-str keys (e.g. thumbnail widths) become strings, as with json
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """JsonResponse for serialized records, encoded with dumps()"""
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
@@ -0,0 +1,196 @@
+"""
+Columnar analytics snapshots for The Blindspot Initiative.
+
+A snapshot is a directory holding one typed array per column in NumPy's
+.npy format, plus a manifest.json describing the tables and the labels
+for coded columns:
+
+    <dir>/manifest.json
+    <dir>/issues/<column>.npy
+    <dir>/status_logs/<column>.npy
+
+The .npy files are written with the standard library only (array.array
+buffers flushed straight to disk), so no analytics dependency is needed
+on the server, while analysts can memory-map them with numpy.load() or
+build a DataFrame from them without touching the production database.
+"""
+import array
+import json
+import math
+import os
+import sys
+
+from django.utils import timezone
+
+from .models import Authority, Category, Issue, IssueStatusLog, days_ignored_for
+
+# Rows fetched per database round trip
+FETCH_SIZE = 5000
+
+# Values buffered per column before being appended to its file
+FLUSH_SIZE = 64 * 1024
+
+# Bytes reserved for the .npy preamble so the shape can be filled in last
+NPY_HEADER_SIZE = 128
+
+# datetime64 "not a time" marker (the smallest int64)
+NAT = -2 ** 63
+
+STATUS_CODES = {value: code for code, (value, _) in enumerate(Issue.STATUS_CHOICES)}
+
+_BYTE_ORDER = '<' if sys.byteorder == 'little' else '>'
+
+# column type -> (array typecode, numpy dtype descr without byte order)
+COLUMN_TYPES = {
+    'int8': ('b', 'i1'),
+    'int32': ('i', 'i4'),
+    'int64': ('q', 'i8'),
+    'float64': ('d', 'f8'),
+    'datetime': ('q', 'M8[s]'),
+}
+
+
+class NpyColumnWriter:
+    """Append-only writer for one 1-D .npy column file"""
+
+    def __init__(self, path, column_type):
+        typecode, descr = COLUMN_TYPES[column_type]
+        self.path = path
+        self.descr = _BYTE_ORDER + descr
+        self.buffer = array.array(typecode)
+        self.count = 0
+        self.fh = open(path, 'wb')
+        self.fh.write(b'\0' * NPY_HEADER_SIZE)
+
+    def append(self, value):
+        self.buffer.append(value)
+        if len(self.buffer) >= FLUSH_SIZE:
+            self.flush()
+
+    def flush(self):
+        self.count += len(self.buffer)
+        self.buffer.tofile(self.fh)
+        del self.buffer[:]
+
+    def close(self):
+        self.flush()
+        header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (self.descr, self.count)
+        # Magic, version 1.0, little-endian header length, then the padded header
+        header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+        preamble = b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+        self.fh.seek(0)
+        self.fh.write(preamble)
+        self.fh.close()
+
+
+class TableWriter:
+    """A set of column writers sharing one directory"""
+
+    def __init__(self, directory, columns):
+        os.makedirs(directory, exist_ok=True)
+        self.columns = columns
+        self.writers = [
+            NpyColumnWriter(os.path.join(directory, f'{name}.npy'), column_type)
+            for name, column_type in columns
+        ]
+
+    def append(self, values):
+        for writer, value in zip(self.writers, values):
+            writer.append(value)
+
+    def close(self):
+        for writer in self.writers:
+            writer.close()
+        return {
+            'rows': self.writers[0].count if self.writers else 0,
+            'columns': {name: writer.descr for (name, _), writer in zip(self.columns, self.writers)},
+        }
+
+
+def _epoch(value):
+    """Timestamp as whole seconds since the epoch, NAT when missing"""
+    return int(value.timestamp()) if value else NAT
+
+
+def _hours(start, end):
+    return (end - start).total_seconds() / 3600 if start and end else math.nan
+
+
+ISSUE_COLUMNS = [
+    ('id', 'int64'),
+    ('authority_id', 'int32'),
+    ('category_id', 'int32'),
+    ('status', 'int8'),
+    ('severity', 'int8'),
+    ('latitude', 'float64'),
+    ('longitude', 'float64'),
+    ('reported_at', 'datetime'),
+    ('acknowledged_at', 'datetime'),
+    ('in_progress_at', 'datetime'),
+    ('resolved_at', 'datetime'),
+    ('days_ignored', 'int32'),
+    ('hours_to_acknowledge', 'float64'),
+    ('hours_to_resolve', 'float64'),
+]
+
+STATUS_LOG_COLUMNS = [
+    ('id', 'int64'),
+    ('issue_id', 'int64'),
+    ('authority_id', 'int32'),
+    ('previous_status', 'int8'),
+    ('new_status', 'int8'),
+    ('changed_at', 'datetime'),
+]
+
+
+def _write_issues(directory, now):
+    table = TableWriter(directory, ISSUE_COLUMNS)
+    rows = Issue.objects.order_by('id').values_list(
+        'id', 'category__authority_id', 'category_id', 'status', 'severity',
+        'latitude', 'longitude', 'reported_at', 'acknowledged_at', 'in_progress_at', 'resolved_at',
+    ).iterator(chunk_size=FETCH_SIZE)
+    for (issue_id, authority_id, category_id, status, severity, latitude, longitude,
+         reported_at, acknowledged_at, in_progress_at, resolved_at) in rows:
+        # Evaluated at snapshot time
+        days_ignored = days_ignored_for(status, reported_at, acknowledged_at, now)
+        table.append((
+            issue_id, authority_id, category_id, STATUS_CODES.get(status, -1), severity,
+            float(latitude), float(longitude),
+            _epoch(reported_at), _epoch(acknowledged_at), _epoch(in_progress_at), _epoch(resolved_at),
+            days_ignored, _hours(reported_at, acknowledged_at), _hours(reported_at, resolved_at),
+        ))
+    return table.close()
+
+
+def _write_status_logs(directory):
+    table = TableWriter(directory, STATUS_LOG_COLUMNS)
+    rows = IssueStatusLog.objects.order_by('id').values_list(
+        'id', 'issue_id', 'authority_user__authority_id', 'previous_status', 'new_status', 'changed_at',
+    ).iterator(chunk_size=FETCH_SIZE)
+    for log_id, issue_id, authority_id, previous_status, new_status, changed_at in rows:
+        table.append((
+            log_id, issue_id, authority_id if authority_id is not None else -1,
+            STATUS_CODES.get(previous_status, -1), STATUS_CODES.get(new_status, -1), _epoch(changed_at),
+        ))
+    return table.close()
+
+
+def write_snapshot(directory):
+    """Write a full snapshot into `directory` and return its manifest"""
+    now = timezone.now()
+    manifest = {
+        'generated_at': now.isoformat(),
+        'tables': {
+            'issues': _write_issues(os.path.join(directory, 'issues'), now),
+            'status_logs': _write_status_logs(os.path.join(directory, 'status_logs')),
+        },
+        # Coded columns: code -> label. Missing values are coded -1 (NaT / NaN for times)
+        'labels': {
+            'status': [value for value, _ in Issue.STATUS_CHOICES],
+            'authority_id': {str(pk): name for pk, name in Authority.objects.values_list('id', 'name')},
+            'category_id': {str(pk): name for pk, name in Category.objects.values_list('id', 'name')},
+        },
+    }
+    with open(os.path.join(directory, 'manifest.json'), 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, indent=2)
+    return manifest
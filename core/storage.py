@@ -0,0 +1,90 @@
+"""
+Content-addressed media storage for The Blindspot Initiative.
+Uploaded files are named after the SHA-256 of their bytes, so identical
+photos are stored once and every stored URL is immutable.
+"""
+import hashlib
+import os
+import re
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Matches a stored blob or a file derived from one (e.g. a thumbnail)
+HASHED_NAME_RE = re.compile(r'(?:^|/)[0-9a-f]{64}(?:_\d+)?\.[a-z0-9]+$')
+
+
+def content_hash(content):
+    """SHA-256 hex digest of a File, read in chunks"""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    """Whether a storage name was produced by ContentAddressedStorage"""
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class _AlreadyStored(Exception):
+    """Raised internally when the target blob already exists"""
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that stores each file under <dir>/<aa>/<sha256><ext>.
+
+    <dir> is the directory of the requested name (the field's upload_to),
+    <aa> the first two hex digits of the hash, which keeps directories small.
+    Saving bytes that already exist returns the existing name without
+    writing anything.
+    """
+
+    def hashed_name(self, name, content):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)
+        return os.path.join(directory, digest[:2], f'{digest}{extension}').replace('\\', '/')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        return self.save_derived(self.hashed_name(name, content), content, max_length=max_length)
+
+    def save_derived(self, name, content, max_length=None):
+        """
+        Store a file under a fixed name unless it already exists.
+        Used directly for files derived from a blob (such as thumbnails),
+        whose names embed the source hash.
+
+        A reused file is touched, so gc_media_blobs' grace period covers
+        the new reference until the issue that holds it is committed.
+        """
+        try:
+            return super().save(name, content, max_length=max_length)
+        except _AlreadyStored:
+            try:
+                os.utime(self.path(name))
+            except FileNotFoundError:
+                # Collected since the existence check: write it again
+                return super().save(name, content, max_length=max_length)
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Same name means same bytes: an existing file (even one created by a
+        # concurrent upload since the last check) is reused, never renamed
+        if self.exists(name):
+            raise _AlreadyStored(name)
+        return name
+
+
+issue_image_storage = ContentAddressedStorage()
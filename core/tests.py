@@ -1,3 +1,1425 @@
-from django.test import TestCase
+import array
+import ast
+import csv
+import gzip
+import json
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+import unittest.mock
+from datetime import datetime, time, timedelta
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, OperationalError
+from django.db.models import Count
+from django.conf import settings
+from django.test import Client, RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from . import analytics, autocomplete, compression, details, exports, images, search, serializers
+from .cache import bump, versioned_key
+from .management.commands.import_issues import Command as ImportCommand
+from .pagination import encode_cursor
+from .retry import retry_on_busy
+from .rollups import complete_through, rollup_days
+from .duplicates import find_duplicates
+from .models import (
+    Authority, Category, DailyIssueStats, Issue, AuthorityUser, IssueComment, IssueConfirmation, IssueStatusLog,
+    NotificationLog, ResolutionTimeStats, Ward,
+)
+from .storage import is_content_addressed
+from .wards import ward_for_point
+from .workflow import issue_status_changed, can_transition, transition_issue, bulk_transition_issues
+
+
+TEST_SETTINGS = override_settings(
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+
+
+class AuthorityTestMixin:
+    """Shared fixtures: one authority with a logged-in authority user"""
+
+    def setUp(self):
+        self.authority = Authority.objects.create(name='Municipal Corporation', email='')
+        self.category = Category.objects.create(authority=self.authority, name='Garbage')
+        self.user = User.objects.create_user('municipal', password='pass12345')
+        self.authority_user = AuthorityUser.objects.create(user=self.user, authority=self.authority)
+        self.client.login(username='municipal', password='pass12345')
+
+    def make_issues(self, count, **kwargs):
+        return Issue.objects.bulk_create([
+            Issue(
+                title=f'Issue {i}',
+                description='Overflowing bin',
+                category=self.category,
+                latitude='9.9312000',
+                longitude='76.2673000',
+                **kwargs
+            )
+            for i in range(count)
+        ])
+
+
+@TEST_SETTINGS
+class AuthorityDashboardTests(AuthorityTestMixin, TestCase):
+
+    def dashboard_query_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('authority_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_independent_of_page_size(self):
+        self.make_issues(2)
+        small = self.dashboard_query_count()
+        self.make_issues(30)
+        self.assertEqual(self.dashboard_query_count(), small)
+
+    def test_stats_are_aggregated_per_status(self):
+        self.make_issues(3)
+        self.make_issues(2, status='resolved')
+        stats = self.client.get(reverse('authority_dashboard')).context['stats']
+        self.assertEqual(stats['total'], 5)
+        self.assertEqual(stats['ignored'], 3)
+        self.assertEqual(stats['resolved'], 2)
+        self.assertEqual(stats['acknowledged'], 0)
+
+    def test_accept_issue_logs_transition(self):
+        issue = self.make_issues(1)[0]
+        self.client.post(reverse('authority_accept_issue', args=[issue.id]))
+        issue.refresh_from_db()
+        self.assertEqual(issue.status, 'acknowledged')
+        self.assertEqual(IssueStatusLog.objects.filter(issue=issue).count(), 1)
+
+    def test_keyset_pages_cover_all_issues(self):
+        self.make_issues(45)
+        url = reverse('authority_dashboard')
+        seen = []
+        response = self.client.get(url)
+        while True:
+            page = response.context['page_obj']
+            self.assertEqual(page.total, 45)
+            seen.extend(issue.id for issue in page)
+            if not page.has_next:
+                break
+            response = self.client.get(url, {'after': page.next_cursor})
+        self.assertEqual(len(seen), 45)
+        self.assertEqual(len(set(seen)), 45)
+
+        # Walking back from the last page returns the previous page intact
+        back = self.client.get(url, {'before': page.previous_cursor}).context['page_obj']
+        self.assertEqual([issue.id for issue in back], seen[20:40])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        self.make_issues(3)
+        response = self.client.get(reverse('authority_dashboard'), {'after': 'not-a-cursor'})
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_before_newest_issue_falls_back_to_first_page(self):
+        self.make_issues(3)
+        newest = Issue.objects.order_by('-reported_at', '-id').first()
+        response = self.client.get(reverse('authority_dashboard'), {'before': encode_cursor(newest)})
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page_obj']
+        self.assertEqual(len(page), 3)
+        self.assertFalse(page.has_previous)
+        self.assertIsNone(page.previous_cursor)
+
+
+@TEST_SETTINGS
+class BulkTransitionTests(AuthorityTestMixin, TestCase):
+
+    def post_bulk(self, action, issue_ids):
+        return self.client.post(
+            reverse('authority_bulk_transition'),
+            data=json.dumps({'action': action, 'issue_ids': issue_ids}),
+            content_type='application/json',
+        )
+
+    def test_bulk_accept_skips_invalid_transitions(self):
+        pending = self.make_issues(3)
+        resolved = self.make_issues(1, status='resolved')
+        ids = [issue.id for issue in pending + resolved]
+
+        data = self.post_bulk('accept', ids).json()
+        self.assertEqual(data['updated'], sorted(i.id for i in pending))
+        self.assertEqual(data['skipped'], [resolved[0].id])
+        self.assertEqual(Issue.objects.filter(status='acknowledged').count(), 3)
+        self.assertEqual(IssueStatusLog.objects.filter(new_status='acknowledged').count(), 3)
+
+    def test_bulk_ignores_other_authorities_issues(self):
+        other = Authority.objects.create(name='Water Authority')
+        other_category = Category.objects.create(authority=other, name='Leak')
+        issue = Issue.objects.create(
+            title='Leak', description='', category=other_category,
+            latitude='9.9', longitude='76.2',
+        )
+        data = self.post_bulk('accept', [issue.id]).json()
+        self.assertEqual(data['skipped'], [issue.id])
+        issue.refresh_from_db()
+        self.assertEqual(issue.status, 'ignored')
+
+    def test_bulk_rejects_unknown_action(self):
+        issue = self.make_issues(1)[0]
+        self.assertEqual(self.post_bulk('delete', [issue.id]).status_code, 400)
+
+    def test_benchmark_command_rolls_back(self):
+        out = StringIO()
+        call_command('benchmark_bulk_transitions', size=50, stdout=out)
+        self.assertIn('complete', out.getvalue())
+        self.assertFalse(Issue.objects.filter(title__startswith='Benchmark').exists())
+
+
+@TEST_SETTINGS
+class ConcurrentTransitionTests(AuthorityTestMixin, TransactionTestCase):
+    """Several threads racing to transition the same issue"""
+
+    THREADS = 8
+
+    def race(self, issue_id, action):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(transition_issue(issue_id, self.authority_user, action))
+            except OperationalError:
+                # SQLite may refuse a concurrent writer outright; that is a lost race too
+                results.append(False)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_only_one_thread_wins(self):
+        issue = self.make_issues(1)[0]
+        results = self.race(issue.id, 'accept')
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(IssueStatusLog.objects.filter(issue=issue).count(), 1)
+        issue.refresh_from_db()
+        self.assertEqual(issue.status, 'acknowledged')
+
+    def test_wrong_status_is_never_logged(self):
+        issue = self.make_issues(1)[0]
+        results = self.race(issue.id, 'complete')
+
+        self.assertNotIn(True, results)
+        self.assertFalse(IssueStatusLog.objects.filter(issue=issue).exists())
+
+
+@TEST_SETTINGS
+class WorkflowTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.events = []
+        issue_status_changed.connect(self.record, dispatch_uid='workflow-test')
+        self.addCleanup(issue_status_changed.disconnect, dispatch_uid='workflow-test')
+
+    def record(self, sender, event, **kwargs):
+        self.events.append(event)
+
+    def test_allowed_transitions(self):
+        self.assertTrue(can_transition('ignored', 'acknowledged'))
+        self.assertFalse(can_transition('ignored', 'resolved'))
+        self.assertFalse(can_transition('resolved', 'ignored'))
+
+    def test_hooks_fire_once_per_committed_transition(self):
+        issues = self.make_issues(3)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition_issues(self.authority_user, [i.id for i in issues], 'accept')
+        self.assertEqual(len(self.events), 1)
+        event = self.events[0]
+        self.assertEqual(event.transition.to_status, 'acknowledged')
+        self.assertEqual(sorted(event.issue_ids), sorted(i.id for i in issues))
+
+    def test_event_rows_are_shared_between_hooks(self):
+        issue = self.make_issues(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(issue.id, self.authority_user, 'accept')
+        event = self.events[0]
+        self.assertEqual(event.issues[0]['category__authority_id'], self.authority.id)
+        with self.assertNumQueries(0):
+            event.issues
+
+    def test_no_hook_when_nothing_changed(self):
+        issue = self.make_issues(1, status='resolved')[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(issue.id, self.authority_user, 'accept')
+        self.assertEqual(self.events, [])
+
+    def test_admin_without_authority_can_transition_any_issue(self):
+        issue = self.make_issues(1)[0]
+        updated, skipped = bulk_transition_issues(None, [issue.id], 'accept')
+        self.assertEqual(updated, [issue.id])
+        self.assertIsNone(IssueStatusLog.objects.get(issue=issue).authority_user)
+
+
+def make_photo(size=(3000, 2000)):
+    """A JPEG upload carrying an EXIF camera tag"""
+    image = Image.new('RGB', size, (200, 80, 40))
+    exif = Image.Exif()
+    exif[0x0110] = 'Test Camera'  # Model
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', exif=exif)
+    return SimpleUploadedFile('pothole.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+@TEST_SETTINGS
+class ImagePipelineTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.settings_override = self.settings(MEDIA_ROOT=media_root)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_upload_is_bounded_and_stripped(self):
+        processed = images.process_upload(make_photo())
+        with Image.open(processed) as image:
+            self.assertEqual(image.format, images.IMAGE_FORMAT)
+            self.assertLessEqual(max(image.size), images.MAX_DIMENSION)
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_rejects_non_images(self):
+        with self.assertRaises(ValidationError):
+            images.process_upload(SimpleUploadedFile('notes.jpg', b'not an image'))
+
+    def test_rejects_oversized_images_without_touching_pillow_limit(self):
+        pillow_limit = Image.MAX_IMAGE_PIXELS
+        with unittest.mock.patch.object(images, 'MAX_PIXELS', 1000):
+            response = self.client.post(reverse('report_issue'), {
+                'category_id': self.category.id, 'title': 'Pothole', 'latitude': '9.9312', 'longitude': '76.2673',
+                'image': make_photo(),
+            })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Image is too large (3000x2000 pixels)')
+        self.assertEqual(Image.MAX_IMAGE_PIXELS, pillow_limit)
+        self.assertFalse(Issue.objects.exists())
+
+    def test_report_stores_reencoded_image_and_thumbnails(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post(reverse('report_issue'), {
+                'category_id': self.category.id,
+                'title': 'Pothole',
+                'description': 'Deep pothole',
+                'latitude': '9.9312',
+                'longitude': '76.2673',
+                'image': make_photo(),
+            })
+        self.assertTrue(response.json()['success'])
+        self.assertTrue(callbacks)
+
+        issue = Issue.objects.get(id=response.json()['issue_id'])
+        self.assertTrue(issue.image.name.endswith(images.IMAGE_EXTENSION))
+
+        widths = images.generate_thumbnails(issue.id)
+        self.assertEqual(widths, [320, 640, 1280])
+
+        detail = self.client.get(reverse('api_issue_detail', args=[issue.id])).json()
+        self.assertEqual(set(detail['image']['thumbnails']), {'320', '640', '1280'})
+        self.assertIn('320w', detail['image']['srcset'])
+
+
+@TEST_SETTINGS
+class ContentAddressedStorageTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        override = self.settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_issue_with_photo(self, upload):
+        issue = self.make_issues(1)[0]
+        issue.image = images.process_upload(upload)
+        issue.save()
+        return issue
+
+    def test_identical_photos_share_one_blob(self):
+        first = self.make_issue_with_photo(make_photo())
+        second = self.make_issue_with_photo(make_photo())
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(is_content_addressed(first.image.name))
+
+        directory = os.path.dirname(first.image.name)
+        self.assertEqual(len(first.image.storage.listdir(directory)[1]), 1)
+
+    def test_media_urls_are_immutable(self):
+        issue = self.make_issue_with_photo(make_photo())
+        path = issue.image.name
+        from .views import serve_media
+        response = serve_media(RequestFactory().get('/'), path, document_root=settings.MEDIA_ROOT)
+        self.assertIn('immutable', response['Cache-Control'])
+
+    def test_gc_removes_only_orphans(self):
+        kept = self.make_issue_with_photo(make_photo())
+        images.generate_thumbnails(kept.id)
+        orphan = self.make_issue_with_photo(make_photo(size=(800, 600)))
+        orphan_name = orphan.image.name
+        orphan.delete()
+
+        call_command('gc_media_blobs', grace_hours=0, stdout=StringIO())
+        storage = kept.image.storage
+        self.assertTrue(storage.exists(kept.image.name))
+        self.assertTrue(storage.exists(images.thumbnail_name(kept.image.name, 320)))
+        self.assertFalse(storage.exists(orphan_name))
+
+    def test_reupload_of_orphan_survives_gc(self):
+        orphan = self.make_issue_with_photo(make_photo())
+        name = orphan.image.name
+        orphan.delete()
+        storage = orphan.image.storage
+        old = timezone.now().timestamp() - 48 * 3600
+        os.utime(storage.path(name), (old, old))
+
+        # The same photo is uploaded again; its issue is not saved yet
+        self.assertEqual(storage.save('issues/photo' + images.IMAGE_EXTENSION, images.process_upload(make_photo())), name)
+        call_command('gc_media_blobs', grace_hours=24, stdout=StringIO())
+        self.assertTrue(storage.exists(name))
+
+
+@TEST_SETTINGS
+class DuplicateDetectionTests(AuthorityTestMixin, TestCase):
+
+    def report(self, **overrides):
+        data = {
+            'category_id': self.category.id,
+            'title': 'Overflowing bin',
+            'description': 'Again',
+            'latitude': '9.9312000',
+            'longitude': '76.2673000',
+        }
+        data.update(overrides)
+        return self.client.post(reverse('report_issue'), data)
+
+    def test_nearby_same_category_is_flagged(self):
+        existing = self.make_issues(1)[0]
+        # ~20 m north of the existing issue
+        response = self.report(latitude='9.9313800')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['candidates'][0]['id'], existing.id)
+        self.assertEqual(Issue.objects.count(), 1)
+
+    def test_force_files_the_report_anyway(self):
+        self.make_issues(1)
+        self.assertTrue(self.report(force='1').json()['success'])
+        self.assertEqual(Issue.objects.count(), 2)
+
+    def test_other_category_or_resolved_is_not_a_duplicate(self):
+        self.make_issues(1, status='resolved')
+        other = Category.objects.create(authority=self.authority, name='Streetlight')
+        Issue.objects.create(
+            title='Light out', description='', category=other,
+            latitude='9.9312000', longitude='76.2673000',
+        )
+        self.assertTrue(self.report().json()['success'])
+
+    def test_matching_photo_extends_the_radius(self):
+        photo_hash = images.perceptual_hash(images.process_upload(make_photo()))
+        existing = self.make_issues(1, image_phash=photo_hash)[0]
+        # ~110 m away: too far on distance alone, close enough with the same photo
+        self.assertEqual(find_duplicates(self.category.id, '9.9322000', '76.2673000'), [])
+        matches = find_duplicates(self.category.id, '9.9322000', '76.2673000', photo_hash)
+        self.assertEqual(matches[0]['id'], existing.id)
+        self.assertTrue(matches[0]['image_match'])
+
+    def test_lookup_uses_location_index(self):
+        queryset = Issue.objects.filter(
+            category_id=self.category.id,
+            latitude__range=(9.93, 9.94),
+            longitude__range=(76.26, 76.27),
+        )
+        self.assertIn('issue_category_location_idx', queryset.explain())
+
+
+class ImportIssuesTests(TestCase):
+
+    def setUp(self):
+        self.authority = Authority.objects.create(name='Municipal Corporation', email='city@example.org')
+        self.category = Category.objects.create(authority=self.authority, name='Garbage')
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def write(self, filename, content):
+        path = os.path.join(self.tmpdir, filename)
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_issues', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def csv_file(self):
+        return self.write('legacy.csv', (
+            'title,description,category,latitude,longitude,severity,reported_at\n'
+            'Bin 1,Full,Garbage,9.93,76.26,4,2025-01-05T10:00:00\n'
+            'Bin 2,Full,garbage,9.94,76.27,,\n'
+            'Bad,Full,Potholes,9.94,76.27,,\n'
+            f'Bin 3,Full,{self.category.id},9.95,76.28,2,\n'
+            'Bin 4,Full,Garbage,not-a-number,76.28,2,\n'
+        ))
+
+    def test_csv_import_validates_rows(self):
+        out, err = self.run_import(self.csv_file(), chunk_size=2)
+        self.assertEqual(Issue.objects.count(), 3)
+        self.assertIn('Imported 3 issues (2 rejected)', out)
+        self.assertIn("unknown category 'Potholes'", err)
+        self.assertEqual(Issue.objects.get(title='Bin 2').severity, self.category.default_severity)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_resumes_from_checkpoint(self):
+        path = self.csv_file()
+        with open(f'{path}.checkpoint', 'w') as fh:
+            json.dump({'path': os.path.abspath(path), 'rows_done': 2}, fh)
+        self.run_import(path)
+        self.assertEqual(list(Issue.objects.values_list('title', flat=True).order_by('title')), ['Bin 3'])
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_geojson_and_ndjson(self):
+        geojson = self.write('legacy.geojson', json.dumps({
+            'type': 'FeatureCollection',
+            'features': [
+                {
+                    'type': 'Feature',
+                    'geometry': {'type': 'Point', 'coordinates': [76.26 + i / 1000, 9.93]},
+                    'properties': {'title': f'Feature {i}', 'category': 'Garbage'},
+                }
+                for i in range(50)
+            ],
+        }))
+        ndjson = self.write('legacy.ndjson', '\n'.join(
+            json.dumps({'title': f'Line {i}', 'category': 'Garbage', 'latitude': 9.9, 'longitude': 76.2})
+            for i in range(5)
+        ))
+        call_command('import_issues', geojson, stdout=StringIO())
+        call_command('import_issues', ndjson, stdout=StringIO())
+        self.assertEqual(Issue.objects.filter(title__startswith='Feature').count(), 50)
+        self.assertEqual(Issue.objects.filter(title__startswith='Line').count(), 5)
+        self.assertEqual(float(Issue.objects.get(title='Feature 10').longitude), 76.27)
+
+    def test_batch_notifications_send_one_email_per_authority(self):
+        self.run_import(self.csv_file(), notify='batch')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(NotificationLog.objects.filter(status='sent').count(), 3)
+
+    def test_resumed_batch_notifications_cover_earlier_chunks(self):
+        path = self.csv_file()
+        flush = ImportCommand._flush
+        calls = []
+
+        def fail_second_chunk(command, *args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError('database went away')
+            return flush(command, *args, **kwargs)
+
+        with unittest.mock.patch.object(ImportCommand, '_flush', fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, chunk_size=2, notify='batch')
+        self.assertEqual(Issue.objects.count(), 2)
+        self.assertEqual(len(mail.outbox), 0)
+
+        out, _ = self.run_import(path, chunk_size=2, notify='batch')
+        self.assertIn('Imported 1 issues', out)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('3 imported issue reports', mail.outbox[0].subject)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint.issues'))
+
+    def test_malformed_rows_are_rejected_with_their_line(self):
+        path = self.write('legacy.ndjson', '\n'.join([
+            json.dumps({'title': 'Good', 'category': 'Garbage', 'latitude': 9.9, 'longitude': 76.2}),
+            '{"title": "Broken",',
+            '',
+            '["not", "an", "object"]',
+            '{"title": "NaN", "category": "Garbage", "latitude": NaN, "longitude": 76.2}',
+            '{"title": "Inf", "category": "Garbage", "latitude": 9.9, "longitude": Infinity}',
+            json.dumps({'title': 'Also good', 'category': 'Garbage', 'latitude': 9.9, 'longitude': 76.2}),
+            json.dumps({
+                'title': 'No such day', 'category': 'Garbage', 'latitude': 9.9, 'longitude': 76.2,
+                'reported_at': '2024-13-45T00:00:00',
+            }),
+        ]))
+        out, err = self.run_import(path)
+        self.assertIn('Imported 2 issues (5 rejected)', out)
+        self.assertIn('malformed JSON on line 2', err)
+        self.assertIn('expected an object, got list', err)
+        self.assertEqual(err.count('invalid coordinates'), 2)
+        self.assertIn('Row 7: invalid reported_at', err)
+
+    def test_geojson_points_without_coordinates_are_rejected(self):
+        def feature(title, geometry):
+            return {'type': 'Feature', 'geometry': geometry, 'properties': {'title': title, 'category': 'Garbage'}}
+
+        path = self.write('legacy.geojson', json.dumps({'type': 'FeatureCollection', 'features': [
+            feature('Missing', {'type': 'Point'}),
+            feature('Null', {'type': 'Point', 'coordinates': None}),
+            feature('Short', {'type': 'Point', 'coordinates': [76.26]}),
+            feature('Text', {'type': 'Point', 'coordinates': ['76.26', '9.93']}),
+            feature('Good', {'type': 'Point', 'coordinates': [76.26, 9.93]}),
+        ]}))
+        out, err = self.run_import(path)
+        self.assertIn('Imported 1 issues (4 rejected)', out)
+        self.assertEqual(err.count('Point geometry without two numeric coordinates'), 4)
+
+    def test_checkpoint_kept_until_notifications_are_sent(self):
+        path = self.csv_file()
+        with unittest.mock.patch(
+            'core.management.commands.import_issues.send_batch_notification', side_effect=RuntimeError('SMTP down')
+        ):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, chunk_size=2, notify='batch')
+        self.assertEqual(Issue.objects.count(), 3)
+        self.assertTrue(os.path.exists(f'{path}.checkpoint'))
+
+        # The rerun imports nothing again and notifies about every issue
+        out, _ = self.run_import(path, chunk_size=2, notify='batch')
+        self.assertIn('Imported 0 issues', out)
+        self.assertEqual(Issue.objects.count(), 3)
+        self.assertIn('3 imported issue reports', mail.outbox[0].subject)
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+
+@TEST_SETTINGS
+class ExportTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.issues = self.make_issues(3)
+        Issue.objects.filter(id=self.issues[0].id).update(
+            status='resolved', reported_at=timezone.make_aware(datetime(2025, 1, 5, 10, 0))
+        )
+        transition_issue(self.issues[1].id, self.authority_user, 'accept', notes='On it')
+
+    def download(self, dataset, **params):
+        return self.client.get(reverse('export_data', args=[dataset]), params)
+
+    def test_csv_and_filters(self):
+        response = self.download('issues', status='ignored')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual([int(r[0]) for r in rows[1:]], [self.issues[2].id])
+
+        response = self.download('issues', format='ndjson', until='2025-01-05')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [self.issues[0].id])
+
+        response = self.download('issues', since='yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_geojson_gzip(self):
+        response = self.download('issues', format='geojson', gzip='1')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="issues.geojson.gz"')
+        data = json.loads(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(data['features']), 3)
+        self.assertEqual(data['features'][0]['geometry']['coordinates'], [76.2673, 9.9312])
+
+    def test_audit_logs_are_staff_only(self):
+        self.assertEqual(self.download('status-logs').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.download('status-logs', format='ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(r['issue_id'], r['notes']) for r in rows], [(self.issues[1].id, 'On it')])
+
+    def test_command_writes_gzipped_file(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, 'issues.csv.gz')
+        out = StringIO()
+        call_command('export_data', 'issues', output=path, gzip=True, category=str(self.category.id), stdout=out)
+        self.assertIn('Exported issues', out.getvalue())
+        with gzip.open(path, 'rt', newline='') as fh:
+            self.assertEqual(len(list(csv.reader(fh))), 4)
+
+
+class SnapshotTests(AuthorityTestMixin, TestCase):
+
+    def read_column(self, path):
+        """Minimal .npy reader: parse the header and return (dtype, values)"""
+        with open(path, 'rb') as fh:
+            self.assertEqual(fh.read(8), b'\x93NUMPY\x01\x00')
+            header = ast.literal_eval(fh.read(int.from_bytes(fh.read(2), 'little')).decode('latin1'))
+            self.assertEqual(fh.tell() % 64, 0)
+            typecode = {'i1': 'b', 'i4': 'i', 'i8': 'q', 'f8': 'd', 'M8[s]': 'q'}[header['descr'][1:]]
+            values = array.array(typecode)
+            values.frombytes(fh.read())
+        self.assertEqual(header['shape'], (len(values),))
+        return header['descr'], list(values)
+
+    def test_snapshot_columns_and_derived_fields(self):
+        issues = self.make_issues(2)
+        transition_issue(issues[0].id, self.authority_user, 'accept')
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        directory = os.path.join(tmpdir, 'snap')
+        call_command('export_snapshot', output=directory, stdout=StringIO())
+
+        with open(os.path.join(directory, 'manifest.json')) as fh:
+            manifest = json.load(fh)
+        self.assertEqual(manifest['tables']['issues']['rows'], 2)
+        self.assertEqual(manifest['labels']['authority_id'], {str(self.authority.id): 'Municipal Corporation'})
+
+        issue_dir = os.path.join(directory, 'issues')
+        _, status = self.read_column(os.path.join(issue_dir, 'status.npy'))
+        self.assertEqual([manifest['labels']['status'][code] for code in status], ['acknowledged', 'ignored'])
+        descr, acknowledged = self.read_column(os.path.join(issue_dir, 'acknowledged_at.npy'))
+        self.assertTrue(descr.endswith('M8[s]'))
+        self.assertEqual(acknowledged[1], -2 ** 63)
+        _, hours = self.read_column(os.path.join(issue_dir, 'hours_to_acknowledge.npy'))
+        self.assertGreaterEqual(hours[0], 0)
+        self.assertTrue(math.isnan(hours[1]))
+
+        _, new_status = self.read_column(os.path.join(directory, 'status_logs', 'new_status.npy'))
+        self.assertEqual(new_status, [1])
+
+
+class ResolutionAnalyticsTests(AuthorityTestMixin, TestCase):
+
+    def test_percentile_interpolates_within_bucket(self):
+        histogram = analytics.empty_histogram()
+        for hours in [0.5, 3, 3, 30, 100]:
+            histogram[analytics.bucket_index(hours)] += 1
+        self.assertIsNone(analytics.percentile(analytics.empty_histogram(), 50))
+        # The 2.5th of 5 samples is 1.5 into the two samples of the 2-4h bucket
+        self.assertEqual(analytics.percentile(histogram, 50), 3.5)
+        self.assertLessEqual(analytics.percentile(histogram, 95), 120)
+
+    def test_transitions_update_stats_and_rebuild_matches(self):
+        issues = self.make_issues(4, reported_at=timezone.now() - timedelta(hours=10))
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition_issues(self.authority_user, [i.id for i in issues], 'accept')
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition_issues(self.authority_user, [issues[0].id], 'progress')
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(issues[0].id, self.authority_user, 'complete')
+
+        stats = {s.metric: s for s in ResolutionTimeStats.objects.all()}
+        self.assertEqual((stats['acknowledge'].count, stats['resolve'].count), (4, 1))
+        self.assertTrue(8 <= stats['acknowledge'].p50_hours <= 12)
+
+        live = [(s.metric, s.count, s.histogram) for s in ResolutionTimeStats.objects.order_by('metric')]
+        call_command('rebuild_resolution_stats', stdout=StringIO())
+        rebuilt = [(s.metric, s.count, s.histogram) for s in ResolutionTimeStats.objects.order_by('metric')]
+        self.assertEqual(live, rebuilt)
+
+    def test_api_merges_categories_without_scanning_issues(self):
+        other = Category.objects.create(authority=self.authority, name='Streetlight')
+        issues = self.make_issues(2, reported_at=timezone.now() - timedelta(hours=5))
+        Issue.objects.filter(id=issues[1].id).update(category=other)
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition_issues(self.authority_user, [i.id for i in issues], 'accept')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('api_resolution_times'), {'metric': 'acknowledge'})
+        results = response.json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual((results[0]['authority'], results[0]['count']), ('Municipal Corporation', 2))
+
+        response = self.client.get(reverse('api_resolution_times'), {'category': other.id})
+        self.assertEqual([r['category'] for r in response.json()['results']], ['Streetlight'])
+        self.assertEqual(self.client.get(reverse('api_resolution_times'), {'since': 'May'}).status_code, 400)
+
+
+class DailyRollupTests(AuthorityTestMixin, TestCase):
+
+    def at_noon(self, days_ago):
+        return timezone.make_aware(datetime.combine(timezone.localdate() - timedelta(days=days_ago), time(12)))
+
+    def setUp(self):
+        super().setUp()
+        self.other = Category.objects.create(authority=self.authority, name='Streetlight')
+        a, b, c = self.make_issues(3)
+        Issue.objects.filter(id=a.id).update(
+            status='resolved', reported_at=self.at_noon(3), acknowledged_at=self.at_noon(2), resolved_at=self.at_noon(1)
+        )
+        Issue.objects.filter(id=b.id).update(reported_at=self.at_noon(2))
+        Issue.objects.filter(id=c.id).update(reported_at=self.at_noon(0), category=self.other)
+        self.issue_b = b
+
+    def series(self, **params):
+        params.setdefault('since', (timezone.localdate() - timedelta(days=3)).isoformat())
+        return self.client.get(reverse('api_statistics_timeseries'), params).json()
+
+    def test_rollup_and_timeseries(self):
+        call_command('rollup_daily_stats', full=True, stdout=StringIO())
+        with self.assertNumQueries(1):
+            data = self.series()
+        self.assertEqual(len(data['dates']), 4)
+        self.assertEqual(data['new'], [1, 1, 0, 1])
+        self.assertEqual(data['acknowledged'], [0, 1, 0, 0])
+        self.assertEqual(data['resolved'], [0, 0, 1, 0])
+        self.assertEqual(data['backlog'], [1, 2, 1, 2])
+        self.assertEqual(data['ignored'], [1, 1, 1, 2])
+        self.assertEqual(data['avg_days_ignored'][:3], [0.5, 0.5, 1.5])
+
+        self.assertEqual(self.series(category=self.other.id)['new'], [0, 0, 0, 1])
+
+        # Incremental runs only redo the last rolled-up day onwards
+        out = StringIO()
+        call_command('rollup_daily_stats', stdout=out)
+        self.assertIn(f'Rolled up {timezone.localdate()}', out.getvalue())
+        self.assertEqual(self.series()['backlog'], [1, 2, 1, 2])
+
+    def test_transitions_bump_todays_row(self):
+        call_command('rollup_daily_stats', full=True, stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(self.issue_b.id, self.authority_user, 'accept')
+        data = self.series(category=self.category.id)
+        self.assertEqual((data['acknowledged'][-1], data['ignored'][-1]), (1, 0))
+
+        call_command('rollup_daily_stats', stdout=StringIO())
+        self.assertEqual(self.series(category=self.category.id), data)
+
+    def test_incremental_run_covers_days_missed_since_last_run(self):
+        today = timezone.localdate()
+        rollup_days(today - timedelta(days=3), today - timedelta(days=3))
+        self.assertEqual(complete_through(), today - timedelta(days=3))
+        # A transition today creates today's row before the next run
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(self.issue_b.id, self.authority_user, 'accept')
+
+        out = StringIO()
+        call_command('rollup_daily_stats', stdout=out)
+        self.assertIn(f'Rolled up {today - timedelta(days=2)} to {today}', out.getvalue())
+        self.assertEqual(complete_through(), today - timedelta(days=1))
+        incremental = self.series()
+        call_command('rollup_daily_stats', full=True, stdout=StringIO())
+        self.assertEqual(self.series(), incremental)
+
+    def test_invalid_ranges_are_rejected(self):
+        url = reverse('api_statistics_timeseries')
+        # The three-year limit also applies when until defaults to today
+        self.assertEqual(self.client.get(url, {'since': '1900-01-01'}).status_code, 400)
+        with self.assertRaisesMessage(CommandError, 'Invalid date: 2024-02-30'):
+            call_command('rollup_daily_stats', since='2024-02-30', stdout=StringIO())
+
+    def test_gauges_are_clamped_at_zero(self):
+        call_command('rollup_daily_stats', full=True, stdout=StringIO())
+        extra = self.make_issues(1)[0]
+        DailyIssueStats.objects.filter(date=timezone.localdate(), category=self.category).delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition_issues(self.authority_user, [self.issue_b.id, extra.id], 'accept')
+        # Yesterday's carried-forward gauge (1 ignored) is lower than the 2 accepted
+        row = DailyIssueStats.objects.get(date=timezone.localdate(), category=self.category)
+        self.assertEqual((row.acknowledged_count, row.ignored_count), (2, 0))
+
+
+@TEST_SETTINGS
+class HeatmapTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.issues = self.make_issues(3, severity=5)
+        # Far away from the others, and a resolved one that never counts
+        Issue.objects.filter(id=self.issues[2].id).update(latitude='10.5', longitude='76.9')
+        self.make_issues(1, status='resolved')
+
+    def fetch(self, **params):
+        return self.client.get(reverse('api_issues_heatmap'), params).json()
+
+    def test_cells_per_zoom(self):
+        detailed = self.fetch(zoom=15)
+        self.assertEqual(sorted(cell[3] for cell in detailed['cells']), [1, 2])
+        self.assertEqual(detailed['max_weight'], 1.0)  # two issues at severity 5, just reported
+        self.assertEqual([cell[3] for cell in self.fetch(zoom=0)['cells']], [3])
+        hexes = self.fetch(zoom=15, shape='hex')
+        self.assertEqual(sorted(cell[3] for cell in hexes['cells']), [1, 2])
+        lat, lng = max(hexes['cells'], key=lambda cell: cell[3])[:2]
+        self.assertAlmostEqual(lat, 9.9312, places=4)
+        self.assertAlmostEqual(lng, 76.2673, places=4)
+        self.assertEqual(self.client.get(reverse('api_issues_heatmap'), {'zoom': 30}).status_code, 400)
+
+    def test_cached_until_issues_change(self):
+        self.fetch(zoom=12)
+        with self.assertNumQueries(0):
+            self.fetch(zoom=8)
+        Issue.objects.create(
+            title='New', description='', category=self.category, latitude='9.93', longitude='76.26'
+        )
+        self.assertEqual(sum(cell[3] for cell in self.fetch(zoom=8)['cells']), 4)
+
+        # Workflow updates bypass post_save; the status hook invalidates instead
+        Issue.objects.filter(id=self.issues[0].id).update(status='in_progress')
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(self.issues[0].id, self.authority_user, 'complete')
+        self.assertEqual(sum(cell[3] for cell in self.fetch(zoom=8)['cells']), 3)
+
+    def test_bbox_clips_cells(self):
+        bbox = '76.2,9.9,76.3,10.0'
+        # Not cached yet: only the issues around the box are binned
+        clipped = self.fetch(zoom=12, bbox=bbox)
+        self.assertEqual([cell[3] for cell in clipped['cells']], [2])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch(zoom=12, bbox='76.201,9.901,76.299,9.999'), clipped)
+
+        # Cut from the cached level once every level is built
+        cache.clear()
+        self.assertEqual(sum(cell[3] for cell in self.fetch(zoom=12)['cells']), 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fetch(zoom=12, bbox=bbox), clipped)
+        for bad in ('76.3,9.9,76.2,10.0', '1,2,3', 'a,b,c,d'):
+            self.assertEqual(self.client.get(reverse('api_issues_heatmap'), {'zoom': 12, 'bbox': bad}).status_code, 400)
+
+
+@TEST_SETTINGS
+class WardTests(AuthorityTestMixin, TestCase):
+
+    def square(self, west, south, east, north):
+        return [[west, south], [east, south], [east, north], [west, north], [west, south]]
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        path = os.path.join(self.tmpdir, 'wards.geojson')
+        with open(path, 'w') as fh:
+            json.dump({'type': 'FeatureCollection', 'features': [
+                {'type': 'Feature', 'properties': {'name': 'Fort Kochi', 'code': 'W1'}, 'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [self.square(76.26, 9.92, 76.28, 9.94), self.square(76.262, 9.922, 76.264, 9.924)],
+                }},
+                {'type': 'Feature', 'properties': {'name': 'Ernakulam', 'code': 'W2'}, 'geometry': {
+                    'type': 'MultiPolygon',
+                    'coordinates': [[self.square(76.28, 9.92, 76.30, 9.94)], [self.square(76.31, 9.92, 76.32, 9.93)]],
+                }},
+            ]}, fh)
+        self.issues = self.make_issues(2)
+        call_command('load_wards', path, stdout=StringIO())
+        self.fort_kochi, self.ernakulam = Ward.objects.get(code='W1'), Ward.objects.get(code='W2')
+
+    def test_point_lookup(self):
+        self.assertEqual(ward_for_point(9.9312, 76.2673), self.fort_kochi.id)
+        self.assertIsNone(ward_for_point(9.923, 76.263))  # In the hole
+        self.assertEqual(ward_for_point(9.925, 76.315), self.ernakulam.id)  # Second polygon
+        self.assertIsNone(ward_for_point(10.5, 76.9))
+
+    def test_backfill_and_report_tagging(self):
+        Issue.objects.filter(id=self.issues[1].id).update(latitude='9.93', longitude='76.29')
+        call_command('assign_wards', stdout=StringIO())
+        self.assertEqual(
+            dict(Issue.objects.values_list('id', 'ward_id')),
+            {self.issues[0].id: self.fort_kochi.id, self.issues[1].id: self.ernakulam.id},
+        )
+
+        self.client.post(reverse('report_issue'), {
+            'title': 'Pothole', 'category_id': self.category.id, 'latitude': '9.925', 'longitude': '76.295', 'force': '1',
+        })
+        self.assertEqual(Issue.objects.get(title='Pothole').ward, self.ernakulam)
+
+        features = self.client.get(reverse('api_wards')).json()['features']
+        self.assertEqual([f['properties']['name'] for f in features], ['Ernakulam', 'Fort Kochi'])
+        self.assertEqual(features[0]['properties']['ignored'], 2)
+        self.assertIsNone(features[0]['geometry'])
+
+        detail = self.client.get(reverse('api_ward_detail', args=[self.fort_kochi.id])).json()
+        self.assertEqual(detail['properties']['by_category'][0]['total'], 1)
+        self.assertEqual(len(detail['geometry']['coordinates'][0]), 2)  # Outer ring and hole
+
+
+@TEST_SETTINGS
+class SearchTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.pothole = Issue.objects.create(
+            title='Deep pothole on MG Road', description='Bikes keep falling', category=self.category,
+            latitude='9.9312', longitude='76.2673', address='MG Road, Ernakulam',
+        )
+        self.mention = Issue.objects.create(
+            title='Broken footpath', description='Next to a pothole near the market', category=self.category,
+            latitude='10.5', longitude='76.9', status='resolved',
+        )
+
+    def search(self, **params):
+        return self.client.get(reverse('api_issues_search'), params).json()
+
+    def test_ranking_prefix_and_filters(self):
+        self.assertEqual(search.backend(), 'fts5')
+        results = self.search(q='pothole')['results']
+        self.assertEqual([r['id'] for r in results], [self.pothole.id, self.mention.id])  # Title beats description
+        self.assertEqual([r['id'] for r in self.search(q='mg ro')['results']], [self.pothole.id])
+        self.assertEqual({r['id'] for r in self.search(q='garb')['results']}, {self.pothole.id, self.mention.id})  # Category
+        self.assertEqual([r['id'] for r in self.search(q='pothole', status='resolved')['results']], [self.mention.id])
+
+        nearby = self.search(q='pothole', lat='9.93', lng='76.26', radius='2')['results']
+        self.assertEqual([r['id'] for r in nearby], [self.pothole.id])
+        self.assertLess(nearby[0]['distance_km'], 2)
+        self.assertEqual(self.client.get(reverse('api_issues_search')).status_code, 400)
+
+    def test_index_follows_writes(self):
+        self.pothole.title = 'Crater on MG Road'
+        self.pothole.save()
+        self.assertEqual([r['id'] for r in self.search(q='crater')['results']], [self.pothole.id])
+        self.mention.delete()
+        self.assertEqual(self.search(q='pothole')['count'], 0)
+
+        self.category.name = 'Road Damage'
+        self.category.save()
+        self.assertEqual(self.search(q='damage')['count'], 1)
+
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:core_issue_changelist'), {'q': 'crater'})
+        self.assertContains(response, 'Crater on MG Road')
+        self.assertFalse(any('LIKE' in q['sql'] for q in queries.captured_queries))
+
+    def test_fallback_matches_every_word_in_any_field(self):
+        issues = Issue.objects.all()
+        with unittest.mock.patch.object(search, 'backend', return_value=None):
+            self.assertEqual(list(search.search_issues(issues, 'pothole market')), [self.mention])  # Description
+            self.assertEqual(list(search.search_issues(issues, 'deep ernakulam')), [self.pothole])  # Title and address
+            self.assertEqual(list(search.search_issues(issues, 'pothole bikes market')), [])
+
+
+class AutocompleteTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        autocomplete.invalidate()
+        for address, count in (('MG Road, Ernakulam', 3), ('Marine Drive', 1)):
+            for _ in range(count):
+                Issue.objects.create(
+                    title='Pothole', description='Deep', category=self.category,
+                    latitude='9.9312', longitude='76.2673', address=address,
+                )
+
+    def suggest(self, q):
+        return self.client.get(reverse('api_autocomplete'), {'q': q}).json()['suggestions']
+
+    def test_trie_ranks_by_weight_and_splits_buckets(self):
+        trie = autocomplete.PrefixTrie()
+        for i in range(autocomplete.BUCKET_SIZE * 3):
+            trie.add(autocomplete.Term('address', f'{i} Kaloor Road', weight=i))
+        trie.add(autocomplete.Term('category', 'Street Lights', 1, weight=5))
+
+        self.assertEqual([t.text for t in trie.lookup('kal', 2)], ['47 Kaloor Road', '46 Kaloor Road'])
+        self.assertEqual([t.text for t in trie.lookup('ROAD')][:1], ['47 Kaloor Road'])  # Any word, any case
+        self.assertEqual([t.text for t in trie.lookup('12 kal')], ['12 Kaloor Road'])
+        self.assertEqual([t.text for t in trie.lookup('li')], ['Street Lights'])
+        self.assertEqual(trie.lookup('xyz'), [])
+
+        trie.reweigh('address', '3 Kaloor Road', 100)
+        self.assertEqual(trie.lookup('kal', 1)[0].text, '3 Kaloor Road')
+        self.assertLess(trie.stats()['nodes'], 100)
+
+    def test_repeated_address_is_placed_at_its_reports_centre(self):
+        for latitude, longitude in (('9.9000', '76.3000'), ('9.9200', '76.2800')):
+            Issue.objects.create(
+                title='Bin', description='Full', category=self.category,
+                latitude=latitude, longitude=longitude, address='Kaloor Junction',
+            )
+        autocomplete.invalidate()
+        suggestion = self.suggest('kaloor')[0]
+        self.assertEqual((suggestion['latitude'], suggestion['longitude']), (9.91, 76.29))
+
+    def test_suggestions_follow_writes(self):
+        suggestions = self.suggest('mg')
+        self.assertEqual(suggestions[0], {
+            'kind': 'address', 'text': 'MG Road, Ernakulam', 'count': 3, 'latitude': 9.9312, 'longitude': 76.2673,
+        })
+        self.assertEqual(self.suggest('garb')[0], {'kind': 'category', 'text': 'Garbage', 'count': 4, 'id': self.category.id})
+        self.assertEqual(self.suggest('munic')[0]['id'], self.authority.id)
+        self.assertEqual(self.suggest('m'), [])
+
+        # New reports update the trie in place, without a rebuild
+        for _ in range(3):
+            Issue.objects.create(
+                title='Flooding', description='Knee deep', category=self.category,
+                latitude='9.97', longitude='76.28', address='Marine Drive',
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual([s['text'] for s in autocomplete.suggest('ma')], ['Marine Drive'])
+            self.assertEqual(autocomplete.suggest('ernak')[0]['count'], 3)
+        Issue.objects.filter(address='Marine Drive').first().delete()
+        self.assertEqual(autocomplete.suggest('marine')[0]['count'], 3)
+
+        self.category.name = 'Waste Collection'
+        self.category.save()
+        self.assertEqual(self.suggest('waste')[0]['text'], 'Waste Collection')
+        self.assertEqual(self.suggest('garb'), [])
+
+
+@TEST_SETTINGS
+class ReplicaRoutingTests(AuthorityTestMixin, TransactionTestCase):
+    """A second SQLite file, copied from the test database, stands in for a lagging replica"""
+
+    def setUp(self):
+        super().setUp()
+        self.replicated = self.make_issues(1)[0]
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, 'replica.sqlite3')
+        replica = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(replica)
+        replica.close()
+        connections.settings['replica'] = dict(connections.settings['default'], NAME=path)
+        # Written after the copy: only on the primary
+        self.lagging = self.make_issues(1)[0]
+
+    def tearDown(self):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def issue_ids(self, client):
+        return {f['properties']['id'] for f in client.get(reverse('api_issues')).json()['features']}
+
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    def test_reads_use_replica_until_the_session_writes(self):
+        self.assertEqual(self.issue_ids(self.client), {self.replicated.id})
+        self.assertEqual(self.client.get(reverse('api_statistics')).json()['total'], 1)
+        for name in ('landing', 'index', 'api_authority_silence_scores'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+
+        self.client.post(reverse('authority_accept_issue', args=[self.lagging.id]))
+        self.assertEqual(self.issue_ids(self.client), {self.replicated.id, self.lagging.id})
+        self.assertEqual(self.issue_ids(Client()), {self.replicated.id})  # Other sessions are unaffected
+
+        citizen = Client()
+        citizen.force_login(User.objects.create_user('citizen'))
+        citizen.post(reverse('confirm_issue', args=[self.replicated.id]))
+        self.assertEqual(self.issue_ids(citizen), {self.replicated.id, self.lagging.id})
+
+        with override_settings(READ_YOUR_WRITES_SECONDS=0):
+            self.assertEqual(self.issue_ids(citizen), {self.replicated.id})
+        self.assertEqual(Issue.objects.count(), 2)  # Outside the views: the primary
+
+    def test_without_replicas_everything_reads_default(self):
+        self.assertEqual(self.issue_ids(self.client), {self.replicated.id, self.lagging.id})
+
+
+class SQLiteConcurrencyTests(AuthorityTestMixin, TransactionTestCase):
+    """Concurrent writers on a real database file (the in-memory test database has no WAL)"""
+
+    THREADS = 8
+    WRITES_PER_THREAD = 25
+
+    def setUp(self):
+        super().setUp()
+        self.issue = self.make_issues(1)[0]
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, 'stress.sqlite3')
+        target = sqlite3.connect(path)
+        connection.ensure_connection()
+        connection.connection.backup(target)
+        target.close()
+        connections.settings['stress'] = dict(connections.settings['default'], NAME=path)
+
+    def tearDown(self):
+        connections['stress'].close()
+        del connections['stress']
+        del connections.settings['stress']
+        shutil.rmtree(self.tmpdir)
+        super().tearDown()
+
+    def test_concurrent_writes_do_not_fail(self):
+        with connections['stress'].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+
+        @retry_on_busy(using='stress')
+        def write(n):
+            # Read, then write in the same transaction: the pattern that
+            # deadlocks two deferred transactions upgrading their locks
+            comments = IssueComment.objects.using('stress').filter(issue_id=self.issue.id).count()
+            IssueComment.objects.using('stress').create(issue_id=self.issue.id, user_id=self.user.id, content=f'{n} after {comments}')
+            NotificationLog.objects.using('stress').create(
+                issue_id=self.issue.id, authority_id=self.authority.id, email_address='a@example.com', status='sent',
+            )
+
+        errors = []
+
+        def worker(thread):
+            try:
+                for i in range(self.WRITES_PER_THREAD):
+                    write(thread * 1000 + i)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections['stress'].close()
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.WRITES_PER_THREAD
+        self.assertEqual(IssueComment.objects.using('stress').count(), total)
+        self.assertEqual(NotificationLog.objects.using('stress').count(), total)
+
+
+class DatabaseAggregateTests(AuthorityTestMixin, TestCase):
+    """Ages, averages and rankings computed in SQL that runs on SQLite and PostgreSQL"""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for days in range(25):
+            self.make_issues(1, reported_at=now - timedelta(days=days, hours=1))
+        self.make_issues(1, status='resolved', reported_at=now - timedelta(days=400))
+        self.water = Authority.objects.create(name='Water Authority')
+        Issue.objects.create(
+            title='Leak', category=Category.objects.create(authority=self.water, name='Leaks'),
+            latitude='9.93', longitude='76.26', reported_at=now - timedelta(days=100),
+        )
+        Authority.objects.create(name='Idle Board')
+
+    def test_silence_scores_and_statistics(self):
+        with self.assertNumQueries(1):
+            scores = self.client.get(reverse('api_authority_silence_scores')).json()['authorities']
+        self.assertEqual([a['name'] for a in scores], ['Water Authority', 'Municipal Corporation', 'Idle Board'])
+        self.assertEqual([round(a['silence_score']) for a in scores], [100, 12, 0])  # Resolved issues excluded
+        self.assertEqual(self.authority.get_silence_score(), scores[1]['silence_score'])
+
+        self.assertEqual(self.client.get(reverse('api_statistics')).json()['avg_days_ignored'], 15)
+
+    def test_unaddressed_issues_are_ranked_and_counted_in_sql(self):
+        oldest = Issue.objects.filter(category=self.category, status='ignored').order_by('reported_at').first()
+        for n in range(3):
+            IssueConfirmation.objects.create(issue=oldest, user=User.objects.create_user(f'confirmer{n}'))
+        for n in range(2):
+            IssueComment.objects.create(issue=oldest, user=self.user, content=f'Still there {n}')
+
+        issues = self.client.get(reverse('api_unaddressed_issues')).json()['issues']
+        self.assertEqual(len(issues), 20)
+        self.assertEqual([i['days_ignored'] for i in issues[:3]], [100, 24, 23])
+        self.assertEqual((issues[1]['id'], issues[1]['confirmation_count'], issues[1]['comment_count']), (oldest.id, 3, 2))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only (set DATABASE_URL)')
+    def test_exports_stream_inside_a_transaction_on_postgresql(self):
+        depth = len(connection.savepoint_ids)  # The test's own transaction
+        depths = [len(connection.savepoint_ids) for _ in exports._rows('issues', exports.export_queryset('issues', {}))]
+        self.assertTrue(depths and min(depths) > depth)
+
+
+@TEST_SETTINGS
+class SerializerTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.make_issues(2, severity=2, reported_at=now - timedelta(days=45))
+        self.make_issues(1, status='acknowledged', reported_at=now - timedelta(days=10), acknowledged_at=now - timedelta(days=2))
+        self.make_issues(1, severity=4)
+
+    def test_records_match_model_properties(self):
+        records = serializers.fetch_records(Issue.objects.all(), confirmations=True)
+        issues = Issue.objects.select_related('category__authority').annotate(confirmation_count=Count('confirmations'))
+        for record, issue in zip(records, issues):
+            self.assertEqual(serializers.serialize(record, serializers.DETAIL_FIELDS), {
+                'id': issue.id, 'title': issue.title, 'description': issue.description,
+                'category': 'Garbage', 'authority': 'Municipal Corporation',
+                'authority_color': self.authority.color, 'severity': issue.severity,
+                'status': issue.status, 'status_display': issue.get_status_display(),
+                'address': issue.address, 'latitude': 9.9312, 'longitude': 76.2673,
+                'reported_at': issue.reported_at.isoformat(),
+                'days_since_report': issue.days_since_report, 'days_ignored': issue.days_ignored,
+                'urgency_level': issue.urgency_level, 'urgency_color': issue.urgency_color,
+                'confirmation_count': 0, 'icon': self.category.icon,
+            })
+        self.assertEqual({r.urgency_level for r in records}, {'critical', 'moderate', 'serious'})
+
+    def test_map_payload_in_constant_queries_with_either_encoder(self):
+        with self.assertNumQueries(2):
+            features = self.client.get(reverse('api_issues')).json()['features']
+        self.assertEqual(len(features), 4)
+        self.assertEqual(features[0]['geometry']['coordinates'], [76.2673, 9.9312])
+        self.assertEqual(list(features[0]['properties']), list(serializers.MAP_FIELDS))
+
+        with unittest.mock.patch.object(serializers, 'orjson', None):
+            response = self.client.get(reverse('api_issues'))
+        self.assertEqual(response.json()['features'], features)
+        self.assertNotIn(b', ', response.content)  # Compact separators
+
+    def test_columnar_payload_decodes_to_the_geojson_properties(self):
+        features = self.client.get(reverse('api_issues'), {'status': 'ignored'}).json()['features']
+        data = self.client.get(reverse('api_issues'), {'status': 'ignored', 'format': 'columnar'}).json()
+        columns = data['columns']
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(len(data['categories']), 1)
+
+        for i, feature in enumerate(features):
+            # As issueProps() in app.js
+            category = data['categories'][str(columns['category'][i])]
+            authority = data['authorities'][str(category['authority'])]
+            status = data['statuses'][columns['status'][i]]
+            urgency = data['urgencies'][columns['urgency'][i]]
+            props = {name: columns[name][i] for name in (
+                'id', 'title', 'description', 'severity', 'address', 'reported_at',
+                'days_since_report', 'days_ignored', 'confirmation_count',
+            )}
+            props.update(
+                category=category['name'], icon=category['icon'], authority=authority['name'],
+                authority_color=authority['color'], status=status['code'], status_display=status['display'],
+                urgency_level=urgency['level'], urgency_color=urgency['color'],
+            )
+            self.assertEqual(props, feature['properties'])
+            self.assertEqual([columns['lng'][i], columns['lat'][i]], feature['geometry']['coordinates'])
+
+        self.assertEqual(self.client.get(reverse('api_issues'), {'format': 'csv'}).status_code, 400)
+
+
+@TEST_SETTINGS
+class CompressionTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.make_issues(20)
+
+    def test_negotiation(self):
+        self.assertEqual(compression.negotiate('gzip, deflate'), 'gzip')
+        self.assertEqual(compression.negotiate('gzip;q=0, identity'), None)
+        self.assertEqual(compression.negotiate('*'), 'br' if compression.brotli else 'gzip')
+        self.assertEqual(compression.negotiate(''), None)
+
+    def test_cached_body_is_compressed_once_per_data_version(self):
+        url = reverse('api_issues')
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        with self.assertNumQueries(0), unittest.mock.patch.object(compression, 'compress') as compress:
+            self.assertEqual(self.client.get(url, HTTP_ACCEPT_ENCODING='gzip').content, response.content)
+        compress.assert_not_called()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        Issue.objects.create(title='New', category=self.category, latitude='9.93', longitude='76.26')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(response.content))['features']), 21)
+
+    def test_middleware_compresses_uncached_json(self):
+        response = self.client.get(reverse('api_issues_nearby'), {'lat': 9.9312, 'lng': 76.2673}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content))['count'], 20)
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        small = self.client.get(reverse('api_autocomplete'), {'q': 'zz'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+
+
+class VersionedCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_moves_only_its_namespace(self):
+        heatmap_key, details_key = versioned_key('heatmap'), versioned_key('details')
+        bump('heatmap')
+        self.assertNotEqual(versioned_key('heatmap'), heatmap_key)
+        self.assertEqual(versioned_key('details'), details_key)
+
+    def test_bump_after_eviction_still_invalidates(self):
+        first = versioned_key('heatmap')
+        cache.delete('heatmap:version')
+        bump('heatmap')
+        self.assertNotEqual(versioned_key('heatmap'), first)
+
+
+@TEST_SETTINGS
+class IssueDetailCacheTests(AuthorityTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.issues = self.make_issues(3)
+
+    def test_slim_listing(self):
+        features = self.client.get(reverse('api_issues'), {'fields': 'slim'}).json()['features']
+        self.assertEqual(list(features[0]['properties']), list(serializers.SLIM_MAP_FIELDS))
+        data = self.client.get(reverse('api_issues'), {'fields': 'slim', 'format': 'columnar'}).json()
+        self.assertEqual(set(data['columns']), {'id', 'lat', 'lng', 'category', 'status', 'severity', 'urgency'})
+        self.assertEqual(self.client.get(reverse('api_issues'), {'fields': 'all'}).status_code, 400)
+
+    def test_details_are_cached_until_the_issue_changes(self):
+        issue = self.issues[0]
+        url = reverse('api_issue_detail', args=[issue.id])
+        self.assertEqual(self.client.get(url).json()['confirmation_count'], 0)
+        with self.assertNumQueries(3):  # Session, user and the user's own confirmation
+            self.assertFalse(self.client.get(url).json()['user_confirmed'])
+
+        IssueConfirmation.objects.create(issue=issue, user=self.user)
+        data = self.client.get(url).json()
+        self.assertEqual((data['confirmation_count'], data['user_confirmed']), (1, True))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_issue(issue.id, self.authority_user, 'accept')
+        self.assertEqual(self.client.get(url).json()['status'], 'acknowledged')
+        self.assertEqual(self.client.get(reverse('api_issue_detail', args=[999])).status_code, 404)
+
+    def test_batch_details(self):
+        ids = ','.join(str(issue.id) for issue in self.issues) + ',999'
+        data = self.client.get(reverse('api_issues_batch'), {'ids': ids}).json()
+        self.assertEqual([i['id'] for i in data['issues']], [issue.id for issue in self.issues])
+        self.assertEqual(data['missing'], [999])
+        first = data['issues'][0]
+        self.assertEqual(first.pop('comments'), [])
+        self.assertEqual(first, self.client.get(reverse('api_issue_detail', args=[self.issues[0].id])).json())
+
+        too_many = ','.join(str(i) for i in range(details.MAX_BATCH + 1))
+        self.assertEqual(self.client.get(reverse('api_issues_batch'), {'ids': too_many}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('api_issues_batch'), {'ids': 'a'}).status_code, 400)
+
+    def test_batch_runs_a_fixed_number_of_queries(self):
+        issues = self.issues + self.make_issues(97)
+        for issue in issues[:50]:
+            IssueConfirmation.objects.create(issue=issue, user=self.user)
+            NotificationLog.objects.create(issue=issue, authority=self.authority, email_address='a@example.com', status='sent')
+            for n in range(4):
+                IssueComment.objects.create(issue=issue, user=self.user, content=f'Comment {n}')
+
+        def batch(count):
+            cache.clear()
+            ids = ','.join(str(issue.id) for issue in issues[:count])
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(reverse('api_issues_batch'), {'ids': ids, 'comments': 2}).json()
+            return len(ctx.captured_queries), data['issues']
+
+        small, _ = batch(2)
+        # Session, user, issues, notifications, the user's confirmations, comments
+        self.assertEqual(batch(100)[0], small)
+        self.assertEqual(small, 6)
+
+        first = batch(100)[1][0]
+        self.assertEqual([c['content'] for c in first['comments']], ['Comment 3', 'Comment 2'])
+        self.assertTrue(first['user_confirmed'])
+        self.assertEqual(first['notification']['status'], 'sent')
+        self.assertNotIn('comments', self.client.get(reverse('api_issues_batch'), {'ids': issues[0].id, 'comments': 0}).json()['issues'][0])
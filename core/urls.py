@@ -10,16 +10,22 @@ urlpatterns = [
     # API endpoints
     path('api/issues/', views.api_issues, name='api_issues'),
     path('api/issues/nearby/', views.api_issues_nearby, name='api_issues_nearby'),
-<<<<<<< HEAD
+    path('api/issues/search/', views.api_issues_search, name='api_issues_search'),
+    path('api/autocomplete/', views.api_autocomplete, name='api_autocomplete'),
+    path('api/issues/heatmap/', views.api_issues_heatmap, name='api_issues_heatmap'),
     path('api/issues/radius/', views.api_issues_radius, name='api_issues_radius'),
-=======
+    path('api/issues/batch/', views.api_issues_batch, name='api_issues_batch'),
     path('api/issues/unaddressed/', views.api_unaddressed_issues, name='api_unaddressed_issues'),
->>>>>>> 2df7404 (11th commit)
     path('api/issues/<int:issue_id>/', views.api_issue_detail, name='api_issue_detail'),
     path('api/issues/<int:issue_id>/confirm/', views.confirm_issue, name='confirm_issue'),
     path('api/issues/<int:issue_id>/comments/', views.api_issue_comments, name='api_issue_comments'),
     path('api/issues/<int:issue_id>/comment/', views.api_add_comment, name='api_add_comment'),
     path('api/statistics/', views.api_statistics, name='api_statistics'),
+    path('api/statistics/timeseries/', views.api_statistics_timeseries, name='api_statistics_timeseries'),
+    path('api/statistics/resolution-times/', views.api_resolution_times, name='api_resolution_times'),
+    path('api/export/<str:dataset>/', views.export_data, name='export_data'),
+    path('api/wards/', views.api_wards, name='api_wards'),
+    path('api/wards/<int:ward_id>/', views.api_ward_detail, name='api_ward_detail'),
     path('api/authorities/silence-scores/', views.api_authority_silence_scores, name='api_authority_silence_scores'),
     
     # Citizen Authentication
@@ -34,5 +40,6 @@ urlpatterns = [
     path('authority/issues/<int:issue_id>/accept/', views.authority_accept_issue, name='authority_accept_issue'),
     path('authority/issues/<int:issue_id>/progress/', views.authority_start_progress, name='authority_start_progress'),
     path('authority/issues/<int:issue_id>/complete/', views.authority_complete_issue, name='authority_complete_issue'),
+    path('authority/issues/bulk/', views.authority_bulk_transition, name='authority_bulk_transition'),
 ]
 
@@ -1,23 +1,42 @@
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import JsonResponse
-from django.contrib.auth import login, authenticate, logout
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.contrib.auth import login, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.core.exceptions import ValidationError
 from django.views.decorators.http import require_POST
-from django.db.models import Count, Avg
+from django.views.static import serve as static_serve
+from django.db.models import Count, Avg, F, Q
 from django.utils import timezone
-from django.core.paginator import Paginator
-from datetime import timedelta
+from datetime import datetime, timedelta
 from functools import wraps
 import json
-import math
 
-<<<<<<< HEAD
-from .models import Authority, Category, Issue, IssueConfirmation, UserProfile, NotificationLog, AuthorityUser, IssueStatusLog
+from .models import (
+    Authority, Category, Issue, IssueConfirmation, IssueComment, UserProfile,
+    AuthorityUser, Ward,
+    UNRESOLVED_STATUSES, age_of, duration_days,
+)
+from .analytics import resolution_summary
+from .compression import cached_response
+from .duplicates import find_duplicates
+from .exports import FORMATS, ExportError, export_queryset, export_stream
+from .geo import bounding_box, haversine_distance
+from . import autocomplete, details, heatmap, serializers
+from .images import process_upload, perceptual_hash, schedule_thumbnails
 from .notifications import send_authority_notification
+from .pagination import keyset_paginate
+from .rollups import timeseries
+from .retry import retry_on_busy
+from .routers import read_from_replica, records_write
+from .search import search_issues
+from .storage import is_content_addressed
+from .wards import ward_for_point, ward_statistics
+from .workflow import TRANSITIONS, transition_issue, bulk_transition_issues
 
 
+@read_from_replica
 def landing_page(request):
     """Landing page - The opening experience"""
     # Get some stats for impact
@@ -27,11 +46,9 @@ def landing_page(request):
         'days_ignored': Issue.objects.filter(status='ignored').count(),
     }
     return render(request, 'core/landing.html', {'stats': stats})
-=======
-from .models import Authority, Category, Issue, IssueConfirmation, IssueComment, UserProfile
->>>>>>> 2df7404 (11th commit)
 
 
+@read_from_replica
 def index(request):
     """Main map view"""
     authorities = Authority.objects.prefetch_related('categories').all()
@@ -53,11 +70,23 @@ def index(request):
     return render(request, 'core/index.html', context)
 
 
+@read_from_replica
+@cached_response
 def api_issues(request):
-    """Return all issues as GeoJSON for the map"""
-    issues = Issue.objects.select_related('category', 'category__authority').annotate(
-        confirmation_count=Count('confirmations')
-    )
+    """
+    Return all issues as GeoJSON for the map, or with ?format=columnar as
+    parallel arrays (see serializers.columnar). ?fields=slim returns only
+    what a marker needs; details are loaded per issue when shown.
+    """
+    output = request.GET.get('format', 'geojson')
+    if output not in ('geojson', 'columnar'):
+        return JsonResponse({'success': False, 'message': 'format must be geojson or columnar'}, status=400)
+    fields = request.GET.get('fields', 'full')
+    if fields not in ('full', 'slim'):
+        return JsonResponse({'success': False, 'message': 'fields must be full or slim'}, status=400)
+    slim = fields == 'slim'
+    
+    issues = Issue.objects.all()
     
     # Filter by authority if specified
     authority_id = request.GET.get('authority')
@@ -74,41 +103,166 @@ def api_issues(request):
     if status:
         issues = issues.filter(status=status)
     
-    features = []
-    for issue in issues:
-        features.append({
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Point',
-                'coordinates': [float(issue.longitude), float(issue.latitude)]
-            },
-            'properties': {
-                'id': issue.id,
-                'title': issue.title,
-                'description': issue.description,
-                'category': issue.category.name,
-                'authority': issue.category.authority.name,
-                'authority_color': issue.category.authority.color,
-                'severity': issue.severity,
-                'status': issue.status,
-                'status_display': issue.get_status_display(),
-                'address': issue.address,
-                'reported_at': issue.reported_at.isoformat(),
-                'days_since_report': issue.days_since_report,
-                'days_ignored': issue.days_ignored,
-                'urgency_level': issue.urgency_level,
-                'urgency_color': issue.urgency_color,
-                'confirmation_count': issue.confirmation_count,
-                'icon': issue.category.icon,
-            }
-        })
+    records = serializers.fetch_records(issues, confirmations=not slim, slim=slim)
+    if output == 'columnar':
+        return serializers.json_response(serializers.columnar(records, slim=slim))
     
     geojson = {
         'type': 'FeatureCollection',
-        'features': features
+        'features': serializers.features(records, serializers.SLIM_MAP_FIELDS if slim else serializers.MAP_FIELDS),
     }
     
-    return JsonResponse(geojson)
+    return serializers.json_response(geojson)
+
+
+def export_data(request, dataset):
+    """
+    Stream a dataset (issues, status-logs, notifications) as CSV, NDJSON
+    or GeoJSON. Takes the api_issues filters plus since/until, and
+    ?gzip=1 for a compressed download. Audit logs are staff-only.
+    """
+    if dataset != 'issues' and not request.user.is_staff:
+        return JsonResponse({
+            'success': False,
+            'message': 'Audit log exports are restricted to staff'
+        }, status=403)
+
+    file_format = request.GET.get('format', 'csv')
+    gzip = request.GET.get('gzip') == '1'
+    try:
+        queryset = export_queryset(dataset, request.GET)
+        chunks = export_stream(dataset, file_format, queryset, gzip=gzip)
+    except ExportError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    content_type, extension = FORMATS[file_format]
+    filename = f'{dataset}.{extension}'
+    if gzip:
+        content_type, filename = 'application/gzip', f'{filename}.gz'
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def api_issues_heatmap(request):
+    """
+    Heatmap cells of unresolved issues for one zoom level, weighted by
+    severity and days ignored. ?zoom= (required), ?shape=square|hex,
+    ?cell= (pixels), ?bbox=west,south,east,north (the visible map), plus
+    the authority/category filters of api_issues.
+    """
+    try:
+        zoom = int(request.GET.get('zoom', ''))
+        cell_px = int(request.GET.get('cell', heatmap.DEFAULT_CELL_PX))
+        authority_id = int(request.GET['authority']) if request.GET.get('authority') else None
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'zoom, cell, authority and category must be integers'
+        }, status=400)
+    
+    shape = request.GET.get('shape', 'square')
+    if shape not in heatmap.SHAPES or not 0 <= zoom <= heatmap.MAX_ZOOM:
+        return JsonResponse({
+            'success': False,
+            'message': f'shape must be square or hex and zoom between 0 and {heatmap.MAX_ZOOM}'
+        }, status=400)
+    cell_px = min(max(cell_px, heatmap.MIN_CELL_PX), heatmap.MAX_CELL_PX)
+    
+    bbox = None
+    if request.GET.get('bbox'):
+        try:
+            west, south, east, north = (float(value) for value in request.GET['bbox'].split(','))
+        except ValueError:
+            west = south = east = north = 0  # Rejected below
+        # Clamped to the world, so a map panned past the antimeridian still works
+        bbox = (max(west, -180), max(south, -90), min(east, 180), min(north, 90))
+        if not (bbox[0] < bbox[2] and bbox[1] < bbox[3]):
+            return JsonResponse({
+                'success': False,
+                'message': 'bbox must be west,south,east,north with west < east and south < north'
+            }, status=400)
+    
+    return JsonResponse(heatmap.get_heatmap(zoom, shape, cell_px, authority_id, category_id, bbox))
+
+
+def api_issues_search(request):
+    """
+    Full-text search over issue title, description, address and category,
+    best match first. The last word matches as a prefix. Optional filters:
+    status (comma-separated), authority, category, and lat/lng/radius (km).
+    """
+    text = request.GET.get('q', '').strip()
+    if not text:
+        return JsonResponse({'success': False, 'message': 'q is required'}, status=400)
+    
+    try:
+        limit = min(int(request.GET.get('limit', 20)), 100)
+        authority_id = int(request.GET['authority']) if request.GET.get('authority') else None
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+        center = None
+        if request.GET.get('lat') and request.GET.get('lng'):
+            center = float(request.GET['lat']), float(request.GET['lng'])
+            radius_km = float(request.GET.get('radius', 5))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid numeric parameter'}, status=400)
+    
+    issues = Issue.objects.select_related('category', 'category__authority')
+    statuses = [s for s in request.GET.get('status', '').split(',') if s]
+    if statuses:
+        issues = issues.filter(status__in=statuses)
+    if authority_id:
+        issues = issues.filter(category__authority_id=authority_id)
+    if category_id:
+        issues = issues.filter(category_id=category_id)
+    if center:
+        min_lat, max_lat, min_lng, max_lng = bounding_box(*center, radius_km)
+        issues = issues.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+    
+    results = []
+    for issue in search_issues(issues, text).iterator(chunk_size=limit):
+        result = {
+            'id': issue.id,
+            'title': issue.title,
+            'category': issue.category.name,
+            'authority': issue.category.authority.name,
+            'status': issue.status,
+            'address': issue.address,
+            'latitude': float(issue.latitude),
+            'longitude': float(issue.longitude),
+            'rank': round(issue.rank, 4),
+        }
+        if center:
+            # The bounding box is a prefilter; keep only the true circle
+            distance = haversine_distance(*center, float(issue.latitude), float(issue.longitude))
+            if distance > radius_km:
+                continue
+            result['distance_km'] = round(distance, 2)
+        results.append(result)
+        if len(results) >= limit:
+            break
+    
+    return JsonResponse({'query': text, 'count': len(results), 'results': results})
+
+
+def api_autocomplete(request):
+    """
+    Typeahead suggestions (addresses, categories, authorities) for a
+    prefix, answered from the in-memory trie without touching the database.
+    """
+    text = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', autocomplete.TOP_K)), 1), autocomplete.TOP_K)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid limit'}, status=400)
+    
+    response = JsonResponse({
+        'query': text,
+        'suggestions': autocomplete.suggest(text, limit) if len(text) >= 2 else [],
+    })
+    response['Cache-Control'] = 'max-age=60'
+    return response
 
 
 def api_issues_nearby(request):
@@ -126,33 +280,13 @@ def api_issues_nearby(request):
         latitude__lte=lat + radius,
         longitude__gte=lng - radius,
         longitude__lte=lng + radius,
-    ).select_related('category', 'category__authority').annotate(
-        confirmation_count=Count('confirmations')
     )
     
-    features = []
-    for issue in issues:
-        features.append({
-            'type': 'Feature',
-            'geometry': {
-                'type': 'Point',
-                'coordinates': [float(issue.longitude), float(issue.latitude)]
-            },
-            'properties': {
-                'id': issue.id,
-                'title': issue.title,
-                'category': issue.category.name,
-                'authority': issue.category.authority.name,
-                'severity': issue.severity,
-                'status': issue.status,
-                'days_ignored': issue.days_ignored,
-                'urgency_level': issue.urgency_level,
-                'urgency_color': issue.urgency_color,
-                'confirmation_count': issue.confirmation_count,
-            }
-        })
+    features = serializers.features(
+        serializers.fetch_records(issues, confirmations=True), serializers.NEARBY_FIELDS
+    )
     
-    return JsonResponse({
+    return serializers.json_response({
         'type': 'FeatureCollection',
         'features': features,
         'count': len(features)
@@ -161,59 +295,62 @@ def api_issues_nearby(request):
 
 def api_issue_detail(request, issue_id):
     """Return detailed information about a specific issue"""
-    issue = get_object_or_404(
-        Issue.objects.select_related('category', 'category__authority', 'reported_by')
-        .annotate(confirmation_count=Count('confirmations')),
-        id=issue_id
-    )
+    data = details.get_details([issue_id]).get(issue_id)
+    if data is None:
+        raise Http404('No Issue matches the given query.')
     
     # Check if current user has confirmed this issue
-    user_confirmed = False
-    if request.user.is_authenticated:
-        user_confirmed = IssueConfirmation.objects.filter(
-            issue=issue, user=request.user
-        ).exists()
-    
-    # Get notification status
-    notification = issue.notifications.first()
-    notification_status = None
-    if notification:
-        notification_status = {
-            'sent_at': notification.sent_at.isoformat(),
-            'status': notification.status,
-            'authority_notified': notification.authority.name,
-        }
+    data = dict(data, user_confirmed=issue_id in details.confirmed_by(request.user, [issue_id]))
     
-    data = {
-        'id': issue.id,
-        'title': issue.title,
-        'description': issue.description,
-        'category': issue.category.name,
-        'authority': issue.category.authority.name,
-        'authority_color': issue.category.authority.color,
-        'severity': issue.severity,
-        'status': issue.status,
-        'status_display': issue.get_status_display(),
-        'address': issue.address,
-        'latitude': float(issue.latitude),
-        'longitude': float(issue.longitude),
-        'reported_at': issue.reported_at.isoformat(),
-        'days_since_report': issue.days_since_report,
-        'days_ignored': issue.days_ignored,
-        'urgency_level': issue.urgency_level,
-        'urgency_color': issue.urgency_color,
-        'confirmation_count': issue.confirmation_count,
-        'reported_by': issue.reported_by.username if issue.reported_by else 'Anonymous',
-        'user_confirmed': user_confirmed,
-        'image_url': issue.image.url if issue.image else None,
-        'escalation_label': issue.escalation_label,
-        'escalation_display': issue.escalation_display,
-        'notification': notification_status,
-    }
+    return serializers.json_response(data)
+
+
+def api_issues_batch(request):
+    """
+    Details of up to details.MAX_BATCH issues (?ids=1,2,3), as
+    api_issue_detail returns them (with the current user's confirmation
+    state and the latest notification), plus each issue's latest
+    ?comments=N comments (none with comments=0). A fixed number of queries
+    whatever the batch size. Unknown IDs are listed under 'missing'.
+    """
+    try:
+        issue_ids = list(dict.fromkeys(int(i) for i in request.GET.get('ids', '').split(',') if i))
+        comment_limit = min(max(int(request.GET.get('comments', details.COMMENTS_PER_ISSUE)), 0), details.MAX_COMMENTS)
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'ids and comments must be integers'}, status=400)
+    if not issue_ids or len(issue_ids) > details.MAX_BATCH:
+        return JsonResponse({
+            'success': False,
+            'message': f'Between 1 and {details.MAX_BATCH} ids are required'
+        }, status=400)
     
-    return JsonResponse(data)
+    found = details.get_details(issue_ids)
+    confirmed = details.confirmed_by(request.user, list(found))
+    issues = [dict(found[i], user_confirmed=i in confirmed) for i in issue_ids if i in found]
+    if comment_limit:
+        comments = details.top_comments(list(found), comment_limit)
+        for issue in issues:
+            issue['comments'] = comments.get(issue['id'], [])
+    
+    return serializers.json_response({
+        'issues': issues,
+        'missing': [i for i in issue_ids if i not in found],
+    })
+
 
+def serve_media(request, path, document_root=None):
+    """
+    Serve user uploads (development only; see blindspot/urls.py).
+    Content-addressed files never change, so they are marked immutable.
+    """
+    response = static_serve(request, path, document_root=document_root)
+    if is_content_addressed(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
+
+@read_from_replica
+@cached_response
 def api_statistics(request):
     """Return aggregate statistics for the dashboard"""
     now = timezone.now()
@@ -233,12 +370,9 @@ def api_statistics(request):
         .order_by('-count')
     )
     
-    # Average days ignored for unresolved issues
-    ignored_issues = Issue.objects.filter(status='ignored')
-    avg_days_ignored = 0
-    if ignored_issues.exists():
-        total_days = sum(i.days_ignored for i in ignored_issues)
-        avg_days_ignored = total_days // ignored_issues.count()
+    # Average days ignored for unresolved issues (averaged in the database)
+    ignored_age = Issue.objects.filter(status='ignored').aggregate(age=Avg(age_of('reported_at')))['age']
+    avg_days_ignored = ignored_age.days if ignored_age else 0
     
     # Recent activity
     new_this_week = Issue.objects.filter(reported_at__gte=week_ago).count()
@@ -258,6 +392,110 @@ def api_statistics(request):
     })
 
 
+def api_resolution_times(request):
+    """
+    Time-to-acknowledge / time-to-resolve percentiles per authority and
+    month (per category with ?category=). Reads precomputed histograms only.
+    Optional filters: authority, category, metric, since/until (YYYY-MM).
+    """
+    try:
+        authority_id = int(request.GET['authority']) if request.GET.get('authority') else None
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+        since, until = (
+            datetime.strptime(request.GET[key], '%Y-%m').date() if request.GET.get(key) else None
+            for key in ('since', 'until')
+        )
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'authority/category must be IDs and since/until YYYY-MM'
+        }, status=400)
+    
+    return JsonResponse({'results': resolution_summary(
+        authority_id=authority_id,
+        category_id=category_id,
+        metric=request.GET.get('metric'),
+        since=since,
+        until=until,
+    )})
+
+
+def api_statistics_timeseries(request):
+    """
+    Daily trend series (new, acknowledged, resolved, backlog, ignored,
+    avg_days_ignored) from the rollup tables. Optional filters: authority,
+    category, since/until (YYYY-MM-DD, default the last year).
+    """
+    try:
+        authority_id = int(request.GET['authority']) if request.GET.get('authority') else None
+        category_id = int(request.GET['category']) if request.GET.get('category') else None
+        since, until = (
+            datetime.strptime(request.GET[key], '%Y-%m-%d').date() if request.GET.get(key) else None
+            for key in ('since', 'until')
+        )
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'authority/category must be IDs and since/until YYYY-MM-DD'
+        }, status=400)
+    
+    until = until or timezone.localdate()
+    if since and (until - since).days > 3 * 366:
+        return JsonResponse({'success': False, 'message': 'Range is limited to three years'}, status=400)
+    
+    return JsonResponse(timeseries(authority_id, category_id, since, until))
+
+
+def api_wards(request):
+    """
+    Per-ward issue counts as a GeoJSON FeatureCollection, worst first
+    (most ignored issues). Boundaries are only included with ?geometry=1.
+    """
+    include_geometry = request.GET.get('geometry') == '1'
+    fields = ['id', 'name', 'code'] + (['geometry'] if include_geometry else [])
+    stats = ward_statistics()
+    empty = {'total': 0, 'ignored': 0, 'unresolved': 0, 'resolved': 0, 'critical': 0,
+             'max_days_ignored': 0, 'resolution_rate': 0}
+    
+    features = []
+    for ward in Ward.objects.values(*fields):
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'MultiPolygon', 'coordinates': ward['geometry']} if include_geometry else None,
+            'properties': {'id': ward['id'], 'name': ward['name'], 'code': ward['code'], **stats.get(ward['id'], empty)},
+        })
+    features.sort(key=lambda f: (-f['properties']['ignored'], -f['properties']['critical']))
+    
+    return JsonResponse({'type': 'FeatureCollection', 'features': features})
+
+
+def api_ward_detail(request, ward_id):
+    """One ward with its boundary, issue counts and a per-category breakdown"""
+    ward = get_object_or_404(Ward, id=ward_id)
+    by_category = list(
+        Issue.objects.filter(ward=ward).order_by()
+        .values('category__id', 'category__name', 'category__authority__name')
+        .annotate(
+            total=Count('id'),
+            ignored=Count('id', filter=Q(status='ignored')),
+            resolved=Count('id', filter=Q(status='resolved')),
+        )
+        .order_by('-ignored')
+    )
+    
+    return JsonResponse({
+        'type': 'Feature',
+        'geometry': {'type': 'MultiPolygon', 'coordinates': ward.geometry},
+        'properties': {
+            'id': ward.id,
+            'name': ward.name,
+            'code': ward.code,
+            **ward_statistics(ward.id).get(ward.id, {'total': 0}),
+            'by_category': by_category,
+        },
+    })
+
+
 # Authentication Views
 def register_view(request):
     """User registration"""
@@ -295,24 +533,31 @@ def logout_view(request):
     return redirect('index')
 
 
-@login_required
-@require_POST
-def confirm_issue(request, issue_id):
-    """Confirm an issue exists (community validation)"""
-    issue = get_object_or_404(Issue, id=issue_id)
-    
+@retry_on_busy
+def _save_confirmation(issue, user, comment):
+    """Record a confirmation and update the user's stats; False if already confirmed"""
     confirmation, created = IssueConfirmation.objects.get_or_create(
         issue=issue,
-        user=request.user,
-        defaults={'comment': request.POST.get('comment', '')}
+        user=user,
+        defaults={'comment': comment}
     )
     
     if created:
         # Update user profile stats
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile, _ = UserProfile.objects.get_or_create(user=user)
         profile.confirmations_count += 1
         profile.save()
-        
+    return created
+
+
+@login_required
+@records_write
+@require_POST
+def confirm_issue(request, issue_id):
+    """Confirm an issue exists (community validation)"""
+    issue = get_object_or_404(Issue, id=issue_id)
+    
+    if _save_confirmation(issue, request.user, request.POST.get('comment', '')):
         return JsonResponse({
             'success': True,
             'message': 'Issue confirmed',
@@ -325,7 +570,18 @@ def confirm_issue(request, issue_id):
         })
 
 
+@retry_on_busy
+def _save_report(user, **fields):
+    """Create the issue and update the reporter's stats in one transaction"""
+    issue = Issue.objects.create(reported_by=user, **fields)
+    profile, _ = UserProfile.objects.get_or_create(user=user)
+    profile.reports_count += 1
+    profile.save()
+    return issue
+
+
 @login_required
+@records_write
 def report_issue(request):
     """Report a new issue"""
     if request.method == 'POST':
@@ -334,30 +590,58 @@ def report_issue(request):
             
             category = get_object_or_404(Category, id=data.get('category_id'))
             
-            issue = Issue.objects.create(
+            # Re-encode the photo (bounded size, EXIF stripped) before storing it
+            image = request.FILES.get('image')
+            image_phash = ''
+            if image:
+                image = process_upload(image)
+                image_phash = perceptual_hash(image)
+            
+            # Suggest confirming an existing issue instead of filing a duplicate,
+            # unless the reporter has already seen the suggestion and insists
+            if str(data.get('force', '')).lower() not in ('1', 'true'):
+                duplicates = find_duplicates(
+                    category.id, data.get('latitude'), data.get('longitude'), image_phash
+                )
+                if duplicates:
+                    return JsonResponse({
+                        'success': False,
+                        'duplicate': True,
+                        'message': 'This issue may already have been reported nearby.',
+                        'candidates': duplicates,
+                    }, status=409)
+            
+            issue = _save_report(
+                request.user,
                 title=data.get('title'),
                 description=data.get('description', ''),
                 category=category,
                 latitude=data.get('latitude'),
                 longitude=data.get('longitude'),
                 address=data.get('address', ''),
+                ward_id=ward_for_point(data.get('latitude'), data.get('longitude')),
                 severity=int(data.get('severity', category.default_severity)),
-                reported_by=request.user,
+                image=image,
+                image_phash=image_phash,
             )
             
+            # Thumbnails are generated in the background
+            if issue.image:
+                schedule_thumbnails(issue)
+            
             # Send notification to authority (non-blocking)
             send_authority_notification(issue)
             
-            # Update user profile stats
-            profile, _ = UserProfile.objects.get_or_create(user=request.user)
-            profile.reports_count += 1
-            profile.save()
-            
             return JsonResponse({
                 'success': True,
                 'message': 'Issue reported successfully. Authority has been notified.',
                 'issue_id': issue.id
             })
+        except ValidationError as e:
+            return JsonResponse({
+                'success': False,
+                'message': ' '.join(e.messages)
+            }, status=400)
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -369,28 +653,6 @@ def report_issue(request):
     return render(request, 'core/report.html', {'categories': categories})
 
 
-<<<<<<< HEAD
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """
-    Calculate the great-circle distance between two points on Earth
-    using the Haversine formula.
-    
-    Returns distance in kilometers.
-    """
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = (math.sin(delta_lat / 2) ** 2 +
-         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
-
-
 def api_issues_radius(request):
     """
     Return unresolved issues within a specified radius (default 3km).
@@ -409,37 +671,21 @@ def api_issues_radius(request):
         return JsonResponse({'error': 'Invalid coordinates'}, status=400)
     
     # Get all unresolved issues (not resolved)
-    unresolved_statuses = ['ignored', 'acknowledged', 'in_progress']
-    issues = Issue.objects.filter(
-        status__in=unresolved_statuses
-    ).select_related('category', 'category__authority')
+    issues = Issue.objects.filter(status__in=UNRESOLVED_STATUSES)
     
     # Filter by distance using Haversine formula
     nearby_issues = []
-    for issue in issues:
-        distance = haversine_distance(
-            lat, lng,
-            float(issue.latitude), float(issue.longitude)
-        )
+    for record in serializers.fetch_records(issues):
+        distance = haversine_distance(lat, lng, record.latitude, record.longitude)
         if distance <= radius_km:
-            nearby_issues.append({
-                'id': issue.id,
-                'title': issue.title,
-                'latitude': float(issue.latitude),
-                'longitude': float(issue.longitude),
-                'distance_km': round(distance, 2),
-                'days_since_report': issue.days_since_report,
-                'urgency_level': issue.urgency_level,
-                'urgency_color': issue.urgency_color,
-                'status': issue.status,
-                'category': issue.category.name,
-                'authority': issue.category.authority.name,
-            })
+            data = serializers.serialize(record, serializers.RADIUS_FIELDS)
+            data['distance_km'] = round(distance, 2)
+            nearby_issues.append(data)
     
     # Sort by distance
     nearby_issues.sort(key=lambda x: x['distance_km'])
     
-    return JsonResponse({
+    return serializers.json_response({
         'center': {'lat': lat, 'lng': lng},
         'radius_km': radius_km,
         'unresolved_count': len(nearby_issues),
@@ -448,6 +694,8 @@ def api_issues_radius(request):
     })
 
 
+@read_from_replica
+@cached_response
 def api_authority_silence_scores(request):
     """
     Return silence scores for all authorities.
@@ -455,20 +703,23 @@ def api_authority_silence_scores(request):
     Silence Score = total_unresolved_days / total_issues
     Computed dynamically to reflect live conditions.
     """
-    authorities = Authority.objects.all()
-    
-    scores = []
-    for authority in authorities:
-        score = authority.get_silence_score()
-        scores.append({
+    # One grouped query, ordered in the database (worst performers first)
+    authorities = Authority.objects.annotate(
+        unresolved_age=Avg(
+            age_of('categories__issues__reported_at'),
+            filter=Q(categories__issues__status__in=UNRESOLVED_STATUSES),
+        ),
+    ).order_by(F('unresolved_age').desc(nulls_last=True), 'name')
+    
+    scores = [
+        {
             'id': authority.id,
             'name': authority.name,
-            'silence_score': score,
+            'silence_score': duration_days(authority.unresolved_age),
             'color': authority.color,
-        })
-    
-    # Sort by silence score descending (worst performers first)
-    scores.sort(key=lambda x: x['silence_score'], reverse=True)
+        }
+        for authority in authorities
+    ]
     
     return JsonResponse({
         'authorities': scores
@@ -483,6 +734,9 @@ def authority_required(view_func):
     """
     Decorator that checks if the user is an authenticated authority user.
     Redirects to authority login if not authenticated or not an authority.
+    
+    The AuthorityUser (with its Authority) is loaded in a single query and
+    cached as request.authority_user so wrapped views don't re-fetch it.
     """
     @wraps(view_func)
     def wrapper(request, *args, **kwargs):
@@ -491,14 +745,16 @@ def authority_required(view_func):
             return redirect('authority_login')
         
         try:
-            authority_user = request.user.authority_profile
-            if not authority_user.is_active:
-                messages.error(request, 'Your authority account has been deactivated.')
-                return redirect('authority_login')
+            authority_user = AuthorityUser.objects.select_related('authority').get(user=request.user)
         except AuthorityUser.DoesNotExist:
             messages.error(request, 'You do not have authority access.')
             return redirect('index')
         
+        if not authority_user.is_active:
+            messages.error(request, 'Your authority account has been deactivated.')
+            return redirect('authority_login')
+        
+        request.authority_user = authority_user
         return view_func(request, *args, **kwargs)
     return wrapper
 
@@ -547,32 +803,36 @@ def authority_logout(request):
 @authority_required
 def authority_dashboard(request):
     """Dashboard showing issues assigned to the logged-in authority"""
-    authority_user = request.user.authority_profile
+    authority_user = request.authority_user
     authority = authority_user.authority
     
     # Get issues for this authority only
-    issues = Issue.objects.filter(
-        category__authority=authority
-    ).select_related('category').order_by('-reported_at')
+    authority_issues = Issue.objects.filter(category__authority=authority)
+    issues = authority_issues.select_related('category')
     
     # Filter by status if requested
     status_filter = request.GET.get('status', '')
     if status_filter:
         issues = issues.filter(status=status_filter)
     
-    # Pagination
-    paginator = Paginator(issues, 20)  # 20 issues per page
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
+    # Statistics for this authority (single conditional aggregate)
+    stats = authority_issues.aggregate(
+        total=Count('id'),
+        ignored=Count('id', filter=Q(status='ignored')),
+        acknowledged=Count('id', filter=Q(status='acknowledged')),
+        in_progress=Count('id', filter=Q(status='in_progress')),
+        resolved=Count('id', filter=Q(status='resolved')),
+    )
     
-    # Statistics for this authority
-    stats = {
-        'total': Issue.objects.filter(category__authority=authority).count(),
-        'ignored': Issue.objects.filter(category__authority=authority, status='ignored').count(),
-        'acknowledged': Issue.objects.filter(category__authority=authority, status='acknowledged').count(),
-        'in_progress': Issue.objects.filter(category__authority=authority, status='in_progress').count(),
-        'resolved': Issue.objects.filter(category__authority=authority, status='resolved').count(),
-    }
+    # Keyset pagination on (reported_at, id); the total comes from the stats
+    # above instead of a separate COUNT(*)
+    page_obj = keyset_paginate(
+        issues,
+        per_page=20,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        total=stats.get(status_filter, stats['total']),
+    )
     
     context = {
         'authority': authority,
@@ -584,147 +844,130 @@ def authority_dashboard(request):
     return render(request, 'core/authority_dashboard.html', context)
 
 
-@authority_required
-@require_POST
-def authority_accept_issue(request, issue_id):
-    """Accept an issue: Ignored → Acknowledged"""
-    authority_user = request.user.authority_profile
-    issue = get_object_or_404(Issue, id=issue_id, category__authority=authority_user.authority)
+def _authority_transition(request, issue_id, action, success_message):
+    """Shared body of the single-issue authority actions"""
+    authority_user = request.authority_user
     
-    # Validate status transition
-    if issue.status != 'ignored':
-        messages.error(request, f'Cannot accept issue. Current status is "{issue.get_status_display()}".')
+    if not transition_issue(issue_id, authority_user, action, notes=request.POST.get('notes', '')):
+        issue = get_object_or_404(Issue, id=issue_id, category__authority_id=authority_user.authority_id)
+        transition = TRANSITIONS[action]
+        messages.error(
+            request,
+            f'Cannot {transition.label.lower()}. Issue must be "{dict(Issue.STATUS_CHOICES)[transition.from_status]}" '
+            f'but is "{issue.get_status_display()}".'
+        )
         return redirect('authority_dashboard')
     
-    # Update status
-    previous_status = issue.status
-    issue.status = 'acknowledged'
-    issue.acknowledged_at = timezone.now()
-    issue.status_updated_at = timezone.now()
-    issue.save()
-    
-    # Log the change
-    IssueStatusLog.objects.create(
-        issue=issue,
-        authority_user=authority_user,
-        previous_status=previous_status,
-        new_status='acknowledged',
-        notes=request.POST.get('notes', '')
-    )
-    
-    messages.success(request, f'Issue #{issue.id} has been accepted.')
+    messages.success(request, success_message.format(issue_id=issue_id))
     return redirect('authority_dashboard')
 
 
 @authority_required
+@records_write
+@require_POST
+def authority_accept_issue(request, issue_id):
+    """Accept an issue: Ignored → Acknowledged"""
+    return _authority_transition(request, issue_id, 'accept', 'Issue #{issue_id} has been accepted.')
+
+
+@authority_required
+@records_write
 @require_POST
 def authority_start_progress(request, issue_id):
     """Start progress on an issue: Acknowledged → In Progress"""
-    authority_user = request.user.authority_profile
-    issue = get_object_or_404(Issue, id=issue_id, category__authority=authority_user.authority)
-    
-    # Validate status transition
-    if issue.status != 'acknowledged':
-        messages.error(request, f'Cannot start progress. Issue must be "Acknowledged" first.')
-        return redirect('authority_dashboard')
-    
-    # Update status
-    previous_status = issue.status
-    issue.status = 'in_progress'
-    issue.in_progress_at = timezone.now()
-    issue.status_updated_at = timezone.now()
-    issue.save()
-    
-    # Log the change
-    IssueStatusLog.objects.create(
-        issue=issue,
-        authority_user=authority_user,
-        previous_status=previous_status,
-        new_status='in_progress',
-        notes=request.POST.get('notes', '')
-    )
-    
-    messages.success(request, f'Issue #{issue.id} is now in progress.')
-    return redirect('authority_dashboard')
+    return _authority_transition(request, issue_id, 'progress', 'Issue #{issue_id} is now in progress.')
 
 
 @authority_required
+@records_write
 @require_POST
 def authority_complete_issue(request, issue_id):
     """Complete an issue: In Progress → Resolved"""
-    authority_user = request.user.authority_profile
-    issue = get_object_or_404(Issue, id=issue_id, category__authority=authority_user.authority)
+    return _authority_transition(request, issue_id, 'complete', 'Issue #{issue_id} has been marked as resolved.')
+
+
+# Upper bound on issue IDs accepted in one bulk request
+BULK_TRANSITION_LIMIT = 1000
+
+
+@authority_required
+@records_write
+@require_POST
+def authority_bulk_transition(request):
+    """
+    Apply a status transition to several issues at once.
     
-    # Validate status transition
-    if issue.status != 'in_progress':
-        messages.error(request, f'Cannot complete. Issue must be "In Progress" first.')
+    Accepts form data (issue_ids, action, notes) from the dashboard, or a
+    JSON body with the same keys, in which case a JSON summary is returned
+    instead of a redirect.
+    """
+    is_json = request.content_type == 'application/json'
+    try:
+        data = json.loads(request.body) if is_json else request.POST
+        action = data.get('action')
+        raw_ids = data.get('issue_ids', []) if is_json else data.getlist('issue_ids')
+        issue_ids = [int(issue_id) for issue_id in raw_ids]
+    except (ValueError, TypeError):
+        issue_ids, action = None, None
+    
+    error = None
+    if action not in TRANSITIONS:
+        error = 'Invalid bulk action.'
+    elif not issue_ids:
+        error = 'Select at least one issue.'
+    elif len(issue_ids) > BULK_TRANSITION_LIMIT:
+        error = f'At most {BULK_TRANSITION_LIMIT} issues can be updated at once.'
+    
+    if error:
+        if is_json:
+            return JsonResponse({'success': False, 'message': error}, status=400)
+        messages.error(request, error)
         return redirect('authority_dashboard')
     
-    # Update status
-    previous_status = issue.status
-    issue.status = 'resolved'
-    issue.resolved_at = timezone.now()
-    issue.status_updated_at = timezone.now()
-    issue.save()
-    
-    # Log the change
-    IssueStatusLog.objects.create(
-        issue=issue,
-        authority_user=authority_user,
-        previous_status=previous_status,
-        new_status='resolved',
-        notes=request.POST.get('notes', '')
+    updated_ids, skipped_ids = bulk_transition_issues(
+        request.authority_user, issue_ids, action, notes=data.get('notes', '')
     )
     
-    messages.success(request, f'Issue #{issue.id} has been marked as resolved.')
+    if is_json:
+        return JsonResponse({
+            'success': True,
+            'updated': updated_ids,
+            'skipped': skipped_ids,
+        })
+    
+    if updated_ids:
+        messages.success(request, f'{len(updated_ids)} issue(s) updated.')
+    if skipped_ids:
+        messages.warning(request, f'{len(skipped_ids)} issue(s) skipped: not in the required status.')
     return redirect('authority_dashboard')
-=======
+
+
 def api_unaddressed_issues(request):
     """Return unaddressed (ignored) issues sorted by days ignored (descending)"""
-    issues = Issue.objects.filter(status='ignored').select_related(
-        'category', 'category__authority'
-    ).annotate(
-        confirmation_count=Count('confirmations'),
-        comment_count=Count('comments')
+    # Ignored issues are ignored since they were reported, so the longest
+    # ignored are the oldest; sorted and limited to 20 in the database
+    issues = Issue.objects.filter(status='ignored').order_by('reported_at', 'id')[:20]
+    records = serializers.fetch_records(issues, confirmations=True)
+    
+    # Counted separately: joining comments as well would fan out the confirmation count
+    comment_counts = dict(
+        IssueComment.objects.filter(issue_id__in=[record.id for record in records])
+        .order_by().values('issue_id').annotate(n=Count('id')).values_list('issue_id', 'n')
     )
     
-    # Sort by days ignored (calculated in Python since it's a property)
-    issues_list = list(issues)
-    issues_list.sort(key=lambda x: x.days_ignored, reverse=True)
-    
-    # Limit to top 20 for sidebar display
-    issues_list = issues_list[:20]
-    
     result = []
-    for rank, issue in enumerate(issues_list, 1):
-        result.append({
-            'id': issue.id,
-            'rank': rank,
-            'title': issue.title,
-            'category': issue.category.name,
-            'authority': issue.category.authority.name,
-            'days_ignored': issue.days_ignored,
-            'urgency_level': issue.urgency_level,
-            'urgency_color': issue.urgency_color,
-            'confirmation_count': issue.confirmation_count,
-            'comment_count': issue.comment_count,
-            'address': issue.address,
-        })
+    for rank, data in enumerate(serializers.serialize_many(records, serializers.UNADDRESSED_FIELDS), 1):
+        data['rank'] = rank
+        data['comment_count'] = comment_counts.get(data['id'], 0)
+        result.append(data)
     
-    return JsonResponse({'issues': result})
+    return serializers.json_response({'issues': result})
 
 
 def api_issue_comments(request, issue_id):
     """Get comments for an issue"""
     issue = get_object_or_404(Issue, id=issue_id)
-    comments = issue.comments.select_related('user').all()[:10]
-    
-    result = [{
-        'id': c.id,
-        'user': c.user.username,
-        'content': c.content,
-        'created_at': c.created_at.isoformat(),
-    } for c in comments]
+    result = details.top_comments([issue.id], details.MAX_COMMENTS).get(issue.id, [])
     
     return JsonResponse({'comments': result})
 
@@ -751,7 +994,7 @@ def api_add_comment(request, issue_id):
                 'message': 'Comment must be 500 characters or less'
             }, status=400)
         
-        comment = IssueComment.objects.create(
+        comment = retry_on_busy(IssueComment.objects.create)(
             issue=issue,
             user=request.user,
             content=content
@@ -760,12 +1003,7 @@ def api_add_comment(request, issue_id):
         return JsonResponse({
             'success': True,
             'message': 'Comment added successfully',
-            'comment': {
-                'id': comment.id,
-                'user': comment.user.username,
-                'content': comment.content,
-                'created_at': comment.created_at.isoformat(),
-            }
+            'comment': details.comment_payload(comment),
         })
     except Exception as e:
         return JsonResponse({
@@ -773,4 +1011,3 @@ def api_add_comment(request, issue_id):
             'message': str(e)
         }, status=400)
 
->>>>>>> 2df7404 (11th commit)
@@ -0,0 +1,172 @@
+"""
+Ward tagging for The Blindspot Initiative.
+
+Ward boundaries are plain GeoJSON polygons stored on Ward, so this works
+on SQLite without PostGIS. Point lookups go through an in-memory grid
+index: the wards' combined extent is split into GRID_SIZE x GRID_SIZE
+cells, each listing the wards whose bounding box touches it, so a lookup
+only runs the exact point-in-polygon test on one or two candidates.
+
+The index is built lazily per process and rebuilt when any Ward changes
+(tracked through a cache version, see core.cache; other workers notice
+when the cache is shared).
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Min, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump, versioned_key
+from .geo import multipolygon_bbox, point_in_multipolygon
+from .models import Issue, Ward
+
+GRID_SIZE = 64
+
+# Issues tagged per UPDATE during a backfill
+ASSIGN_BATCH_SIZE = 2000
+
+
+def normalize_geometry(geometry):
+    """GeoJSON Polygon / MultiPolygon geometry as MultiPolygon coordinates"""
+    geometry = geometry or {}
+    if geometry.get('type') == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry.get('type') == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f'Unsupported geometry type: {geometry.get("type")!r}')
+
+
+class WardIndex:
+    """Uniform grid over ward bounding boxes"""
+
+    def __init__(self, wards):
+        # wards: iterable of (id, polygons, (min_lat, max_lat, min_lng, max_lng))
+        self.wards = list(wards)
+        self.cells = defaultdict(list)
+        if not self.wards:
+            return
+        self.min_lat = min(bbox[0] for _, _, bbox in self.wards)
+        self.max_lat = max(bbox[1] for _, _, bbox in self.wards)
+        self.min_lng = min(bbox[2] for _, _, bbox in self.wards)
+        self.max_lng = max(bbox[3] for _, _, bbox in self.wards)
+        self.cell_lat = (self.max_lat - self.min_lat) / GRID_SIZE or 1
+        self.cell_lng = (self.max_lng - self.min_lng) / GRID_SIZE or 1
+
+        for entry in self.wards:
+            min_lat, max_lat, min_lng, max_lng = entry[2]
+            row_start, col_start = self._cell(min_lat, min_lng)
+            row_end, col_end = self._cell(max_lat, max_lng)
+            for row in range(row_start, row_end + 1):
+                for col in range(col_start, col_end + 1):
+                    self.cells[(row, col)].append(entry)
+
+    def _cell(self, lat, lng):
+        row = min(int((lat - self.min_lat) / self.cell_lat), GRID_SIZE - 1)
+        col = min(int((lng - self.min_lng) / self.cell_lng), GRID_SIZE - 1)
+        return row, col
+
+    def lookup(self, lat, lng):
+        """ID of the ward containing the point, or None"""
+        if not self.wards or not (self.min_lat <= lat <= self.max_lat and self.min_lng <= lng <= self.max_lng):
+            return None
+        for ward_id, polygons, (min_lat, max_lat, min_lng, max_lng) in self.cells.get(self._cell(lat, lng), ()):
+            if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng and point_in_multipolygon(lat, lng, polygons):
+                return ward_id
+        return None
+
+
+_index = None
+_index_version = None
+
+
+def invalidate():
+    bump('wards')
+
+
+def get_index():
+    """The current process's ward index, rebuilt after ward changes"""
+    global _index, _index_version
+    version = versioned_key('wards')
+    if _index is None or _index_version != version:
+        rows = Ward.objects.values_list('id', 'geometry', 'min_lat', 'max_lat', 'min_lng', 'max_lng')
+        _index = WardIndex((pk, geometry, bbox) for pk, geometry, *bbox in rows)
+        _index_version = version
+    return _index
+
+
+def ward_for_point(lat, lng):
+    """ID of the ward containing a point, or None when outside every ward"""
+    return get_index().lookup(float(lat), float(lng))
+
+
+def save_ward(code, name, geometry):
+    """Create or update a ward from a GeoJSON geometry"""
+    polygons = normalize_geometry(geometry)
+    min_lat, max_lat, min_lng, max_lng = multipolygon_bbox(polygons)
+    ward, _ = Ward.objects.update_or_create(code=code, defaults={
+        'name': name,
+        'geometry': polygons,
+        'min_lat': min_lat,
+        'max_lat': max_lat,
+        'min_lng': min_lng,
+        'max_lng': max_lng,
+    })
+    return ward
+
+
+def assign_wards(issues):
+    """
+    Tag issues with their ward, one keyset-paginated batch at a time with
+    one UPDATE per ward in the batch. Returns the number of issues whose
+    ward changed.
+    """
+    index = get_index()
+    changed = 0
+    last_id = 0
+    while True:
+        rows = list(
+            issues.filter(id__gt=last_id).order_by('id')
+            .values_list('id', 'latitude', 'longitude', 'ward_id')[:ASSIGN_BATCH_SIZE]
+        )
+        if not rows:
+            return changed
+        last_id = rows[-1][0]
+
+        by_ward = defaultdict(list)
+        for issue_id, lat, lng, current in rows:
+            ward_id = index.lookup(float(lat), float(lng))
+            if ward_id != current:
+                by_ward[ward_id].append(issue_id)
+        for ward_id, ids in by_ward.items():
+            changed += Issue.objects.filter(id__in=ids).update(ward_id=ward_id)
+
+
+def ward_statistics(ward_id=None):
+    """Per-ward issue counts from one grouped query, keyed by ward ID"""
+    now = timezone.now()
+    issues = Issue.objects.filter(ward__isnull=False)
+    if ward_id:
+        issues = issues.filter(ward_id=ward_id)
+    rows = issues.order_by().values('ward_id').annotate(
+        total=Count('id'),
+        ignored=Count('id', filter=Q(status='ignored')),
+        unresolved=Count('id', filter=~Q(status='resolved')),
+        resolved=Count('id', filter=Q(status='resolved')),
+        critical=Count('id', filter=Q(status='ignored', severity__gte=4)),
+        oldest_ignored=Min('reported_at', filter=Q(status='ignored')),
+    )
+    stats = {}
+    for row in rows:
+        oldest = row.pop('oldest_ignored')
+        row['max_days_ignored'] = (now - oldest).days if oldest else 0
+        row['resolution_rate'] = round(row['resolved'] * 100 / row['total'], 1) if row['total'] else 0
+        stats[row.pop('ward_id')] = row
+    return stats
+
+
+@receiver(post_save, sender=Ward, dispatch_uid='core.wards.ward_saved')
+@receiver(post_delete, sender=Ward, dispatch_uid='core.wards.ward_deleted')
+def _invalidate_index(sender, **kwargs):
+    invalidate()
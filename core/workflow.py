@@ -0,0 +1,179 @@
+"""
+Issue status workflow for The Blindspot Initiative.
+
+The one place that defines which status transitions are allowed, which
+timestamp field each transition stamps, and the hooks fired once a
+transition has committed. Views, the admin, bulk endpoints and management
+commands all go through transition_issue() / bulk_transition_issues().
+
+Side effects (cache invalidation, counters, live events, notifications)
+subscribe to the issue_status_changed signal:
+
+    @receiver(issue_status_changed)
+    def on_status_changed(sender, event, **kwargs):
+        ...
+
+Every receiver gets the same TransitionEvent, whose `issues` rows are
+loaded at most once, so adding hooks does not add queries per hook.
+"""
+from collections import namedtuple
+import logging
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import Issue, IssueStatusLog
+
+logger = logging.getLogger(__name__)
+
+
+Transition = namedtuple('Transition', ['action', 'from_status', 'to_status', 'timestamp_field', 'label'])
+
+# Authority actions, keyed by the action name used in URLs and forms
+TRANSITIONS = {
+    'accept': Transition('accept', 'ignored', 'acknowledged', 'acknowledged_at', 'Accept'),
+    'progress': Transition('progress', 'acknowledged', 'in_progress', 'in_progress_at', 'Start Work'),
+    'complete': Transition('complete', 'in_progress', 'resolved', 'resolved_at', 'Mark Complete'),
+}
+
+_STATUSES = {value for value, _ in Issue.STATUS_CHOICES}
+for _transition in TRANSITIONS.values():
+    if not {_transition.from_status, _transition.to_status} <= _STATUSES:
+        raise ImproperlyConfigured(f'Transition {_transition.action!r} uses an unknown Issue status')
+
+# Current status -> the transition available from it
+TRANSITION_FROM = {t.from_status: t for t in TRANSITIONS.values()}
+
+# Sent after a transition commits, once per call (single or bulk)
+issue_status_changed = Signal()
+
+
+def can_transition(from_status, to_status):
+    """Check whether the workflow allows moving from one status to another"""
+    transition = TRANSITION_FROM.get(from_status)
+    return transition is not None and transition.to_status == to_status
+
+
+class TransitionEvent:
+    """
+    Describes one committed transition for the signal receivers.
+
+    Carries everything the engine already knows (IDs, transition, actor,
+    time) so most hooks need no query at all.
+    """
+
+    def __init__(self, transition, issue_ids, authority_user, changed_at, notes=''):
+        self.transition = transition
+        self.issue_ids = issue_ids
+        self.authority_user = authority_user
+        self.changed_at = changed_at
+        self.notes = notes
+
+    @cached_property
+    def issues(self):
+        """Post-transition rows for the changed issues, loaded once and shared by every hook"""
+        return list(
+            Issue.objects.filter(id__in=self.issue_ids).values(
+                'id', 'status', 'severity', 'category_id', 'category__authority_id',
+                'reported_at', 'acknowledged_at', 'in_progress_at', 'resolved_at',
+            )
+        )
+
+
+def _send_on_commit(event):
+    """Fire issue_status_changed after the surrounding transaction commits"""
+    def send():
+        for receiver, response in issue_status_changed.send_robust(sender=Issue, event=event):
+            if isinstance(response, Exception):
+                logger.error(
+                    'Status hook %r failed for %s', receiver, event.transition.action,
+                    exc_info=(type(response), response, response.__traceback__),
+                )
+    transaction.on_commit(send)
+
+
+def _scoped_issues(authority_user, transition):
+    """Issues the actor may move with this transition (admins pass authority_user=None)"""
+    issues = Issue.objects.filter(status=transition.from_status)
+    if authority_user is not None:
+        issues = issues.filter(category__authority_id=authority_user.authority_id)
+    return issues
+
+
+def transition_issue(issue_id, authority_user, action, notes=''):
+    """
+    Move a single issue through a status transition without a read-check-write race.
+
+    The status check and the write happen in one conditional
+    UPDATE ... WHERE status=<expected>, so when two requests race only one
+    of them changes the row, and only that one writes an IssueStatusLog.
+
+    Returns True if the issue was transitioned, False if it was not found,
+    not owned by the authority, or not in the required status.
+    """
+    transition = TRANSITIONS[action]
+    now = timezone.now()
+
+    with transaction.atomic():
+        changed = _scoped_issues(authority_user, transition).filter(id=issue_id).update(**{
+            'status': transition.to_status,
+            transition.timestamp_field: now,
+            'status_updated_at': now,
+        })
+        if changed:
+            IssueStatusLog.objects.create(
+                issue_id=issue_id,
+                authority_user=authority_user,
+                previous_status=transition.from_status,
+                new_status=transition.to_status,
+                notes=notes,
+            )
+            _send_on_commit(TransitionEvent(transition, [issue_id], authority_user, now, notes))
+    return bool(changed)
+
+
+def bulk_transition_issues(authority_user, issue_ids, action, notes=''):
+    """
+    Apply one status transition to many issues.
+
+    Issues not in the required current status (or not owned by the
+    authority) are skipped. Valid issues are updated with a single UPDATE
+    and their IssueStatusLog rows written with bulk_create, all inside
+    one transaction.
+
+    Returns (updated_ids, skipped_ids).
+    """
+    transition = TRANSITIONS[action]
+    issue_ids = set(issue_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        scoped = _scoped_issues(authority_user, transition)
+        updated_ids = sorted(
+            scoped.select_for_update().filter(id__in=issue_ids).values_list('id', flat=True)
+        )
+        # Every row gets the same values, so one UPDATE ... WHERE id IN (...)
+        # replaces bulk_update's per-row CASE expressions
+        scoped.filter(id__in=updated_ids).update(**{
+            'status': transition.to_status,
+            transition.timestamp_field: now,
+            'status_updated_at': now,
+        })
+        IssueStatusLog.objects.bulk_create([
+            IssueStatusLog(
+                issue_id=issue_id,
+                authority_user=authority_user,
+                previous_status=transition.from_status,
+                new_status=transition.to_status,
+                notes=notes,
+            )
+            for issue_id in updated_ids
+        ], batch_size=500)
+        if updated_ids:
+            _send_on_commit(TransitionEvent(transition, updated_ids, authority_user, now, notes))
+
+    skipped_ids = sorted(issue_ids.difference(updated_ids))
+    return updated_ids, skipped_ids
@@ -10,13 +10,20 @@ let markersLayer;
 let heatmapLayer;
 let userLocationMarker;
 let customLocationMarker;
-let issuesData = [];
+let issuesData = null; // Slim columnar payload from the issues API
+let issueDetails = new Map(); // Issue ID -> details, loaded on demand
+let prefetchTimer;
 let nearbyMarkerIds = []; // Track IDs of nearby issues for glow effect
 let isCustomLocation = false; // Track if viewing a custom searched location
 let searchDebounceTimer;
+let geocodeDebounceTimer;
+let autocompleteController = null;
+let serverSuggestions = []; // From the app's own autocomplete endpoint
+let geocodeResults = []; // From Nominatim
 let currentFilters = {
     authority: 'all',
-    status: 'all'
+    status: 'all',
+    category: 'all'
 };
 let heatmapVisible = false;
 
@@ -24,15 +31,68 @@ let heatmapVisible = false;
 document.addEventListener('DOMContentLoaded', function () {
     initMap();
     loadIssues();
-<<<<<<< HEAD
     loadSilenceScores(); // Load authority silence scores
-=======
     loadUnaddressedIssues();
->>>>>>> 2df7404 (11th commit)
     setupEventListeners();
     setupLocationSearch(); // Initialize location search
 });
 
+/**
+ * Wire up the filter buttons and map controls
+ */
+function setupEventListeners() {
+    document.querySelectorAll('.filter-btn[data-authority]').forEach(btn => {
+        btn.addEventListener('click', () => setFilter('authority', btn.dataset.authority));
+    });
+    document.querySelectorAll('.status-btn[data-status]').forEach(btn => {
+        btn.addEventListener('click', () => setFilter('status', btn.dataset.status));
+    });
+
+    const heatmapBtn = document.getElementById('btn-toggle-heatmap');
+    if (heatmapBtn) {
+        heatmapBtn.addEventListener('click', toggleHeatmap);
+    }
+    const refreshBtn = document.getElementById('btn-refresh');
+    if (refreshBtn) {
+        refreshBtn.addEventListener('click', () => {
+            loadIssues();
+            loadUnaddressedIssues();
+        });
+    }
+
+    // My Location button
+    document.getElementById('btn-my-location').addEventListener('click', showMyLocation);
+
+    // Nearby panel close
+    document.getElementById('nearby-close').addEventListener('click', function () {
+        document.getElementById('nearby-panel').style.display = 'none';
+    });
+
+    // Modal close
+    document.getElementById('modal-close').addEventListener('click', closeModal);
+    document.querySelector('.modal-backdrop').addEventListener('click', closeModal);
+}
+
+/**
+ * Apply a filter (authority, status or category) and reload the issues
+ */
+function setFilter(kind, value) {
+    currentFilters[kind] = value;
+    if (kind === 'authority') {
+        document.querySelectorAll('.filter-btn[data-authority]').forEach(btn => {
+            btn.classList.toggle('active', btn.dataset.authority === value);
+        });
+    } else if (kind === 'status') {
+        document.querySelectorAll('.status-btn[data-status]').forEach(btn => {
+            btn.classList.toggle('active', btn.dataset.status === value);
+        });
+    }
+    loadIssues();
+    if (heatmapVisible) {
+        renderHeatmap();
+    }
+}
+
 /**
  * Initialize Leaflet Map
  */
@@ -69,6 +129,23 @@ function initMap() {
     });
 
     map.addLayer(markersLayer);
+
+    // Heatmap cells are aggregated per zoom level and clipped to the view
+    map.on('moveend', function () {
+        if (heatmapVisible) {
+            renderHeatmap();
+        }
+    });
+
+    // Details are loaded ahead for the issues in view, and for a cluster's
+    // issues when the pointer is over it
+    map.on('moveend', schedulePrefetch);
+    markersLayer.on('clustermouseover', function (event) {
+        const ids = event.layer.getAllChildMarkers().map(marker => marker.issueId);
+        if (ids.length <= MAX_DETAIL_BATCH) {
+            getIssueDetails(ids).catch(() => {});
+        }
+    });
 }
 
 /**
@@ -100,7 +177,7 @@ function updateMapTheme() {
 async function loadIssues() {
     try {
         let url = MAP_CONFIG.apiIssues;
-        const params = new URLSearchParams();
+        const params = new URLSearchParams({ format: 'columnar', fields: 'slim' });
 
         if (currentFilters.authority !== 'all') {
             params.append('authority', currentFilters.authority);
@@ -108,19 +185,20 @@ async function loadIssues() {
         if (currentFilters.status !== 'all') {
             params.append('status', currentFilters.status);
         }
-
-        if (params.toString()) {
-            url += '?' + params.toString();
+        if (currentFilters.category !== 'all') {
+            params.append('category', currentFilters.category);
         }
 
-        const response = await fetch(url);
-        const geojson = await response.json();
+        url += '?' + params.toString();
 
-        issuesData = geojson.features;
+        const response = await fetch(url);
+        issuesData = await response.json();
+        issueDetails = new Map(); // Reloaded data: details may have changed too
         renderMarkers(issuesData);
+        schedulePrefetch();
 
         if (heatmapVisible) {
-            renderHeatmap(issuesData);
+            renderHeatmap();
         }
 
         // Update statistics and filter counts
@@ -170,50 +248,126 @@ async function loadStatistics() {
 }
 
 /**
- * Render markers on the map
+ * Render markers on the map, straight from the columns: markers share
+ * icons, and popup content is loaded when a popup opens
  */
-function renderMarkers(features) {
+function renderMarkers(data) {
     markersLayer.clearLayers();
+    if (!data) return;
+
+    const columns = data.columns;
+    const nearby = new Set(nearbyMarkerIds);
+    const markers = new Array(data.count);
+    for (let i = 0; i < data.count; i++) {
+        const icon = createIssueIcon(
+            data.urgencies[columns.urgency[i]].level,
+            data.categories[columns.category[i]].icon,
+            nearby.has(columns.id[i])
+        );
+        const marker = L.marker([columns.lat[i], columns.lng[i]], { icon: icon });
+        marker.issueId = columns.id[i];
+        marker.bindPopup(POPUP_LOADING, {
+            maxWidth: 350,
+            className: 'issue-popup'
+        });
+        marker.on('popupopen', openIssuePopup);
+        markers[i] = marker;
+    }
+    markersLayer.addLayers(markers);
+}
 
-    features.forEach(feature => {
-        const props = feature.properties;
-        const coords = feature.geometry.coordinates;
+const POPUP_LOADING = '<div class="loading"><i class="fa-solid fa-spinner fa-spin"></i> Loading...</div>';
 
-        // Create custom icon
-        const icon = createIssueIcon(props);
+// Largest batch the details API serves, and the most comments it returns per issue
+const MAX_DETAIL_BATCH = 100;
+const MAX_COMMENTS = 10;
 
-        // Create marker
-        const marker = L.marker([coords[1], coords[0]], { icon: icon });
+/**
+ * Fill a marker's popup with the issue's details
+ */
+async function openIssuePopup(event) {
+    const marker = event.target;
+    try {
+        const details = await getIssueDetails([marker.issueId]);
+        const issue = details.get(marker.issueId);
+        marker.setPopupContent(issue ? createPopupContent(issue) : '<div class="error">Issue not found.</div>');
+    } catch (error) {
+        console.error('Error loading issue details:', error);
+        marker.setPopupContent('<div class="error">Failed to load issue details.</div>');
+    }
+}
 
-        // Bind popup
-        marker.bindPopup(createPopupContent(props), {
-            maxWidth: 350,
-            className: 'issue-popup'
-        });
+/**
+ * Load details (and each issue's latest `comments` comments) from the
+ * batch API into the local cache
+ */
+async function fetchIssueDetails(ids, comments = 0) {
+    for (let start = 0; start < ids.length; start += MAX_DETAIL_BATCH) {
+        const batch = ids.slice(start, start + MAX_DETAIL_BATCH);
+        const params = new URLSearchParams({ ids: batch.join(','), comments: comments });
+        const response = await fetch(`${MAP_CONFIG.apiIssuesBatch}?${params}`);
+        if (!response.ok) {
+            throw new Error(`Details request failed: ${response.status}`);
+        }
+        const data = await response.json();
+        data.issues.forEach(issue => issueDetails.set(issue.id, issue));
+    }
+}
 
-        // Add to cluster group
-        markersLayer.addLayer(marker);
-    });
+/**
+ * Details for some issues, from the local cache or the batch API (with
+ * their latest comments when `comments` is set).
+ * Returns a Map of issue ID -> details.
+ */
+async function getIssueDetails(ids, comments = 0) {
+    const missing = ids.filter(id => !issueDetails.has(id) || (comments && !issueDetails.get(id).comments));
+    await fetchIssueDetails(missing, comments);
+    return new Map(ids.filter(id => issueDetails.has(id)).map(id => [id, issueDetails.get(id)]));
 }
 
 /**
- * Create custom marker icon based on urgency
- * Adds glow effect if marker is within proximity radius
+ * Prefetch details once the map settles, if few enough issues are in view
  */
-function createIssueIcon(props) {
-    const urgency = props.urgency_level;
-    const icon = props.icon || 'fa-exclamation';
-
-    // Add nearby-glow class if this issue is within 3km radius
-    const isNearby = nearbyMarkerIds.includes(props.id);
-    const nearbyClass = isNearby ? ' marker-nearby-glow' : '';
-
-    return L.divIcon({
-        className: `issue-marker urgency-${urgency}${nearbyClass}`,
-        html: `<i class="fa-solid ${icon}"></i>`,
-        iconSize: [32, 32],
-        iconAnchor: [16, 16]
-    });
+function schedulePrefetch() {
+    clearTimeout(prefetchTimer);
+    prefetchTimer = setTimeout(prefetchVisibleDetails, 300);
+}
+
+function prefetchVisibleDetails() {
+    if (!issuesData) return;
+    const bounds = map.getBounds();
+    const columns = issuesData.columns;
+    const ids = [];
+    for (let i = 0; i < issuesData.count; i++) {
+        if (bounds.contains([columns.lat[i], columns.lng[i]])) {
+            ids.push(columns.id[i]);
+            if (ids.length > MAX_DETAIL_BATCH) return;
+        }
+    }
+    getIssueDetails(ids).catch(error => console.error('Error prefetching issue details:', error));
+}
+
+/**
+ * Marker icon for an urgency level and category icon, shared by every
+ * marker that looks the same. Adds a glow if the marker is within the
+ * proximity radius.
+ */
+const issueIcons = new Map();
+function createIssueIcon(urgency, iconName, isNearby) {
+    const icon = iconName || 'fa-exclamation';
+    const key = `${urgency}|${icon}|${isNearby}`;
+    let divIcon = issueIcons.get(key);
+    if (!divIcon) {
+        const nearbyClass = isNearby ? ' marker-nearby-glow' : '';
+        divIcon = L.divIcon({
+            className: `issue-marker urgency-${urgency}${nearbyClass}`,
+            html: `<i class="fa-solid ${icon}"></i>`,
+            iconSize: [32, 32],
+            iconAnchor: [16, 16]
+        });
+        issueIcons.set(key, divIcon);
+    }
+    return divIcon;
 }
 
 /**
@@ -293,23 +447,46 @@ function getStatusIcon(status) {
 }
 
 /**
- * Render heatmap layer
+ * Render heatmap layer from server-side cells for the current zoom
  */
-function renderHeatmap(features) {
+let heatmapRequest = 0;
+async function renderHeatmap() {
+    const params = new URLSearchParams({ zoom: Math.round(map.getZoom()) });
+    if (currentFilters.authority !== 'all') {
+        params.append('authority', currentFilters.authority);
+    }
+    if (currentFilters.category !== 'all') {
+        params.append('category', currentFilters.category);
+    }
+    // Only the cells in view, plus a margin so the glow at the edges is kept
+    const bounds = map.getBounds().pad(0.25);
+    params.append('bbox', [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+        .map(value => value.toFixed(5)).join(','));
+
+    const request = ++heatmapRequest;
+    let data;
+    try {
+        const response = await fetch(`${MAP_CONFIG.apiHeatmap}?${params}`);
+        data = await response.json();
+    } catch (error) {
+        console.error('Error loading heatmap:', error);
+        return;
+    }
+    // A newer move/filter change superseded this response, or the heatmap was hidden
+    if (request !== heatmapRequest || !heatmapVisible) return;
+
     if (heatmapLayer) {
         map.removeLayer(heatmapLayer);
     }
 
-    const heatData = features.map(f => {
-        const coords = f.geometry.coordinates;
-        const intensity = getHeatIntensity(f.properties);
-        return [coords[1], coords[0], intensity];
-    });
+    // Cells are [lat, lng, weight, count]
+    const heatData = data.cells.map(cell => [cell[0], cell[1], cell[2]]);
 
     heatmapLayer = L.heatLayer(heatData, {
         radius: 35,
         blur: 20,
         maxZoom: 15,
+        max: Math.max(data.max_weight, 1),
         gradient: {
             0.2: '#22c55e',
             0.4: '#eab308',
@@ -320,59 +497,6 @@ function renderHeatmap(features) {
     }).addTo(map);
 }
 
-/**
- * Calculate heat intensity based on issue properties
- */
-function getHeatIntensity(props) {
-    // Combine severity and days ignored for intensity
-    const severityWeight = props.severity / 5;
-    const daysWeight = Math.min(props.days_ignored / 60, 1);
-    return (severityWeight + daysWeight) / 2;
-}
-
-/**
- * Setup event listeners
- */
-function setupEventListeners() {
-    // Authority filter buttons
-    document.querySelectorAll('.filter-btn[data-authority]').forEach(btn => {
-        btn.addEventListener('click', function () {
-            document.querySelectorAll('.filter-btn[data-authority]').forEach(b => b.classList.remove('active'));
-            this.classList.add('active');
-            currentFilters.authority = this.dataset.authority;
-            loadIssues();
-        });
-    });
-
-    // Status filter buttons
-    document.querySelectorAll('.status-btn').forEach(btn => {
-        btn.addEventListener('click', function () {
-            document.querySelectorAll('.status-btn').forEach(b => b.classList.remove('active'));
-            this.classList.add('active');
-            currentFilters.status = this.dataset.status;
-            loadIssues();
-        });
-    });
-
-    // My Location button
-    document.getElementById('btn-my-location').addEventListener('click', showMyLocation);
-
-    // Toggle Heatmap button
-    document.getElementById('btn-toggle-heatmap').addEventListener('click', toggleHeatmap);
-
-    // Refresh button
-    document.getElementById('btn-refresh').addEventListener('click', loadIssues);
-
-    // Nearby panel close
-    document.getElementById('nearby-close').addEventListener('click', function () {
-        document.getElementById('nearby-panel').style.display = 'none';
-    });
-
-    // Modal close
-    document.getElementById('modal-close').addEventListener('click', closeModal);
-    document.querySelector('.modal-backdrop').addEventListener('click', closeModal);
-}
-
 /**
  * Show user's location and nearby issues ("You Walked Past This" mode)
  */
@@ -454,11 +578,53 @@ async function loadNearbyUnresolvedIssues(lat, lng) {
         // Refresh markers to apply glow effect to nearby ones
         renderMarkers(issuesData);
 
+        // List the nearest ones, with their details and comments from one batch request
+        const nearest = data.issues.slice(0, MAX_DETAIL_BATCH);
+        const details = await getIssueDetails(nearest.map(issue => issue.id), MAX_COMMENTS);
+        renderNearbyUnresolved(nearest, details);
+
     } catch (error) {
         console.error('Error loading nearby unresolved issues:', error);
     }
 }
 
+/**
+ * Fill the nearby panel with unresolved issues (nearest first) and their details
+ */
+function renderNearbyUnresolved(issues, details) {
+    const panel = document.getElementById('nearby-panel');
+    const content = document.getElementById('nearby-content');
+
+    if (issues.length === 0) {
+        panel.style.display = 'none';
+        return;
+    }
+
+    content.innerHTML = issues.map(issue => {
+        const detail = details.get(issue.id) || {};
+        const comments = detail.comments || [];
+        const latest = comments.length ? `
+            <div class="nearby-meta"><i class="fa-solid fa-comment"></i> ${escapeHtml(comments[0].content)}</div>
+        ` : '';
+        return `
+            <div class="nearby-item" onclick="focusIssue(${issue.id}, ${issue.latitude}, ${issue.longitude})">
+                <div class="nearby-urgency" style="background: ${issue.urgency_color}; box-shadow: 0 0 6px ${issue.urgency_color};"></div>
+                <div class="nearby-info">
+                    <div class="nearby-title">${escapeHtml(issue.title)}</div>
+                    <div class="nearby-meta">${escapeHtml(issue.category)} • ${issue.distance_km} km • ${detail.days_ignored || 0} days ignored</div>
+                    <div class="nearby-meta">
+                        <i class="fa-solid fa-users"></i> ${detail.confirmation_count || 0}${detail.user_confirmed ? ' (you)' : ''}
+                        ${detail.notification ? ` • ${escapeHtml(detail.notification.authority_notified)} notified` : ''}
+                    </div>
+                    ${latest}
+                </div>
+            </div>
+        `;
+    }).join('');
+
+    panel.style.display = 'block';
+}
+
 /**
  * Show the proximity overlay with a message
  */
@@ -536,11 +702,12 @@ function toggleHeatmap() {
 
     if (heatmapVisible) {
         btn.classList.add('active');
-        renderHeatmap(issuesData);
+        renderHeatmap();
     } else {
         btn.classList.remove('active');
         if (heatmapLayer) {
             map.removeLayer(heatmapLayer);
+            heatmapLayer = null;
         }
     }
 }
@@ -556,8 +723,10 @@ async function showIssueDetails(issueId) {
     modal.classList.add('active');
 
     try {
-        const response = await fetch(`/api/issues/${issueId}/`);
-        const issue = await response.json();
+        const issue = (await getIssueDetails([issueId])).get(issueId);
+        if (!issue) {
+            throw new Error(`Issue ${issueId} not found`);
+        }
 
         modalBody.innerHTML = `
             <div class="issue-detail">
@@ -585,6 +754,12 @@ async function showIssueDetails(issueId) {
                     </div>
                 </div>
                 
+                ${issue.image ? `
+                    <img src="${issue.image.src}" srcset="${issue.image.srcset}" sizes="(max-width: 640px) 100vw, 640px"
+                         alt="${escapeHtml(issue.title)}" loading="lazy"
+                         style="width: 100%; border-radius: var(--radius-md); margin-bottom: 1.5rem;">
+                ` : ''}
+
                 <div style="margin-bottom: 1.5rem;">
                     <h4 style="font-size: 0.85rem; text-transform: uppercase; color: var(--text-muted); margin-bottom: 0.5rem;">Description</h4>
                     <p style="color: var(--text-secondary); line-height: 1.7;">${escapeHtml(issue.description)}</p>
@@ -670,7 +845,6 @@ function escapeHtml(text) {
 }
 
 /**
-<<<<<<< HEAD
  * Load and display silence scores for all authorities
  */
 async function loadSilenceScores() {
@@ -715,23 +889,36 @@ function setupLocationSearch() {
 
     if (!searchInput) return;
 
-    // Input event with debounce for autocomplete
+    // Input event with debounce for autocomplete: our own suggestions
+    // (cheap, answered from memory) come quickly, geocoding follows
     searchInput.addEventListener('input', function (e) {
         const query = e.target.value.trim();
 
         // Show/hide clear button
         clearBtn.style.display = query ? 'block' : 'none';
 
-        // Clear previous timer
+        // Clear previous timers
         clearTimeout(searchDebounceTimer);
+        clearTimeout(geocodeDebounceTimer);
 
-        if (query.length < 3) {
+        if (query.length < 2) {
+            serverSuggestions = [];
+            geocodeResults = [];
             hideSuggestions();
             return;
         }
 
-        // Debounce API calls (300ms)
         searchDebounceTimer = setTimeout(() => {
+            fetchAutocomplete(query);
+        }, 150);
+
+        if (query.length < 3) {
+            geocodeResults = [];
+            return;
+        }
+
+        // Debounce Nominatim calls (300ms)
+        geocodeDebounceTimer = setTimeout(() => {
             geocodeLocation(query);
         }, 300);
     });
@@ -757,6 +944,31 @@ function setupLocationSearch() {
     });
 }
 
+/**
+ * Fetch address, category and authority suggestions from the server,
+ * cancelling any request still in flight for an older query
+ */
+async function fetchAutocomplete(query) {
+    if (autocompleteController) {
+        autocompleteController.abort();
+    }
+    autocompleteController = new AbortController();
+
+    try {
+        const params = new URLSearchParams({ q: query });
+        const response = await fetch(`${MAP_CONFIG.apiAutocomplete}?${params}`, {
+            signal: autocompleteController.signal
+        });
+        const data = await response.json();
+        serverSuggestions = data.suggestions;
+        renderSuggestions();
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Autocomplete error:', error);
+        }
+    }
+}
+
 /**
  * Geocode location using OpenStreetMap Nominatim API
  */
@@ -776,7 +988,10 @@ async function geocodeLocation(query) {
 
     } catch (error) {
         console.error('Geocoding error:', error);
-=======
+    }
+}
+
+/**
  * Load unaddressed issues for the sidebar list
  */
 async function loadUnaddressedIssues() {
@@ -838,43 +1053,81 @@ async function loadUnaddressedIssues() {
             </div>
         `).join('');
 
+        // Details and comments for the whole list in one request, so opening
+        // an issue or its comments needs no further round trip
+        fetchIssueDetails(data.issues.map(issue => issue.id), MAX_COMMENTS)
+            .catch(error => console.error('Error loading issue details:', error));
+
     } catch (error) {
         console.error('Error loading unaddressed issues:', error);
         listEl.innerHTML = '<div class="unaddressed-error">Failed to load</div>';
->>>>>>> 2df7404 (11th commit)
     }
 }
 
 /**
-<<<<<<< HEAD
- * Display autocomplete suggestions
+ * Display geocoding results below the server suggestions
  */
 function showSearchSuggestions(results) {
+    geocodeResults = results;
+    renderSuggestions();
+}
+
+/**
+ * Display autocomplete suggestions
+ */
+function renderSuggestions() {
     const container = document.getElementById('search-suggestions');
+    const icons = {
+        address: 'fa-location-dot',
+        category: 'fa-tag',
+        authority: 'fa-building-columns'
+    };
 
-    if (results.length === 0) {
+    const items = serverSuggestions.map(result => ({
+        kind: result.kind,
+        id: result.id,
+        lat: result.latitude,
+        lng: result.longitude,
+        name: result.text,
+        detail: `${result.count} issue${result.count === 1 ? '' : 's'}`
+    })).concat(geocodeResults.map(result => ({
+        kind: 'address',
+        lat: result.lat,
+        lng: result.lon,
+        name: result.display_name
+    })));
+
+    if (items.length === 0) {
         container.innerHTML = '<div class="no-results">No locations found</div>';
         container.classList.add('visible');
         return;
     }
 
-    container.innerHTML = results.map(result => `
+    container.innerHTML = items.map(item => `
         <div class="suggestion-item" 
-             data-lat="${result.lat}" 
-             data-lng="${result.lon}"
-             data-name="${escapeHtml(result.display_name)}">
-            <i class="fa-solid fa-location-dot"></i>
-            <span>${escapeHtml(result.display_name)}</span>
+             data-kind="${item.kind}"
+             data-id="${item.id ?? ''}"
+             data-lat="${item.lat ?? ''}" 
+             data-lng="${item.lng ?? ''}"
+             data-name="${escapeHtml(item.name)}">
+            <i class="fa-solid ${icons[item.kind]}"></i>
+            <span>${escapeHtml(item.name)}</span>
+            ${item.detail ? `<small class="suggestion-detail">${item.detail}</small>` : ''}
         </div>
     `).join('');
 
     // Add click handlers
     container.querySelectorAll('.suggestion-item').forEach(item => {
         item.addEventListener('click', function () {
-            const lat = parseFloat(this.dataset.lat);
-            const lng = parseFloat(this.dataset.lng);
-            const name = this.dataset.name;
-            selectLocation(lat, lng, name);
+            if (this.dataset.kind === 'address') {
+                const lat = parseFloat(this.dataset.lat);
+                const lng = parseFloat(this.dataset.lng);
+                selectLocation(lat, lng, this.dataset.name);
+            } else {
+                document.getElementById('location-search').value = this.dataset.name;
+                hideSuggestions();
+                setFilter(this.dataset.kind, this.dataset.id);
+            }
         });
     });
 
@@ -888,7 +1141,10 @@ function hideSuggestions() {
     const container = document.getElementById('search-suggestions');
     if (container) {
         container.classList.remove('visible');
-=======
+    }
+}
+
+/**
  * Toggle comments section for an issue
  */
 async function toggleComments(issueId) {
@@ -898,15 +1154,19 @@ async function toggleComments(issueId) {
     if (section.style.display === 'none') {
         section.style.display = 'block';
 
-        // Load comments
+        // Load comments, unless the list's batch request already brought them
         try {
-            const response = await fetch(`/api/issues/${issueId}/comments/`);
-            const data = await response.json();
+            const cached = issueDetails.get(issueId);
+            let comments = cached && cached.comments;
+            if (!comments) {
+                const response = await fetch(`/api/issues/${issueId}/comments/`);
+                comments = (await response.json()).comments;
+            }
 
-            if (data.comments.length === 0) {
+            if (comments.length === 0) {
                 commentList.innerHTML = '<div class="no-comments">No comments yet. Be the first!</div>';
             } else {
-                commentList.innerHTML = data.comments.map(c => `
+                commentList.innerHTML = comments.map(c => `
                     <div class="comment-item">
                         <div class="comment-header">
                             <span class="comment-user">${escapeHtml(c.user)}</span>
@@ -978,12 +1238,10 @@ async function submitComment(issueId) {
     } catch (error) {
         console.error('Error submitting comment:', error);
         alert('Failed to submit comment. Please try again.');
->>>>>>> 2df7404 (11th commit)
     }
 }
 
 /**
-<<<<<<< HEAD
  * Select a location and pan map to it
  */
 async function selectLocation(lat, lng, name) {
@@ -1062,7 +1320,9 @@ function updateLocationButtonState() {
     } else {
         btn.classList.remove('dimmed');
     }
-=======
+}
+
+/**
  * Format ISO date to relative time
  */
 function formatDate(isoDate) {
@@ -1078,5 +1338,4 @@ function formatDate(isoDate) {
     if (diffHours < 24) return `${diffHours}h ago`;
     if (diffDays < 7) return `${diffDays}d ago`;
     return date.toLocaleDateString();
->>>>>>> 2df7404 (11th commit)
 }